@@ -0,0 +1,159 @@
+import hashlib
+import json
+
+from flask import Blueprint, Response, abort, request
+
+import db
+import league_registry
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is the fallback
+    orjson = None
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+CACHE_CONTROL = "public, max-age=15, must-revalidate"
+
+# Tables behind each league and the columns clients may select
+LEAGUE_TABLES = {"classic": "classic_league", "h2h": "h2h_league"}
+STANDINGS_FIELDS = ["gameweek", "position", "manager", "points", "entry_id"]
+WINNER_FIELDS = ["gameweek", "winner", "points"]
+DEADLINE_FIELDS = ["gameweek", "deadline"]
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=lambda value: value.isoformat(), separators=(",", ":")).encode()
+
+
+def json_response(payload):
+    """Serializes a payload with a strong ETag, answering 304 when the client's copy is current."""
+    body = dumps(payload)
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def selected_fields(allowed):
+    """Parses ?fields=a,b into a validated column list (all columns by default)."""
+    fields = request.args.get("fields")
+    if not fields:
+        return list(allowed)
+    fields = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown or not fields:
+        abort(400, description=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return fields
+
+
+def league_id_arg(league_type):
+    """The id of the ``league_type`` league of the group named by ?league=<slug> (default group)."""
+    league = league_registry.group(request.args.get("league"))
+    if league is None or league.get(league_type) is None:
+        abort(404)
+    return league[league_type]
+
+
+def page_limit():
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        abort(400, description="limit must be an integer")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def int_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        abort(400, description=f"{name} must be an integer")
+
+
+def paginate(rows, limit, columns, fields, cursor_of):
+    """Trims the extra look-ahead row and builds the response body with the next-page cursor."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    data = [{f: row[columns.index(f)] for f in fields} for row in rows]
+    return {"data": data, "next": cursor_of(rows[-1]) if has_more else None}
+
+
+@api.route("/standings/<league_type>")
+def standings(league_type):
+    """Standings rows ordered newest gameweek first, then by position.
+
+    Query parameters: ``gameweek`` to restrict to one gameweek, ``after=<gameweek>:<position>:<entry_id>``
+    (the ``next`` cursor of the previous page; tied managers share a position), ``limit``, ``fields`` and ``league``, the slug of
+    a registered league group.
+    """
+    table_name = LEAGUE_TABLES.get(league_type)
+    if table_name is None:
+        abort(404)
+    league_id = league_id_arg(league_type)
+    fields = selected_fields(STANDINGS_FIELDS)
+    limit = page_limit()
+    gameweek = int_arg("gameweek")
+
+    conditions, params = ["league_id = %s"], [league_id]
+    if gameweek is not None:
+        conditions.append("gameweek = %s")
+        params.append(gameweek)
+    after = request.args.get("after")
+    if after:
+        try:
+            after_gw, after_pos, after_entry = (int(part) for part in after.split(":"))
+        except ValueError:
+            abort(400, description="after must look like <gameweek>:<position>:<entry_id>")
+        # Keyset condition matching the (gameweek DESC, position, entry_id) index order
+        conditions.append("(gameweek < %s OR (gameweek = %s AND (position, entry_id) > (%s, %s)))")
+        params.extend([after_gw, after_gw, after_pos, after_entry])
+
+    where = f"WHERE {' AND '.join(conditions)}"
+    rows = db.fetchall(f"""
+        SELECT gameweek, position, manager, points, entry_id
+        FROM {table_name}
+        {where}
+        ORDER BY gameweek DESC, position ASC, entry_id ASC
+        LIMIT %s
+    """, (*params, limit + 1), label=f"api:standings:{league_type}")
+    return json_response(paginate(rows, limit, STANDINGS_FIELDS, fields,
+                                  lambda row: f"{row[0]}:{row[1]}:{row[4]}"))
+
+
+def gameweek_listing(table_name, columns, label, league_id=None):
+    fields = selected_fields(columns)
+    limit = page_limit()
+    after = int_arg("after") or 0
+    league_filter = "AND league_id = %s" if league_id is not None else ""
+    rows = db.fetchall(f"""
+        SELECT {', '.join(columns)}
+        FROM {table_name}
+        WHERE gameweek > %s {league_filter}
+        ORDER BY gameweek ASC
+        LIMIT %s
+    """, (max(after, 0), *([league_id] if league_id is not None else []), limit + 1), label=label)
+    return json_response(paginate(rows, limit, columns, fields, lambda row: row[0]))
+
+
+@api.route("/winners")
+def winners():
+    """Gameweek winners of a classic league in gameweek order; ``after=<gameweek>`` continues
+    from a cursor and ``league`` picks the league group."""
+    return gameweek_listing("gameweek_winners", WINNER_FIELDS, "api:winners", league_id_arg("classic"))
+
+
+@api.route("/deadlines")
+def deadlines():
+    """Gameweek deadlines in gameweek order; ``after=<gameweek>`` continues from a cursor."""
+    return gameweek_listing("fpl_deadline", DEADLINE_FIELDS, "api:deadlines")
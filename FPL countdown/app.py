@@ -1,127 +1,147 @@
-from flask import Flask, render_template
-import psycopg2
-from datetime import datetime, timezone
-import pytz
-
-# DB connection
-db_params = {
-    "host": "localhost",
-    "port": 5434,
-    "database": "fpl_data",
-    "user": "fpl_user",
-    "password": "H0grider?"
-}
+import logging
+import os
+import sys
+import time
+from flask import Flask, Response, abort, g, jsonify, render_template, request, url_for
+
+# Shared modules (db access, pipeline helpers) live next to the pipeline scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+import api
+import dashboard
+import db
+import events
+import league_registry
+import metrics
+import page_cache
+
+metrics.setup_logging()
+log = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.register_blueprint(api.api)
 
-def get_league_standings(table_name):
-    """Fetches league standings for a given table name."""
-    try:
-        conn = psycopg2.connect(**db_params)
-        cur = conn.cursor()
-        cur.execute(f"SELECT position, manager, points FROM {table_name} ORDER BY position ASC;")
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return rows
-    except Exception as e:
-        print(f"Error fetching {table_name}: {e}")
-        return []
+request_seconds = metrics.histogram("fpl_request_seconds", "Time to build each response",
+                                    ["endpoint", "method", "status"])
 
-def get_gameweek_winners():
-    """Fetches all gameweek winners."""
+# League types exposed by the app and their tables
+LEAGUE_TABLES = {"classic": "classic_league", "h2h": "h2h_league"}
+
+def registered_league(slug=None):
+    """The registered league group for a URL slug (the default group without one), or 404."""
+    league = league_registry.group(slug)
+    if league is None:
+        abort(404)
+    return league
+
+def get_league_standings(league_id, league_type, gameweek=None):
+    """Fetches a league's standings for the latest gameweek, or for the given gameweek."""
+    table_name = LEAGUE_TABLES[league_type]
     try:
-        conn = psycopg2.connect(**db_params)
-        cur = conn.cursor()
-        # Modified query to include gameweeks >= 1 and order properly
-        cur.execute("SELECT gameweek, winner, points FROM gameweek_winners WHERE gameweek >= 1 ORDER BY gameweek ASC;")
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        print(f"Fetched gameweek winners: {rows}")  # Debug print
-        return rows
+        if gameweek is None:
+            # An uncorrelated subquery, so only the latest gameweek's partition is read
+            return db.fetchall(f"SELECT position, manager, points, gameweek FROM {table_name} WHERE league_id = %s "
+                               f"AND gameweek = (SELECT MAX(gameweek) FROM {table_name} WHERE league_id = %s) "
+                               f"ORDER BY position ASC, manager;",
+                               (league_id, league_id), label=f"standings:{league_type}:latest")
+        return db.fetchall(f"SELECT position, manager, points, gameweek FROM {table_name} WHERE league_id = %s AND gameweek = %s ORDER BY position ASC, manager;",
+                           (league_id, gameweek), label=f"standings:{league_type}:gameweek")
     except Exception as e:
-        print(f"Error fetching gameweek winners: {e}")
+        log.error(f"Error fetching {table_name}: {e}")
         return []
 
-def get_classic_winner():
-    """Fetches the most recent classic league winner for the popup."""
-    try:
-        conn = psycopg2.connect(**db_params)
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT gameweek, winner, points
-            FROM gameweek_winners
-            WHERE gameweek >= 1
-            ORDER BY gameweek DESC
-            LIMIT 1
-        """)
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
-        if row:
-            winner_data = {"gameweek": row[0], "winner": row[1], "points": row[2]}
-            print(f"Classic winner data: {winner_data}")  # Debug print
-            return winner_data
-        else:
-            print("No winner data found")  # Debug print
-        return None
-    except Exception as e:
-        print(f"Error fetching classic winner: {e}")
-        return None
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
 
-def get_next_deadline():
-    """Fetches the next FPL gameweek deadline."""
-    try:
-        conn = psycopg2.connect(**db_params)
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT gameweek, deadline
-            FROM fpl_deadline
-            WHERE deadline > NOW()
-            ORDER BY deadline ASC
-            LIMIT 1
-        """)
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
-        if row:
-            est = pytz.timezone('US/Eastern')
-            return {"gameweek": row[0], "deadline": row[1].astimezone(est)}
-        return None
-    except Exception as e:
-        print(f"Error fetching next deadline: {e}")
-        return None
+@app.after_request
+def record_request(response):
+    # Streams are counted when their response starts, not for as long as they stay open
+    request_seconds.observe(time.perf_counter() - g.request_start, endpoint=request.endpoint or "none",
+                            method=request.method, status=response.status_code)
+    return response
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Counters and histograms of this process in the Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/leagues")
+def leagues():
+    """The registered league groups and where to find them."""
+    return jsonify([{"slug": league["slug"], "name": league["name"], "classic": league["classic"],
+                     "h2h": league["h2h"], "url": url_for("index", slug=league["slug"])}
+                    for league in league_registry.groups()])
+
+@app.route("/standings/<league_type>")
+@app.route("/standings/<league_type>/<int:gameweek>")
+@app.route("/leagues/<slug>/standings/<league_type>")
+@app.route("/leagues/<slug>/standings/<league_type>/<int:gameweek>")
+def standings(league_type, gameweek=None, slug=None):
+    """Current standings of a league, or its standings as of a past gameweek."""
+    league = registered_league(slug)
+    if league_type not in LEAGUE_TABLES or league[league_type] is None:
+        abort(404)
+    rows = get_league_standings(league[league_type], league_type, gameweek)
+    return jsonify({
+        "league": league_type,
+        "league_id": league[league_type],
+        "gameweek": rows[0][3] if rows else gameweek,
+        "standings": [{"position": pos, "manager": manager, "points": points} for pos, manager, points, _ in rows],
+    })
 
 @app.route("/")
-def index():
-    classic_table = get_league_standings("classic_league")
-    h2h_table = get_league_standings("h2h_league")
-    gameweek_winners = get_gameweek_winners()
-    next_deadline = get_next_deadline()
-    classic_winner = get_classic_winner()
-    
-    # Debug prints
-    print(f"Gameweek winners: {gameweek_winners}")
-    print(f"Classic winner: {classic_winner}")
-    
-    # Hardcoded team members list
-    team_members = [
-        "Ajit Pradhan", "Arbind Chiluwal", "Bharat Dankoti", "Dhiraj Khanal", 
-        "Dipendra Shrestha", "Kobid Panthi", "Prakash Pandey", "Prashant Acharya", 
-        "Rojan Malla", "Roshan Shrestha", "Sagar Pandey", "Sandeep Rupakheti", 
-        "Sanish Maharjan", "Suresh Chaudhary", "Yogesh Sapkota"
-    ]
-
-    return render_template(
+@app.route("/leagues/<slug>/")
+def index(slug=None):
+    league = registered_league(slug)
+    # Standings, winners and the next deadline come from one cached query
+    data = dashboard.get_dashboard(league)
+    next_deadline = dashboard.eastern_deadline(data["next_deadline"])
+
+    # The rendered page only changes with the data version, when the deadline rolls over or
+    # when the live standings expire
+    key = (league["slug"], data["version"], next_deadline["gameweek"] if next_deadline else None,
+           data["live"] is not None)
+    page = page_cache.cache.get(key, lambda: render_page(
         "index.html",
-        classic_table=classic_table,
-        h2h_table=h2h_table,
-        gameweek_winners=gameweek_winners,
+        league=league,
+        classic_table=data["classic_table"],
+        h2h_table=data["h2h_table"],
+        gameweek_winners=data["gameweek_winners"],
         next_deadline=next_deadline,
-        winner=classic_winner,
-        team_members=team_members
-    )
+        winner=data["classic_winner"],
+        season_form=data["season_form"],
+        live=data["live"],
+        team_members=league["members"],
+        events_url=url_for("dashboard_events", slug=league["slug"])
+    ))
+    return page_cache.cache.respond(page)
+
+def render_page(template, **context):
+    with metrics.span("render", template=template):
+        return render_template(template, **context)
+
+@app.route("/events")
+@app.route("/leagues/<slug>/events")
+def dashboard_events(slug=None):
+    """Server-sent events: a snapshot of the league's dashboard on connect, then a diff whenever it changes."""
+    league = registered_league(slug)
+    response = Response(events.broadcaster_for(league).stream(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop nginx-style proxies from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+def compile_templates():
+    """Compiles every template into the Jinja cache, so requests only render them.
+
+    Runs at import, which under gunicorn's preload_app happens once in the master, so workers
+    start with the compiled templates instead of compiling them on their first request.
+    """
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+compile_templates()
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""Benchmark of the season analytics over a synthetic manager x gameweek history.
+
+Times building the matrix and computing every aggregate with ``analytics.compute``, against
+the same per-manager statistics computed with a pandas groupby/rolling pipeline. The results
+of the two are checked against each other on a small league first.
+
+    python benchmarks/bench_analytics.py --managers 10000 --gameweeks 38
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import analytics  # noqa: E402
+
+
+def synthetic_history(managers, gameweeks, seed=0):
+    """Processed-classic-shaped rows; a few managers join late."""
+    rng = np.random.default_rng(seed)
+    entries = np.repeat(np.arange(managers), gameweeks)
+    events = np.tile(np.arange(1, gameweeks + 1), managers)
+    joined = rng.integers(1, 4, managers)
+    keep = events >= joined[entries]
+    return pd.DataFrame({
+        "entry": entries[keep] + 100_000,
+        "manager_name": [f"Manager {i}" for i in entries[keep]],
+        "event": events[keep],
+        "event_points": rng.integers(10, 120, keep.sum()),
+    })
+
+
+def groupby_stats(history, form_window=analytics.FORM_WINDOW):
+    """The per-manager statistics computed the straightforward pandas way."""
+    df = history.sort_values(["entry", "event"]).copy()
+    df["cumulative_points"] = df.groupby("entry")["event_points"].cumsum()
+    df["form"] = df.groupby("entry")["event_points"].transform(
+        lambda s: s.rolling(form_window, min_periods=1).mean())
+    df["league_rank"] = df.groupby("event")["cumulative_points"].rank(method="min", ascending=False)
+    best = df.loc[df.groupby("entry")["event_points"].idxmax(), ["entry", "event", "event_points"]]
+    worst = df.loc[df.groupby("entry")["event_points"].idxmin(), ["entry", "event", "event_points"]]
+    return df, best, worst
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def check(managers=200, gameweeks=10):
+    history = synthetic_history(managers, gameweeks, seed=1)
+    gameweek_stats, season = analytics.compute(analytics.SeasonMatrix.from_frame(history))
+    df, best, worst = groupby_stats(history)
+    merged = gameweek_stats.merge(df, left_on=["entry_id", "gameweek"], right_on=["entry", "event"])
+    assert len(merged) == len(history)
+    assert (merged["points"] == merged["event_points"]).all()
+    assert (merged["cumulative_points_x"] == merged["cumulative_points_y"]).all()
+    assert (merged["league_rank_x"] == merged["league_rank_y"]).all()
+    assert np.allclose(merged["form_x"], merged["form_y"].round(2), atol=0.006)
+    assert (season.set_index("entry_id")["best_points"] == best.set_index("entry")["event_points"]).all()
+    assert (season.set_index("entry_id")["worst_points"] == worst.set_index("entry")["event_points"]).all()
+    wins, draws, losses = season["allplay_wins"], season["allplay_draws"], season["allplay_losses"]
+    played_pairs = history.groupby("event").size().map(lambda n: n - 1)
+    assert ((wins + draws + losses) == history.groupby("entry")["event"].apply(
+        lambda events: played_pairs[events].sum()).to_numpy()).all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--managers", type=int, default=10_000)
+    parser.add_argument("--gameweeks", type=int, default=38)
+    args = parser.parse_args()
+
+    check()
+    history = synthetic_history(args.managers, args.gameweeks)
+    matrix, build_s = timed(analytics.SeasonMatrix.from_frame, history)
+    (gameweek_stats, season), compute_s = timed(analytics.compute, matrix)
+    _, groupby_s = timed(groupby_stats, history)
+
+    print(f"{len(history)} rows, {args.managers} managers x {args.gameweeks} gameweeks")
+    print(f"{'step':>34} {'seconds':>8}")
+    print(f"{'build matrix':>34} {build_s:>8.3f}")
+    print(f"{'compute (incl. all-play records)':>34} {compute_s:>8.3f}")
+    print(f"{'pandas groupby (subset of stats)':>34} {groupby_s:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark of the legacy raw JSON archive vs the compressed snapshot store.
+
+Builds a season of snapshots for both leagues, where each gameweek is fetched several times
+and every fetch changes a share of the rows (as during live matches). Compares the disk use
+of data/raw with the snapshot store, and the time of a cold (--full) processing run from each.
+
+    python benchmarks/bench_archive.py --snapshots 8 --entries 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import league_registry  # noqa: E402
+import process_leagues  # noqa: E402
+import snapshot_store  # noqa: E402
+from bench_process import SEASON_START, timed  # noqa: E402
+from fpl_stub import standings_page  # noqa: E402
+
+
+def live_snapshots(league_id, league_type, entries, gameweek, snapshots, changed, rng):
+    """Yields a gameweek's successive snapshots, each updating ``changed`` of the rows."""
+    payload = standings_page(league_id, league_type, 1, entries, gameweek, page_size=entries)
+    rows = payload["standings"]["results"]
+    for _ in range(snapshots):
+        for row in rng.sample(rows, int(len(rows) * changed)):
+            gained = rng.randint(1, 6)
+            row["event_total"] += gained
+            row["total"] += gained
+        yield json.loads(json.dumps(payload))
+
+
+def build(raw_dir, snapshot_dir, gameweeks, snapshots, entries, changed):
+    os.makedirs(raw_dir, exist_ok=True)
+    store = snapshot_store.SnapshotStore(snapshot_dir)
+    rng = random.Random(0)
+    league = league_registry.default_group()
+    leagues = [(league["classic"], "classic"), (league["h2h"], "h2h")]
+    for gw in range(1, gameweeks + 1):
+        for league_id, league_type in leagues:
+            for n, payload in enumerate(live_snapshots(league_id, league_type, entries, gw, snapshots, changed, rng)):
+                fetched_at = SEASON_START + timedelta(days=7 * (gw - 1), hours=n)
+                with open(os.path.join(raw_dir, f"league_{league_id}_{fetched_at:%Y%m%d_%H%M%S}.json"), "w") as f:
+                    json.dump(payload, f, indent=4)
+                store.append(league_id, payload, fetched_at)
+    stats = store.stats()
+    store.close()
+    return stats
+
+
+def disk_usage(directory):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(directory) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gameweeks", type=int, default=38)
+    parser.add_argument("--snapshots", type=int, default=8, help="fetches per gameweek")
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--changed", type=float, default=0.1, help="share of rows changed per fetch")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir, snapshot_dir = os.path.join(tmp, "raw"), os.path.join(tmp, "snapshots")
+        missing = os.path.join(tmp, "missing")
+        stats = build(raw_dir, snapshot_dir, args.gameweeks, args.snapshots, args.entries, args.changed)
+
+        raw_bytes, store_bytes = disk_usage(raw_dir), disk_usage(snapshot_dir)
+        raw_s = timed(process_leagues.main, full=True, raw_dir=raw_dir, snapshot_dir=missing,
+                      processed_dir=os.path.join(tmp, "processed_raw"))
+        store_s = timed(process_leagues.main, full=True, raw_dir=missing, snapshot_dir=snapshot_dir,
+                        processed_dir=os.path.join(tmp, "processed_store"))
+
+        print(f"{stats['snapshots']} snapshots, {stats['keyframes']} keyframes, codec {stats['codec']}")
+        print(f"{'archive':>14} {'MB':>9} {'cold process s':>15}")
+        print(f"{'raw JSON':>14} {raw_bytes / 1e6:>9.2f} {raw_s:>15.3f}")
+        print(f"{'snapshot store':>14} {store_bytes / 1e6:>9.2f} {store_s:>15.3f}")
+        print(f"{'ratio':>14} {raw_bytes / store_bytes:>8.1f}x {raw_s / store_s:>14.1f}x")
+
+
+if __name__ == "__main__":
+    main()
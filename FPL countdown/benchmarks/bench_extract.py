@@ -0,0 +1,117 @@
+"""Benchmark of peak memory and throughput when extracting large raw league files.
+
+Writes ``--files`` classic-league snapshots of ``--entries`` managers each, then extracts and
+cleans them in a fresh process per method, so each reports its own peak RSS:
+- dicts: the previous approach, every file json.load-ed up front, a dict per row, then a DataFrame
+- columns: ``process_leagues.extract_files``, one file at a time into typed column arrays
+
+    python benchmarks/bench_extract.py --files 10 --entries 50000
+"""
+import argparse
+import glob
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from fpl_stub import standings_page  # noqa: E402
+
+LEAGUE_ID = 1653859
+METHODS = ["dicts", "columns"]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def extract_dicts(paths):
+    """The extraction as it was before typed columns, kept here as the baseline."""
+    import pandas as pd
+    import process_leagues
+    payloads = []
+    for path in paths:
+        with open(path) as f:
+            payloads.append((path, json.load(f)))
+    dfs = []
+    for path, payload in payloads:
+        rows = []
+        for player in payload["standings"]["results"]:
+            rows.append({
+                "manager_name": player["player_name"],
+                "entry": player["entry"],
+                "total_points": player["total"],
+                "rank": player["rank"],
+                "event_points": player["event_total"],
+                "event": payload.get("league", {}).get("event_current"),
+            })
+        df = pd.DataFrame(rows)
+        df["timestamp"] = process_leagues.snapshot_timestamp(path)
+        dfs.append(df)
+    df = pd.concat(dfs, ignore_index=True)
+    df["league_type"] = "classic"
+    for column in ["total_points", "event_points", "rank", "event"]:
+        df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0).astype(int)
+    return df
+
+
+def extract_columns(paths):
+    import process_leagues
+    return process_leagues.clean_classic(
+        process_leagues.extract_files(paths, process_leagues.extract_classic_standings))
+
+
+def child(method, raw_dir):
+    """Runs one method and prints its timings and memory as JSON."""
+    # Imports count towards the baseline, not the method
+    for module in ("pandas", "process_leagues"):
+        importlib.import_module(module)
+    baseline = peak_rss_mb()
+    paths = sorted(glob.glob(os.path.join(raw_dir, "*.json")))
+    start = time.perf_counter()
+    df = {"dicts": extract_dicts, "columns": extract_columns}[method](paths)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "rows": len(df), "peak_mb": peak_rss_mb(),
+                      "baseline_mb": baseline, "frame_mb": df.memory_usage(deep=True).sum() / 2**20}))
+
+
+def write_files(raw_dir, files, entries):
+    os.makedirs(raw_dir, exist_ok=True)
+    for n in range(files):
+        payload = standings_page(LEAGUE_ID, "classic", 1, entries, n + 1, page_size=entries)
+        with open(os.path.join(raw_dir, f"league_{LEAGUE_ID}_20260815_{n:06d}.json"), "w") as f:
+            json.dump(payload, f, indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--child", nargs=2, metavar=("METHOD", "RAW_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    raw_dir = os.path.join(tempfile.mkdtemp(), "raw")
+    write_files(raw_dir, args.files, args.entries)
+    size = sum(os.path.getsize(path) for path in glob.glob(os.path.join(raw_dir, "*.json"))) / 2**20
+    print(f"{args.files} files x {args.entries} managers, {size:.0f} MB of JSON")
+    print(f"{'method':>8} {'seconds':>8} {'rows/s':>10} {'peak RSS MB':>12} {'over baseline':>14} {'frame MB':>9}")
+    for method in METHODS:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", method, raw_dir],
+                             check=True, capture_output=True, text=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{method:>8} {result['seconds']:>8.2f} {result['rows'] / result['seconds']:>10,.0f} "
+              f"{result['peak_mb']:>12.0f} {result['peak_mb'] - result['baseline_mb']:>14.0f} "
+              f"{result['frame_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Wall-clock benchmark of the league fetcher against the local FPL stub.
+
+Compares a serial page-by-page fetch (one request at a time, as the original script did for
+page 1) with the concurrent engine in ``scripts/fetch_leagues.py`` for growing page counts.
+
+    python benchmarks/bench_fetch.py --latency 0.05 --pages 1 5 20 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import fpl_api  # noqa: E402
+import fetch_leagues  # noqa: E402
+from fpl_stub import PAGE_SIZE, start_stub  # noqa: E402
+
+LEAGUES = [{"id": 1653859, "type": "classic"}, {"id": 1654002, "type": "h2h"}]
+
+
+def fetch_serial(session):
+    for league in LEAGUES:
+        page = 1
+        while True:
+            data = fetch_leagues.fetch_standings_page(league["id"], league["type"], page, session)
+            if not data["standings"]["has_next"]:
+                break
+            page += 1
+
+
+def fetch_concurrent(session, workers):
+    results = fetch_leagues.fetch_all_leagues(LEAGUES, max_workers=workers, session=session)
+    for league_id, result in results.items():
+        if isinstance(result, Exception):
+            raise result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--latency", type=float, default=0.05, help="stub delay per request")
+    parser.add_argument("--workers", type=int, default=fetch_leagues.MAX_WORKERS)
+    args = parser.parse_args()
+
+    server, base_url, state = start_stub(latency=args.latency)
+    fpl_api.API_BASE = base_url
+    fpl_api.CACHE_ENABLED = False
+    session = fpl_api.make_session()
+
+    print(f"{'pages/league':>12} {'serial s':>10} {'concurrent s':>13} {'speedup':>8} {'requests':>9}")
+    for pages in args.pages:
+        state.entries = pages * PAGE_SIZE
+
+        start = time.perf_counter()
+        fetch_serial(session)
+        serial = time.perf_counter() - start
+
+        state.requests = 0
+        start = time.perf_counter()
+        fetch_concurrent(session, args.workers)
+        concurrent = time.perf_counter() - start
+
+        print(f"{pages:>12} {serial:>10.3f} {concurrent:>13.3f} {serial / concurrent:>7.1f}x {state.requests:>9}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
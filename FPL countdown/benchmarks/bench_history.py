@@ -0,0 +1,63 @@
+"""Benchmark of manager history ingestion against the local FPL stub.
+
+Runs the fetch side of ``manager_history.collect`` three times over one classic league:
+a cold run with nothing stored, a repeat run with everything stored (no requests expected),
+and a run after the next gameweek finishes (one history and one picks request per manager).
+The database is not involved; stored (entry, gameweek) pairs are kept in memory.
+
+    python benchmarks/bench_history.py --entries 2000 --workers 8 --latency 0.02
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from fpl_stub import start_stub  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--gameweek", type=int, default=5, help="gameweek in progress at the start")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--max-requests", type=int, default=100_000)
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with 429")
+    args = parser.parse_args()
+
+    server, base_url, state = start_stub(entries=args.entries, gameweek=args.gameweek,
+                                         latency=args.latency, fail_every=args.fail_every)
+    os.environ["FPL_API_BASE"] = base_url
+    import fetch_leagues
+    import fpl_api
+    import manager_history
+    fpl_api.API_BASE = base_url
+    fpl_api.CACHE_ENABLED = False
+
+    members = manager_history.league_members(fetch_leagues.fetch_all_leagues(
+        [{"id": 1653859, "type": "classic"}]))
+    stored_gameweeks, stored_picks = set(), set()
+
+    print(f"{'run':>22} {'requests':>9} {'seconds':>8} {'gw rows':>8} {'picks':>7} {'deferred':>9}")
+    for name in ["cold", "repeat", "next gameweek"]:
+        if name == "next gameweek":
+            state.gameweek += 1
+        target = manager_history.last_finished_gameweek()
+        before = state.requests
+        start = time.perf_counter()
+        rows, deferred = manager_history.collect(members, target, stored_gameweeks, stored_picks,
+                                                 args.workers, args.max_requests)
+        seconds = time.perf_counter() - start
+        stored_gameweeks.update((row[0], row[1]) for row in rows["manager_gameweeks"])
+        stored_picks.update((row[0], row[1]) for row in rows["manager_picks"])
+        # the bootstrap-static request made by last_finished_gameweek is not counted
+        print(f"{name:>22} {state.requests - before:>9} {seconds:>8.2f} {len(rows['manager_gameweeks']):>8} "
+              f"{len(rows['manager_picks']):>7} {deferred:>9}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark of the pipeline stages over many registered leagues, one league at a time vs fanned out.
+
+Registers N synthetic league groups (a classic and an H2H league each) and times, against the
+local FPL stub:
+- fetch: every league's standings pages, league by league vs all leagues in one concurrent fetch
+- process: a full rebuild of the processed store from a season of archived snapshots, with one
+  worker vs ``--process-workers`` workers (one per core by default; parsing is CPU-bound)
+- load (with --load): the latest gameweek of every league into the database, one connection vs
+  ``--workers`` pooled connections. FPL_DB_* must point at a scratch database; its tables are
+  recreated.
+
+    python benchmarks/bench_leagues.py --leagues 50 --entries 500 --gameweeks 10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from fpl_stub import standings_page, start_stub  # noqa: E402
+
+SEASON_START = datetime(2026, 8, 15, 10, 0, 0)
+
+
+def synthetic_registry(count):
+    # Small ids keep the stub's entry ids (league id * 100000 + i) inside an INT column
+    return {"leagues": [{"slug": f"league-{n}", "name": f"League {n}", "season": "2026/2027",
+                         "classic": 2 * n + 1, "h2h": 2 * n + 2, "members": []} for n in range(count)]}
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def fetch_one_by_one(fetch_leagues, leagues):
+    for league in leagues:
+        fetch_leagues.fetch_league_standings(league["id"], league["type"])
+
+
+def archive_season(snapshot_store, snapshot_dir, leagues, entries, gameweeks):
+    store = snapshot_store.SnapshotStore(snapshot_dir)
+    for gw in range(1, gameweeks + 1):
+        fetched_at = SEASON_START + timedelta(days=7 * (gw - 1))
+        for league in leagues:
+            store.append(league["id"], standings_page(league["id"], league["type"], 1, entries, gw,
+                                                      page_size=entries), fetched_at)
+    store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leagues", type=int, default=50, help="league groups (a classic and an H2H league each)")
+    parser.add_argument("--entries", type=int, default=500, help="managers per league")
+    parser.add_argument("--gameweeks", type=int, default=10, help="archived gameweeks to process")
+    parser.add_argument("--latency", type=float, default=0.1, help="stub delay per request")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests and database connections")
+    parser.add_argument("--process-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--load", action="store_true", help="also time the database load")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    registry_path = os.path.join(workdir, "leagues.json")
+    with open(registry_path, "w") as f:
+        json.dump(synthetic_registry(args.leagues), f)
+    os.environ["FPL_LEAGUES_FILE"] = registry_path
+    os.chdir(workdir)
+
+    server, base_url, state = start_stub(entries=args.entries, gameweek=args.gameweeks, latency=args.latency)
+    import fetch_leagues
+    import fpl_api
+    import league_registry
+    import process_leagues
+    import snapshot_store
+    fpl_api.API_BASE = base_url
+    fpl_api.CACHE_ENABLED = False
+    league_registry.reload(registry_path)
+    leagues = league_registry.fpl_leagues()
+
+    print(f"{len(leagues)} leagues ({args.leagues} groups), {args.entries} managers each, "
+          f"{args.gameweeks} gameweeks archived")
+    print(f"{'stage':>10} {'one by one s':>13} {'fanned out s':>13} {'speedup':>8}")
+
+    def report(stage, serial, concurrent):
+        print(f"{stage:>10} {serial:>13.2f} {concurrent:>13.2f} {serial / concurrent:>7.1f}x")
+
+    report("fetch",
+           timed(fetch_one_by_one, fetch_leagues, leagues),
+           timed(fetch_leagues.fetch_all_leagues, leagues, max_workers=args.workers))
+
+    snapshot_dir = os.path.join(workdir, "snapshots")
+    archive_season(snapshot_store, snapshot_dir, leagues, args.entries, args.gameweeks)
+    processed = [os.path.join(workdir, f"processed_{n}") for n in (1, args.process_workers)]
+    report("process",
+           timed(process_leagues.main, full=True, processed_dir=processed[0], snapshot_dir=snapshot_dir,
+                 max_workers=1),
+           timed(process_leagues.main, full=True, processed_dir=processed[1], snapshot_dir=snapshot_dir,
+                 max_workers=args.process_workers))
+
+    if args.load:
+        import create_tables
+        import db
+        import insert_processed_data
+        import processed_store
+        processed_store.STORE_DIR = os.path.join(processed[1], "store")
+        create_tables.create_tables(reset=True)
+        loads = []
+        for workers in (1, args.workers):
+            insert_processed_data.LOAD_WORKERS = workers
+            with db.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("TRUNCATE classic_league, h2h_league, gameweek_winners, "
+                                "manager_gameweek_stats, manager_season_stats")
+                conn.commit()
+                loads.append(timed(insert_processed_data.load, conn, leagues))
+        report("load", *loads)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark of the live points estimator against the local FPL stub.
+
+Runs ``live_points.estimate`` twice over one classic league and reports the requests each run
+made: the first fetches every manager's picks once, the second only the live data. The
+vectorized scoring is checked against a straightforward per-manager implementation of the
+same rules, then timed on its own.
+
+    python benchmarks/bench_live.py --entries 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from fpl_stub import start_stub  # noqa: E402
+
+
+def score_one(picks, points, minutes, element_type, fixtures_done, live_points):
+    """Reference scoring of one manager, slot by slot."""
+    squad = sorted(picks["picks"], key=lambda p: p["position"])
+    played = [minutes[p["element"]] > 0 for p in squad]
+    absent = [not played[i] and fixtures_done[p["element"]] for i, p in enumerate(squad)]
+    kind = [element_type[p["element"]] for p in squad]
+    active = [True] * 11 + [False] * 4
+    if picks.get("active_chip") == "bboost":
+        active = [True] * 15
+    else:
+        if absent[0] and played[11]:
+            active[0], active[11] = False, True
+        for bench in live_points.OUTFIELD_BENCH:
+            if not played[bench]:
+                continue
+            for starter in range(1, 11):
+                if not (active[starter] and absent[starter]):
+                    continue
+                xi = [kind[i] for i in range(15) if active[i] and i != starter] + [kind[bench]]
+                if all(xi.count(t) >= m for t, m in live_points.FORMATION_MINIMUMS.items()):
+                    active[starter], active[bench] = False, True
+                    break
+    multiplier = [max(p["multiplier"], 1) if active[i] else 0 for i, p in enumerate(squad)]
+    captain = next(i for i, p in enumerate(squad) if p["is_captain"])
+    vice = next(i for i, p in enumerate(squad) if p["is_vice_captain"])
+    if absent[captain] and played[vice]:
+        multiplier[vice], multiplier[captain] = squad[captain]["multiplier"], 0
+    return sum(points[p["element"]] * multiplier[i] for i, p in enumerate(squad))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--gameweek", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, base_url, state = start_stub(entries=args.entries, gameweek=args.gameweek, latency=args.latency)
+    os.chdir(tempfile.mkdtemp())  # keep the HTTP cache out of the working tree
+    import fetch_leagues
+    import fpl_api
+    import live_points
+    fpl_api.API_BASE = base_url
+
+    for run in ["first run", "second run"]:
+        before = state.requests
+        start = time.perf_counter()
+        table = live_points.estimate()
+        print(f"{run:>12}: {state.requests - before:>6} requests, {time.perf_counter() - start:6.2f}s, "
+              f"{len(table)} managers scored")
+
+    standings = fetch_leagues.fetch_all_leagues([{"id": 1653859, "type": "classic"}])[1653859]
+    bootstrap = fpl_api.get_json("bootstrap-static/")
+    live = fpl_api.get_json(f"event/{args.gameweek}/live/", use_cache=False)
+    fixtures = fpl_api.get_json("fixtures/", params={"event": args.gameweek})
+    arrays = live_points.element_arrays(bootstrap, live, fixtures)
+    entries = [row["entry"] for row in standings["standings"]["results"]]
+    picks = {entry: live_points.fetch_cached_picks(entry, args.gameweek) for entry in entries}
+
+    matrix = live_points.pick_matrix(picks, entries)
+    vectorized, _ = live_points.score(*matrix[:5], *arrays)
+    reference = [score_one(picks[entry], *arrays, live_points) for entry in entries]
+    assert list(vectorized) == reference, "vectorized scoring disagrees with the reference"
+
+    repeat = 100_000 // len(entries)
+    big = [m.repeat(repeat, axis=0) for m in matrix[:5]]
+    start = time.perf_counter()
+    live_points.score(*big, *arrays)
+    print(f"scoring {len(big[0])} managers: {time.perf_counter() - start:.3f}s "
+          f"(reference agrees on {len(entries)} managers)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
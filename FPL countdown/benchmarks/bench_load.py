@@ -0,0 +1,125 @@
+"""Benchmark of row-by-row vs bulk (execute_values / COPY) upserts into a league table.
+
+Needs a scratch PostgreSQL database; the connection comes from FPL_BENCH_DSN, e.g.
+
+    FPL_BENCH_DSN="dbname=fpl_bench user=fpl_user host=localhost port=5434" \
+        python benchmarks/bench_load.py --rows 10000 100000 1000000
+
+Each run loads into a fresh ``bench_league`` table shaped like ``classic_league`` and then
+loads the same rows a second time, so the ON CONFLICT update path is measured as well.
+The row-by-row baseline is skipped above --max-rowwise rows.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import insert_processed_data  # noqa: E402
+
+TABLE = "bench_league"
+LEAGUE_ID = 1
+MAPPING = {"entry": "entry_id", "manager_name": "manager", "total_points": "points", "rank": "position",
+           "event": "gameweek"}
+
+
+def synthetic_frame(rows, per_gameweek=10_000):
+    rng = np.random.default_rng(rows)
+    idx = np.arange(rows)
+    return pd.DataFrame({
+        "entry": idx % per_gameweek + 1,
+        "manager_name": [f"Manager {i}" for i in idx],
+        "total_points": rng.integers(0, 2500, rows),
+        "rank": idx % per_gameweek + 1,
+        "event": idx // per_gameweek + 1,
+    })
+
+
+def reset_table(conn):
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            DROP TABLE IF EXISTS {TABLE};
+            CREATE TABLE {TABLE} (
+                league_id INT NOT NULL,
+                gameweek INT NOT NULL,
+                entry_id INT NOT NULL,
+                position INT,
+                manager VARCHAR(100),
+                points INT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (league_id, gameweek, entry_id)
+            );
+        """)
+    conn.commit()
+
+
+def load_rowwise(df, conn):
+    """The original loader: one upsert statement per DataFrame row."""
+    cur = conn.cursor()
+    for _, row in df.iterrows():
+        cur.execute(f"""
+            INSERT INTO {TABLE} (league_id, entry_id, manager, points, position, gameweek)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (league_id, gameweek, entry_id) DO UPDATE SET
+            position = EXCLUDED.position,
+            manager = EXCLUDED.manager,
+            points = EXCLUDED.points,
+            updated_at = CURRENT_TIMESTAMP;
+        """, (LEAGUE_ID, int(row["entry"]), row["manager_name"], int(row["total_points"]), int(row["rank"]),
+              int(row["event"])))
+    conn.commit()
+    cur.close()
+
+
+def load_bulk(method):
+    def load(df, conn):
+        with contextlib.redirect_stdout(io.StringIO()):
+            insert_processed_data.insert_dataframe(df, TABLE, conn, MAPPING, method=method, league_id=LEAGUE_ID)
+    return load
+
+
+def timed(load, df, conn):
+    start = time.perf_counter()
+    load(df, conn)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--max-rowwise", type=int, default=100_000)
+    args = parser.parse_args()
+
+    dsn = os.environ.get("FPL_BENCH_DSN")
+    if not dsn:
+        sys.exit("Set FPL_BENCH_DSN to a scratch PostgreSQL database.")
+    conn = psycopg2.connect(dsn)
+
+    loaders = [("row-by-row", load_rowwise), ("execute_values", load_bulk("values")), ("copy", load_bulk("copy"))]
+    print(f"{'rows':>9} {'loader':>15} {'insert s':>9} {'upsert s':>9} {'rows/s':>10}")
+    for rows in args.rows:
+        df = synthetic_frame(rows)
+        for name, load in loaders:
+            if name == "row-by-row" and rows > args.max_rowwise:
+                continue
+            reset_table(conn)
+            insert = timed(load, df, conn)
+            upsert = timed(load, df, conn)
+            print(f"{rows:>9} {name:>15} {insert:>9.2f} {upsert:>9.2f} {rows / insert:>10.0f}")
+
+    reset_table(conn)
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE {TABLE}")
+    conn.commit()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""End-to-end benchmark: the three-script flow vs ``pipeline.py run`` in a single process.
+
+Each variant runs as fresh Python processes (so interpreter and pandas start-up are included)
+in a scratch working directory, against the local FPL stub. Without --with-load the database
+stage is left out of both variants; with it, FPL_DB_* must point at a scratch database.
+
+    python benchmarks/bench_pipeline.py --entries 2000 --repeat 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fpl_stub import start_stub
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+
+
+def run_commands(commands, env):
+    with tempfile.TemporaryDirectory() as cwd:
+        start = time.perf_counter()
+        for command in commands:
+            subprocess.run([sys.executable, os.path.join(SCRIPTS, command[0]), *command[1:]],
+                           cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=2000, help="managers per league")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub delay per request")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--with-load", action="store_true", help="include the database load stage")
+    args = parser.parse_args()
+
+    server, base_url, _ = start_stub(entries=args.entries, latency=args.latency)
+    env = {**os.environ, "FPL_API_BASE": base_url, "FPL_HTTP_CACHE": "0"}
+
+    three_scripts = [("fetch_leagues.py",), ("process_leagues.py",)]
+    single = ["pipeline.py", "run"]
+    if args.with_load:
+        three_scripts.append(("insert_processed_data.py",))
+    else:
+        single.append("--skip-load")
+    variants = [
+        ("three scripts", three_scripts),
+        ("pipeline run", [tuple(single)]),
+        ("pipeline run --archive", [tuple(single + ["--archive"])]),
+    ]
+
+    print(f"{'variant':>24} {'median s':>9} {'min s':>7}")
+    for name, commands in variants:
+        times = [run_commands(commands, env) for _ in range(args.repeat)]
+        print(f"{name:>24} {statistics.median(times):>9.3f} {min(times):>7.3f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark of full vs incremental processing over a synthetic raw snapshot archive.
+
+Builds a 38-gameweek x N-snapshots-per-gameweek archive for both leagues, then times a full
+rebuild, an incremental run after one new snapshot, and an incremental run with nothing new.
+
+    python benchmarks/bench_process.py --snapshots 1 4 8 --entries 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import league_registry  # noqa: E402
+import process_leagues  # noqa: E402
+from fpl_stub import standings_page  # noqa: E402
+
+SEASON_START = datetime(2026, 8, 15, 10, 0, 0)
+
+
+def write_snapshot(raw_dir, league_id, league_type, entries, gameweek, fetched_at):
+    payload = standings_page(league_id, league_type, 1, entries, gameweek, page_size=entries)
+    path = os.path.join(raw_dir, f"league_{league_id}_{fetched_at:%Y%m%d_%H%M%S}.json")
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=4)
+
+
+def build_archive(raw_dir, gameweeks, snapshots, entries):
+    os.makedirs(raw_dir, exist_ok=True)
+    for gw in range(1, gameweeks + 1):
+        for n in range(snapshots):
+            fetched_at = SEASON_START + timedelta(days=7 * (gw - 1), hours=n)
+            write_snapshot(raw_dir, league_registry.default_group()["classic"], "classic", entries, gw, fetched_at)
+            write_snapshot(raw_dir, league_registry.default_group()["h2h"], "h2h", entries, gw, fetched_at)
+
+
+def timed(fn, *args, **kwargs):
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        return time.perf_counter() - start
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshots", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--gameweeks", type=int, default=38)
+    parser.add_argument("--entries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'snapshots/gw':>12} {'files':>6} {'full s':>8} {'+1 new s':>9} {'no-op s':>8}")
+    for snapshots in args.snapshots:
+        with tempfile.TemporaryDirectory() as tmp:
+            raw_dir = os.path.join(tmp, "raw")
+            processed_dir = os.path.join(tmp, "processed")
+            build_archive(raw_dir, args.gameweeks, snapshots, args.entries)
+
+            full = timed(process_leagues.main, full=True, raw_dir=raw_dir, processed_dir=processed_dir)
+
+            fetched_at = SEASON_START + timedelta(days=7 * args.gameweeks, hours=1)
+            write_snapshot(raw_dir, league_registry.default_group()["classic"], "classic", args.entries,
+                           args.gameweeks, fetched_at)
+            incremental = timed(process_leagues.main, raw_dir=raw_dir, processed_dir=processed_dir)
+            noop = timed(process_leagues.main, raw_dir=raw_dir, processed_dir=processed_dir)
+
+            files = len(os.listdir(raw_dir))
+            print(f"{snapshots:>12} {files:>6} {full:>8.3f} {incremental:>9.3f} {noop:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Load test of the /events push channel on a single gunicorn gevent worker.
+
+Starts ``benchmarks/sse_app.py`` under gunicorn with the settings in gunicorn.conf.py and one
+worker, then opens idle event-stream connections in steps. At each step it waits for a few
+diffs and reports how long they took to reach every subscriber and the worker's memory.
+
+    python benchmarks/bench_sse.py --clients 1000 2000 5000 --interval 2
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def worker_pid(master_pid):
+    for pid in os.listdir("/proc"):
+        if pid.isdigit():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == master_pid:
+                        return int(pid)
+            except OSError:
+                continue
+    return None
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Subscriber:
+    """One idle browser tab: reads the stream and records the delay of every diff."""
+
+    def __init__(self, latencies):
+        self.latencies = latencies
+        self.connected = False
+
+    async def run(self, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /events HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+        event, version = None, None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                if line.startswith(b"event: "):
+                    event = line[7:].strip()
+                elif line.startswith(b"id: "):
+                    version = int(line[4:])
+                elif line.startswith(b"data: "):
+                    if event == b"snapshot":
+                        self.connected = True
+                    elif event == b"diff":
+                        self.latencies.append(time.time() * 1000 - version)
+        finally:
+            writer.close()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+async def run_steps(port, steps, diffs, interval, master_pid):
+    subscribers, tasks = [], []
+    print(f"{'clients':>8} {'connected':>9} {'connect s':>9} {'diffs':>7} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'max ms':>7} {'worker MB':>9}")
+    for target in steps:
+        start = time.perf_counter()
+        opening = asyncio.Semaphore(200)
+
+        async def open_one():
+            async with opening:
+                subscriber = Subscriber(latencies)
+                subscribers.append(subscriber)
+                task = asyncio.ensure_future(subscriber.run(port))
+                tasks.append(task)
+                while not subscriber.connected and not task.done():
+                    await asyncio.sleep(0.01)
+
+        latencies = []
+        for subscriber in subscribers:
+            subscriber.latencies = latencies
+        await asyncio.gather(*(open_one() for _ in range(target - len(subscribers))))
+        connect_s = time.perf_counter() - start
+        latencies.clear()
+        await asyncio.sleep(interval * diffs + interval / 2)
+        connected = sum(s.connected and not t.done() for s, t in zip(subscribers, tasks))
+        print(f"{target:>8} {connected:>9} {connect_s:>9.2f} {len(latencies):>7} "
+              f"{percentile(latencies, 0.5):>7.1f} {percentile(latencies, 0.99):>7.1f} "
+              f"{max(latencies, default=float('nan')):>7.1f} {rss_mb(worker_pid(master_pid)):>9.1f}")
+    for task in tasks:
+        task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[500, 1000, 2000, 5000])
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between diffs")
+    parser.add_argument("--diffs", type=int, default=3, help="diffs to wait for at each step")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    limit = max(args.clients) + 1000
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(max(soft, limit), hard), hard))
+
+    env = dict(os.environ, FPL_SSE_INTERVAL=str(args.interval), FPL_WORKER_CONNECTIONS=str(limit))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", "1",
+         "--bind", f"127.0.0.1:{args.port}", "--backlog", "4096", "--log-level", "warning",
+         "--chdir", "benchmarks", "sse_app:app"], cwd=ROOT, env=env)
+    try:
+        time.sleep(2)
+        asyncio.run(run_steps(args.port, args.clients, args.diffs, args.interval, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
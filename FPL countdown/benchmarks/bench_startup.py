@@ -0,0 +1,127 @@
+"""Startup benchmark of the web tier and the pipeline scripts.
+
+Measures, in fresh processes:
+
+* the import time of the app and of each pipeline script, and which heavy libraries
+  (pandas, numpy, pyarrow, requests) each one loads; the web tier must load none of them;
+* cold start to first response: from launching ``gunicorn -c gunicorn.conf.py`` on
+  ``benchmarks/startup_app.py`` with one worker until ``GET /`` returns 200, with the app
+  preloaded in the master (the default) and imported in the worker (``FPL_PRELOAD=0``).
+
+Exits with status 1 if the web tier imports a heavy library or a cold start takes longer
+than ``--budget-ms``, so it can gate a merge in CI. No database is needed.
+
+    python benchmarks/bench_startup.py --repeat 5 --budget-ms 2000
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRIPTS = os.path.join(ROOT, "scripts")
+
+HEAVY = ["pandas", "numpy", "pyarrow", "requests"]
+# Modules served by gunicorn, which must not load any HEAVY library
+WEB_TIER = ["app"]
+PIPELINE = ["snapshot_store", "fetch_leagues", "manager_history", "process_leagues", "insert_processed_data",
+            "pipeline"]
+
+IMPORT_CHILD = """
+import sys, time, json
+sys.path[:0] = [{root!r}, {scripts!r}]
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000,
+                  "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def import_time(module, repeat):
+    """Median import time of a module in fresh interpreters, and the heavy libraries it loaded."""
+    runs = []
+    for _ in range(repeat):
+        code = IMPORT_CHILD.format(root=ROOT, scripts=SCRIPTS, module=module, heavy=HEAVY)
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return statistics.median(run["ms"] for run in runs), runs[-1]["heavy"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def first_response(port, timeout):
+    """Polls GET / until it returns 200."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=timeout) as response:
+                if response.status == 200:
+                    response.read()
+                    return
+        except OSError:
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"no response on port {port} within {timeout}s")
+
+
+def cold_start(preload, timeout):
+    """Launches gunicorn with one worker; returns the ms until it first answers GET / with 200."""
+    port = free_port()
+    # A pool with no idle connections: the worker's post-fork pool setup does not connect
+    env = dict(os.environ, FPL_PRELOAD="1" if preload else "0", FPL_DB_POOL_MIN="0")
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", "1",
+         "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+         "--chdir", "benchmarks", "startup_app:app"], cwd=ROOT, env=env)
+    try:
+        first_response(port, timeout)
+        return (time.perf_counter() - start) * 1000
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes per measurement")
+    parser.add_argument("--budget-ms", type=float, default=2000.0,
+                        help="maximum cold start to first response, in ms")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for the server")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':>22} {'import ms':>10}  heavy libraries")
+    for module in WEB_TIER + PIPELINE:
+        ms, heavy = import_time(module, args.repeat)
+        print(f"{module:>22} {ms:>10.0f}  {', '.join(heavy) or '-'}")
+        if module in WEB_TIER and heavy:
+            failures.append(f"{module} imports {', '.join(heavy)}")
+
+    print(f"\n{'gunicorn':>22} {'first 200 ms':>13} {'min':>7} {'max':>7}")
+    for preload in (True, False):
+        totals = [cold_start(preload, args.timeout) for _ in range(args.repeat)]
+        median = statistics.median(totals)
+        label = "preload" if preload else "FPL_PRELOAD=0"
+        print(f"{label:>22} {median:>13.0f} {min(totals):>7.0f} {max(totals):>7.0f}")
+        if median > args.budget_ms:
+            failures.append(f"{label} cold start {median:.0f} ms over the {args.budget_ms:g} ms budget")
+
+    if failures:
+        print(f"❌ {'; '.join(failures)}")
+        sys.exit(1)
+    print(f"✅ Web tier imports no heavy libraries; cold starts within {args.budget_ms:g} ms")
+
+
+if __name__ == "__main__":
+    main()
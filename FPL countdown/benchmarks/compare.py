@@ -0,0 +1,80 @@
+"""Compares two results files of suite.py, stage by stage.
+
+Prints the change in median latency, throughput and peak traced memory of every stage both
+runs measured, and exits with status 1 if any of them got worse by more than ``--threshold``
+percent (so it can gate a merge in CI).
+
+    python benchmarks/compare.py benchmarks/results/abc1234.json benchmarks/results/def5678.json
+"""
+import argparse
+import json
+import sys
+
+# (label, how to read it from a stage result, True if higher is better)
+MEASURES = [
+    ("p50 ms", lambda result: result["latency_ms"]["p50"], False),
+    ("throughput", lambda result: result["throughput"], True),
+    ("traced MB", lambda result: result["peak_traced_mb"], False),
+]
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(old, new):
+    """Percentage change from old to new."""
+    if not old:
+        return 0.0
+    return (new - old) / old * 100
+
+
+def compare(old, new, threshold):
+    """Yields (stage, [(label, old, new, change %, regressed)]) for every stage both runs measured."""
+    for name, before in old["stages"].items():
+        after = new["stages"].get(name)
+        if after is None or "throughput" not in before or "throughput" not in after:
+            continue
+        rows = []
+        for label, read, higher_is_better in MEASURES:
+            pct = change(read(before), read(after))
+            rows.append((label, read(before), read(after), pct, (-pct if higher_is_better else pct) > threshold))
+        yield name, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("old", help="results file of the baseline")
+    parser.add_argument("new", help="results file to check against it")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    args = parser.parse_args()
+
+    old, new = load(args.old), load(args.new)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}{' (dirty)' if new['meta'].get('dirty') else ''}")
+    if old["meta"]["config"] != new["meta"]["config"] or old["meta"]["input_digest"] != new["meta"]["input_digest"]:
+        print("⚠️ The runs used different configurations or inputs; the numbers are not comparable.")
+    if old["meta"].get("platform") != new["meta"].get("platform"):
+        print("⚠️ The runs were made on different platforms.")
+
+    regressions = []
+    print(f"{'stage':>16} {'measure':>11} {'old':>12} {'new':>12} {'change':>9}")
+    for name, rows in compare(old, new, args.threshold):
+        for label, before, after, pct, regressed in rows:
+            print(f"{name:>16} {label:>11} {before:>12,.2f} {after:>12,.2f} {pct:>+8.1f}%{'  ❌' if regressed else ''}")
+            if regressed:
+                regressions.append(f"{name} {label}")
+    for name in sorted(set(old["stages"]) | set(new["stages"])):
+        missing = [label for label, run in (("old", old), ("new", new))
+                   if "throughput" not in run["stages"].get(name, {})]
+        if missing:
+            print(f"{name:>16} not compared: no result in the {' and '.join(missing)} run")
+
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) over {args.threshold:g}%: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"✅ No regressions over {args.threshold:g}%")
+
+
+if __name__ == "__main__":
+    main()
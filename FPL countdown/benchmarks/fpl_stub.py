@@ -0,0 +1,263 @@
+"""Local stub of the FPL API used by the benchmarks and for offline runs of the pipeline.
+
+Run it with ``python benchmarks/fpl_stub.py --entries 5000`` and point the scripts at it with
+``FPL_API_BASE=http://127.0.0.1:8765/api``.
+"""
+import argparse
+import functools
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PAGE_SIZE = 50
+
+FIRST_NAMES = ["Ajit", "Arbind", "Bharat", "Dhiraj", "Dipendra", "Kobid", "Prakash", "Prashant",
+               "Rojan", "Roshan", "Sagar", "Sandeep", "Sanish", "Suresh", "Yogesh"]
+LAST_NAMES = ["Pradhan", "Chiluwal", "Dankoti", "Khanal", "Shrestha", "Panthi", "Pandey",
+              "Acharya", "Malla", "Rupakheti", "Maharjan", "Chaudhary", "Sapkota"]
+
+STANDINGS_RE = re.compile(r"^/api/leagues-(classic|h2h)/(\d+)/standings/?$")
+HISTORY_RE = re.compile(r"^/api/entry/(\d+)/history/?$")
+PICKS_RE = re.compile(r"^/api/entry/(\d+)/event/(\d+)/picks/?$")
+LIVE_RE = re.compile(r"^/api/event/(\d+)/live/?$")
+CHIPS = ["wildcard", "bboost", "3xc", "freehit"]
+
+
+def manager_name(seed, i):
+    rng = random.Random(seed * 1_000_003 + i)
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+
+
+@functools.lru_cache(maxsize=256)
+def standings_rows(league_id, league_type, entries, gameweek):
+    """Builds a deterministic, rank-ordered standings table for a league."""
+    rng = random.Random(league_id * 31 + gameweek)
+    rows = []
+    for i in range(entries):
+        event_total = rng.randint(20, 110)
+        total = event_total + rng.randint(40, 70) * (gameweek - 1)
+        rows.append({"entry": league_id * 100_000 + i, "player_name": manager_name(league_id, i),
+                     "entry_name": f"Team {i}", "event_total": event_total, "total": total})
+    rows.sort(key=lambda r: -r["total"])
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+        row["last_rank"] = rank
+        row["rank_sort"] = rank
+        row["id"] = row["entry"]
+        if league_type == "h2h":
+            row["matches_played"] = gameweek
+            row["matches_won"] = rng.randint(0, gameweek)
+    return rows
+
+
+def standings_page(league_id, league_type, page, entries, gameweek, page_size=PAGE_SIZE):
+    rows = standings_rows(league_id, league_type, entries, gameweek)
+    start = (page - 1) * page_size
+    return {
+        "league": {"id": league_id, "name": f"League {league_id}", "event_current": gameweek,
+                   "scoring": "c" if league_type == "classic" else "h"},
+        "standings": {"has_next": start + page_size < len(rows), "page": page,
+                      "results": rows[start:start + page_size]},
+    }
+
+
+def entry_gameweek(entry, gw):
+    """Deterministic per-manager gameweek summary, as in entry/{id}/history's ``current``."""
+    rng = random.Random(entry * 64 + gw)
+    return {"event": gw, "points": rng.randint(20, 110), "total_points": 0, "rank": rng.randint(1, 10_000_000),
+            "overall_rank": rng.randint(1, 10_000_000), "bank": rng.randint(0, 50), "value": 1000 + rng.randint(-20, 40),
+            "event_transfers": rng.randint(0, 2), "event_transfers_cost": rng.choice([0, 0, 0, 4]),
+            "points_on_bench": rng.randint(0, 20)}
+
+
+def entry_history(entry, gameweek):
+    current, total = [], 0
+    for gw in range(1 + entry % 3, gameweek + 1):  # some managers join a few gameweeks late
+        row = entry_gameweek(entry, gw)
+        total += row["points"]
+        row["total_points"] = total
+        current.append(row)
+    rng = random.Random(entry)
+    chips = [{"name": chip, "time": "2026-09-01T10:00:00Z", "event": gw}
+             for chip, gw in zip(CHIPS, rng.sample(range(1, 39), len(CHIPS))) if gw <= gameweek]
+    return {"current": current, "past": [], "chips": chips}
+
+
+ELEMENTS = 700
+TEAMS = 20
+# element_type by element id % 20: 2 goalkeepers, 6 defenders, 8 midfielders, 4 forwards
+ELEMENT_TYPES = [1] * 2 + [2] * 6 + [3] * 8 + [4] * 4
+
+
+def element_type(element):
+    return ELEMENT_TYPES[element % len(ELEMENT_TYPES)]
+
+
+ELEMENTS_BY_TYPE = {t: [e for e in range(1, ELEMENTS) if element_type(e) == t] for t in (1, 2, 3, 4)}
+
+
+def entry_picks(entry, gw):
+    """A valid squad: XI of 1 GK, 4 DEF, 4 MID, 2 FWD, then a bench of GK, DEF, MID, FWD."""
+    rng = random.Random(entry * 64 + gw)
+    squad = {t: rng.sample(ELEMENTS_BY_TYPE[t], n) for t, n in ((1, 2), (2, 5), (3, 5), (4, 3))}
+    elements = ([squad[1][0]] + squad[2][:4] + squad[3][:4] + squad[4][:2]
+                + [squad[1][1], squad[2][4], squad[3][4], squad[4][2]])
+    captain, vice = rng.sample(range(11), 2)
+    chip = next((c["name"] for c in entry_history(entry, gw)["chips"] if c["event"] == gw), None)
+    starting = 15 if chip == "bboost" else 11
+    picks = [{"element": element, "position": i + 1,
+              "multiplier": (3 if chip == "3xc" else 2) if i == captain else int(i < starting),
+              "is_captain": i == captain, "is_vice_captain": i == vice} for i, element in enumerate(elements)]
+    return {"active_chip": chip, "automatic_subs": [], "entry_history": entry_gameweek(entry, gw), "picks": picks}
+
+
+def event_live(gw):
+    """Live stats of every element: about a quarter have not played (yet)."""
+    elements = []
+    for element in range(1, ELEMENTS):
+        rng = random.Random(gw * 10_000 + element)
+        minutes = 0 if rng.random() < 0.25 else rng.choice([20, 60, 90])
+        elements.append({"id": element, "stats": {"minutes": minutes,
+                                                  "total_points": rng.randint(1, 15) if minutes else 0}})
+    return {"elements": elements}
+
+
+def fixtures(gw):
+    """One fixture per pair of teams; the last two fixtures of the gameweek are still to play."""
+    matches = []
+    for i in range(TEAMS // 2):
+        done = i < TEAMS // 2 - 2
+        matches.append({"id": gw * 100 + i, "event": gw, "team_h": 2 * i + 1, "team_a": 2 * i + 2,
+                        "started": done, "finished": done, "finished_provisional": done})
+    return matches
+
+
+def bootstrap_static(gameweek, season_length=38):
+    events = []
+    for gw in range(1, season_length + 1):
+        events.append({
+            "id": gw,
+            "deadline_time": f"2026-{8 + (gw - 1) // 4:02d}-{1 + 7 * ((gw - 1) % 4):02d}T10:00:00Z"
+            if gw <= 20 else f"2027-{1 + (gw - 21) // 4:02d}-{1 + 7 * ((gw - 21) % 4):02d}T10:00:00Z",
+            "finished": gw < gameweek,
+            "data_checked": gw < gameweek,
+            "is_current": gw == gameweek,
+            "is_next": gw == gameweek + 1,
+        })
+    elements = [{"id": element, "element_type": element_type(element), "team": element % TEAMS + 1}
+                for element in range(1, ELEMENTS)]
+    return {"events": events, "elements": elements, "total_players": 10_000_000}
+
+
+class StubState:
+    """Mutable configuration shared by all handler threads."""
+
+    def __init__(self, entries=500, gameweek=10, latency=0.0, fail_every=0, season_length=38, fail_status=429):
+        self.entries = entries
+        self.gameweek = gameweek
+        self.season_length = season_length
+        self.latency = latency
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        state = self.state
+        with state.lock:
+            state.requests += 1
+            count = state.requests
+        if state.latency:
+            time.sleep(state.latency)
+        if state.fail_every and count % state.fail_every == 0:
+            self.send_json({"detail": "Too many requests" if state.fail_status == 429 else "Server error"},
+                           status=state.fail_status)
+            return
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        match = STANDINGS_RE.match(url.path)
+        if match:
+            page = int(query.get("page_standings", ["1"])[0])
+            self.send_json(standings_page(int(match.group(2)), match.group(1), page,
+                                          state.entries, state.gameweek))
+        elif HISTORY_RE.match(url.path):
+            self.send_json(entry_history(int(HISTORY_RE.match(url.path).group(1)), state.gameweek))
+        elif PICKS_RE.match(url.path):
+            entry, gw = (int(g) for g in PICKS_RE.match(url.path).groups())
+            if gw > state.gameweek or gw < 1 + entry % 3:
+                self.send_json({"detail": "Not found."}, status=404)
+            else:
+                self.send_json(entry_picks(entry, gw))
+        elif LIVE_RE.match(url.path):
+            self.send_json(event_live(int(LIVE_RE.match(url.path).group(1))))
+        elif url.path.rstrip("/") == "/api/fixtures":
+            self.send_json(fixtures(int(query.get("event", [state.gameweek])[0])))
+        elif url.path.rstrip("/") == "/api/bootstrap-static":
+            self.send_json(bootstrap_static(state.gameweek, state.season_length))
+        else:
+            self.send_json({"detail": "Not found."}, status=404)
+
+
+def start_stub(port=0, **config):
+    """Starts the stub on a background thread and returns (server, base_url, state)."""
+    state = StubState(**config)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api", state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--entries", type=int, default=500, help="managers per league")
+    parser.add_argument("--gameweek", type=int, default=10)
+    parser.add_argument("--season-length", type=int, default=38, help="gameweeks in the season")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of delay per request")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with an error")
+    parser.add_argument("--fail-status", type=int, default=429, help="status of those errors, e.g. 503")
+    args = parser.parse_args()
+
+    server, base_url, _ = start_stub(args.port, entries=args.entries, gameweek=args.gameweek,
+                                     latency=args.latency, fail_every=args.fail_every,
+                                     season_length=args.season_length, fail_status=args.fail_status)
+    print(f"FPL stub serving at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Throwaway PostgreSQL database for the benchmarks.
+
+With FPL_BENCH_DSN set (e.g. "host=localhost port=5434 user=fpl_user dbname=postgres"), a
+uniquely named database is created on that server and dropped afterwards. Otherwise, if
+``initdb`` and ``pg_ctl`` are on the PATH (or in PG_BIN), a temporary cluster is initialised
+and started on a free port for the duration of the block, then stopped and deleted. initdb
+refuses to run as root.
+"""
+import contextlib
+import io
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT, parse_dsn
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+USER = "fpl_bench"
+
+
+def pg_binary(name):
+    directory = os.environ.get("PG_BIN")
+    if directory:
+        path = os.path.join(directory, name)
+        return path if os.access(path, os.X_OK) else None
+    return shutil.which(name)
+
+
+def unavailable():
+    """Why no throwaway database can be made here, or None if one can."""
+    if os.environ.get("FPL_BENCH_DSN"):
+        return None
+    if not (pg_binary("initdb") and pg_binary("pg_ctl")):
+        return "set FPL_BENCH_DSN or put initdb/pg_ctl on the PATH (or in PG_BIN)"
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        return "initdb cannot run as root; set FPL_BENCH_DSN instead"
+    return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def server_database(dsn):
+    """A fresh database on an existing server, dropped when the block exits."""
+    server = parse_dsn(dsn)
+    name = f"fpl_bench_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(**server)
+    admin.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    try:
+        with admin.cursor() as cur:
+            cur.execute(f"CREATE DATABASE {name}")
+        try:
+            yield {**{key: value for key, value in server.items() if key != "dbname"}, "database": name}
+        finally:
+            with admin.cursor() as cur:
+                cur.execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+    finally:
+        admin.close()
+
+
+@contextmanager
+def temporary_cluster():
+    """A new cluster in a temporary directory, listening on a free local port."""
+    root = tempfile.mkdtemp(prefix="fpl_pg_")
+    data = os.path.join(root, "data")
+    port = free_port()
+    run = lambda *cmd: subprocess.run(cmd, check=True, capture_output=True)  # noqa: E731
+    try:
+        run(pg_binary("initdb"), "-D", data, "-U", USER, "--auth=trust", "-E", "UTF8", "--no-sync")
+        # Durability is irrelevant for a database that is deleted afterwards
+        options = f"-p {port} -k {root} -c listen_addresses=127.0.0.1 -c fsync=off -c synchronous_commit=off"
+        run(pg_binary("pg_ctl"), "-D", data, "-o", options, "-l", os.path.join(root, "server.log"), "-w", "start")
+        try:
+            yield {"host": "127.0.0.1", "port": port, "user": USER, "database": "postgres"}
+        finally:
+            run(pg_binary("pg_ctl"), "-D", data, "-m", "immediate", "-w", "stop")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+@contextmanager
+def temporary_database():
+    """Yields the connection parameters of an empty database that is deleted afterwards."""
+    reason = unavailable()
+    if reason:
+        raise RuntimeError(f"No PostgreSQL for the benchmarks: {reason}")
+    dsn = os.environ.get("FPL_BENCH_DSN")
+    if dsn:
+        with server_database(dsn) as params:
+            yield params
+    else:
+        with temporary_cluster() as params:
+            yield params
+
+
+@contextmanager
+def scratch_database():
+    """A temporary database with the pipeline's tables, which ``db`` connections go to."""
+    import create_tables
+    import db
+
+    with temporary_database() as params:
+        saved = dict(db.db_params)
+        db.close_pool()
+        db.db_params.clear()
+        db.db_params.update(params)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                create_tables.create_tables()
+            yield params
+        finally:
+            db.close_pool()
+            db.db_params.clear()
+            db.db_params.update(saved)
@@ -0,0 +1,55 @@
+"""The web app with a synthetic, changing dashboard behind /events, for bench_sse.py.
+
+Served by gunicorn like the real app; nothing touches the database. Every
+``FPL_SSE_INTERVAL`` seconds a few live-table rows change and the data version becomes the
+current time in milliseconds, so clients can tell how long each diff took to reach them.
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import dashboard  # noqa: E402
+import events  # noqa: E402
+import league_registry  # noqa: E402
+from app import app  # noqa: E402
+
+# gunicorn serves this module's ``app``
+__all__ = ["app"]
+
+INTERVAL = float(os.environ.get("FPL_SSE_INTERVAL", "2"))
+MANAGERS = 50
+
+changed = threading.Event()
+_ticking = threading.Lock()
+rng = random.Random(0)
+live_table = [[rank, f"Manager {rank}", 40, 400 - rank, rank] for rank in range(1, MANAGERS + 1)]
+data = dict(dashboard.EMPTY_DASHBOARD, version=int(time.time() * 1000),
+            live={"gameweek": 6, "expires_at": None, "table": live_table})
+
+
+def tick():
+    while True:
+        time.sleep(INTERVAL)
+        for row in rng.sample(live_table, 3):
+            row[2] += rng.choice([1, 2, 3, 6])
+            row[3] += 1
+        data["version"] = int(time.time() * 1000)
+        changed.set()
+
+
+def source():
+    # The ticker starts with the first subscriber, in the worker: under preload_app the module
+    # is imported in the gunicorn master, and threads started there do not survive the fork
+    if _ticking.acquire(blocking=False):
+        threading.Thread(target=tick, daemon=True).start()
+    return data
+
+
+events.broadcasters[league_registry.default_group()["slug"]] = events.Broadcaster(
+    source=source, changed=changed, refresh_interval=INTERVAL * 5)
@@ -0,0 +1,39 @@
+"""The web app with a fixed, synthetic dashboard, for bench_startup.py.
+
+Served by gunicorn like the real app. The page data never comes from the database, so the
+time to the first response is the app's own startup and one render, not a query.
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import dashboard  # noqa: E402
+import league_registry  # noqa: E402
+from app import app  # noqa: E402
+
+# gunicorn serves this module's ``app``
+__all__ = ["app"]
+
+MANAGERS = 50
+
+
+class FixedVersion:
+    """A version watcher for a database that never changes."""
+
+    listening = True
+    version = 1
+
+    def current(self):
+        return self.version
+
+
+table = [(rank, f"Manager {rank}", 400 - rank) for rank in range(1, MANAGERS + 1)]
+data = dict(dashboard.EMPTY_DASHBOARD, version=1, classic_table=table, h2h_table=table,
+            gameweek_winners=[(gw, f"Manager {gw}", 80) for gw in range(1, 6)],
+            next_deadline={"gameweek": 6, "deadline": datetime.now(timezone.utc) + timedelta(days=7)})
+
+dashboard.caches[league_registry.default_group()["slug"]] = dashboard.DashboardCache(lambda: data, FixedVersion())
@@ -0,0 +1,410 @@
+"""Reproducible benchmark suite: every hot path of the pipeline and web app on synthetic data.
+
+All inputs come from the deterministic generators in fpl_stub.py, sized by ``--entries``
+(managers per league) and ``--gameweeks`` (length of the season so far). Each stage runs in a
+fresh process: one warm-up call, one call under tracemalloc for its peak allocations, then
+``--repeat`` timed calls.
+
+- fetch: ``fetch_leagues.fetch_league_standings`` of a classic league from the local stub
+- parse: ``load_json_file`` and ``extract_classic_standings`` of one standings snapshot
+- history: parsing every manager's entry/{id}/history payload into gameweek and chip rows
+- process: a full rebuild of the processed store from an archived season of snapshots
+- analytics: the season aggregates of ``analytics.compute``
+- live: ``live_points.live_table`` from picks, live element stats and fixtures
+- index / index_cached: GET / through the Flask app with a synthetic dashboard, rendering the
+  page every time vs serving it from the page cache
+- load / dashboard_query: ``insert_dataframe`` of a league's gameweek and the dashboard query,
+  in a throwaway database (see pg_fixture.py); skipped when none can be made
+
+Results (throughput, latency percentiles and memory per stage, plus the commit and the
+configuration) are written as JSON to ``--output``, by default benchmarks/results/<commit>.json.
+Compare two runs with compare.py.
+
+    python benchmarks/suite.py --entries 5000 --gameweeks 38
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import numpy as np  # noqa: E402
+
+import pg_fixture  # noqa: E402
+from fpl_stub import (bootstrap_static, entry_history, entry_picks, event_live, fixtures,  # noqa: E402
+                      standings_page, standings_rows, start_stub)
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+SEASON_START = datetime(2026, 8, 15, 10, 0, 0)
+# Small ids keep the stub's entry ids (league id * 100000 + i) inside an INT column
+CLASSIC_ID = 1
+H2H_ID = 2
+REGISTRY = {"leagues": [{"slug": "bench", "name": "Bench League", "season": "2026/2027",
+                         "classic": CLASSIC_ID, "h2h": H2H_ID, "members": []}]}
+PERCENTILES = (50, 95, 99)
+
+# name -> (setup, needs a database); setup(config, workdir) is a context manager yielding
+# (operation, items per call, unit of items)
+STAGES = {}
+
+
+def stage(name, database=False):
+    def register(fn):
+        STAGES[name] = (contextmanager(fn), database)
+        return fn
+    return register
+
+
+# -------------------------------
+# Stages
+# -------------------------------
+@stage("fetch")
+def fetch_stage(config, workdir):
+    server, base_url, _ = start_stub(entries=config["entries"], gameweek=config["gameweeks"],
+                                     latency=config["latency"], season_length=config["season_length"])
+    import fetch_leagues
+    import fpl_api
+    fpl_api.API_BASE = base_url
+    fpl_api.CACHE_ENABLED = False
+    try:
+        yield lambda: fetch_leagues.fetch_league_standings(CLASSIC_ID, "classic"), config["entries"], "rows"
+    finally:
+        server.shutdown()
+
+
+@stage("parse")
+def parse_stage(config, workdir):
+    import process_leagues
+    path = os.path.join(workdir, f"league_{CLASSIC_ID}_20260815_100000.json")
+    with open(path, "w") as f:
+        json.dump(standings_page(CLASSIC_ID, "classic", 1, config["entries"], config["gameweeks"],
+                                 page_size=config["entries"]), f, indent=4)
+    yield (lambda: process_leagues.extract_classic_standings(process_leagues.load_json_file(path)),
+           config["entries"], "rows")
+
+
+@stage("history")
+def history_stage(config, workdir):
+    import manager_history
+    import snapshot_store
+    upto = config["gameweeks"]
+    payloads = [(entry, json.dumps(entry_history(entry, upto)).encode())
+                for entry in range(CLASSIC_ID * 100_000, CLASSIC_ID * 100_000 + config["entries"])]
+
+    def parse():
+        for entry, raw in payloads:
+            history = snapshot_store.loads(raw)
+            manager_history.gameweek_rows(entry, history, upto)
+            manager_history.chip_rows(entry, history, upto)
+    yield parse, len(payloads), "managers"
+
+
+@stage("process")
+def process_stage(config, workdir):
+    import league_registry
+    import process_leagues
+    import snapshot_store
+    leagues = league_registry.fpl_leagues()
+    snapshot_dir = os.path.join(workdir, "snapshots")
+    store = snapshot_store.SnapshotStore(snapshot_dir)
+    for gw in range(1, config["gameweeks"] + 1):
+        for league in leagues:
+            store.append(league["id"], standings_page(league["id"], league["type"], 1, config["entries"], gw,
+                                                      page_size=config["entries"]),
+                         SEASON_START + timedelta(days=7 * (gw - 1)))
+    store.close()
+
+    def process():
+        process_leagues.main(full=True, processed_dir=tempfile.mkdtemp(dir=workdir), snapshot_dir=snapshot_dir)
+    yield process, config["entries"] * config["gameweeks"] * len(leagues), "rows"
+
+
+def season_history(entries, gameweeks):
+    """Processed-classic-shaped rows of every manager and gameweek."""
+    import pandas as pd
+    return pd.DataFrame([{"entry": row["entry"], "manager_name": row["player_name"], "event": gw,
+                          "event_points": row["event_total"]}
+                         for gw in range(1, gameweeks + 1)
+                         for row in standings_rows(CLASSIC_ID, "classic", entries, gw)])
+
+
+@stage("analytics")
+def analytics_stage(config, workdir):
+    import analytics
+    history = season_history(config["entries"], config["gameweeks"])
+    yield (lambda: analytics.compute(analytics.SeasonMatrix.from_frame(history)),
+           len(history), "rows")
+
+
+@stage("live")
+def live_stage(config, workdir):
+    import live_points
+    gw = config["gameweeks"]
+    standings = standings_page(CLASSIC_ID, "classic", 1, config["entries"], gw, page_size=config["entries"])
+    picks = {row["entry"]: entry_picks(row["entry"], gw) for row in standings["standings"]["results"]}
+    bootstrap = bootstrap_static(gw, config["season_length"])
+    live, matches = event_live(gw), fixtures(gw)
+    yield (lambda: live_points.live_table(standings, picks, bootstrap, live, matches),
+           config["entries"], "managers")
+
+
+def synthetic_dashboard(entries, gameweeks):
+    """What ``dashboard.load_dashboard`` returns for the synthetic league, without a database."""
+    import dashboard
+    classic = standings_rows(CLASSIC_ID, "classic", entries, gameweeks)
+    h2h = standings_rows(H2H_ID, "h2h", entries, gameweeks)
+    winners = [(gw, max(standings_rows(CLASSIC_ID, "classic", entries, gw), key=lambda r: r["event_total"]))
+               for gw in range(1, gameweeks + 1)]
+    winners = [(gw, row["player_name"], row["event_total"]) for gw, row in winners]
+    live = [(row["rank"], row["player_name"], row["event_total"], row["total"], row["rank"])
+            for row in classic[:dashboard.LIVE_LIMIT]]
+    return {
+        "version": 1,
+        "classic_table": [(row["rank"], row["player_name"], row["total"]) for row in classic],
+        "h2h_table": [(row["rank"], row["player_name"], row["total"]) for row in h2h],
+        "gameweek_winners": winners,
+        "classic_winner": {"gameweek": winners[-1][0], "winner": winners[-1][1], "points": winners[-1][2]},
+        "next_deadline": {"gameweek": gameweeks + 1, "deadline": datetime.now(timezone.utc) + timedelta(days=3)},
+        "season_form": [(row["player_name"], 60.0, 0, row["event_total"]) for row in classic[:dashboard.FORM_LIMIT]],
+        "live": {"gameweek": gameweeks, "expires_at": time.time() + dashboard.LIVE_TTL, "table": live},
+    }
+
+
+class FixedVersion:
+    """A version watcher for a database that never changes."""
+
+    listening = True
+    version = 1
+
+    def current(self):
+        return self.version
+
+
+def index_client(config):
+    import dashboard
+    import league_registry
+    import page_cache
+    from app import app
+    data = synthetic_dashboard(config["entries"], config["gameweeks"])
+    dashboard.caches[league_registry.default_group()["slug"]] = dashboard.DashboardCache(lambda: data, FixedVersion())
+    return app.test_client(), page_cache.cache
+
+
+@stage("index")
+def index_stage(config, workdir):
+    client, pages = index_client(config)
+
+    def get():
+        pages._pages.clear()
+        assert client.get("/").status_code == 200
+    yield get, 1, "requests"
+
+
+@stage("index_cached")
+def index_cached_stage(config, workdir):
+    client, _ = index_client(config)
+    yield lambda: client.get("/", headers={"Accept-Encoding": "gzip"}), 1, "requests"
+
+
+def processed_frames(entries, gameweek):
+    import process_leagues
+    return {
+        "classic": process_leagues.clean_classic(process_leagues.extract_classic_standings(
+            standings_page(CLASSIC_ID, "classic", 1, entries, gameweek, page_size=entries))),
+        "h2h": process_leagues.clean_h2h(process_leagues.extract_h2h_standings(
+            standings_page(H2H_ID, "h2h", 1, entries, gameweek, page_size=entries))),
+    }
+
+
+@stage("load", database=True)
+def load_stage(config, workdir):
+    import db
+    import insert_processed_data
+    import migrations
+    # Two gameweeks' standings loaded in turn, so every call rewrites the rows
+    frames = [processed_frames(config["entries"], gw)["classic"].assign(event=config["gameweeks"])
+              for gw in (config["gameweeks"], config["gameweeks"] - 1 or 2)]
+    with pg_fixture.scratch_database(), db.connection() as conn:
+        with conn.cursor() as cur:
+            migrations.ensure_partition(cur, "classic_league", CLASSIC_ID, config["gameweeks"])
+        conn.commit()
+        calls = itertools.count()
+
+        def load():
+            insert_processed_data.insert_dataframe(frames[next(calls) % 2], "classic_league", conn,
+                                                   insert_processed_data.CLASSIC_MAPPING, config["gameweeks"],
+                                                   league_id=CLASSIC_ID)
+        yield load, config["entries"], "rows"
+
+
+@stage("dashboard_query", database=True)
+def dashboard_query_stage(config, workdir):
+    import dashboard
+    import db
+    import insert_processed_data
+    import league_registry
+    frames = processed_frames(config["entries"], config["gameweeks"])
+    with pg_fixture.scratch_database(), db.connection() as conn:
+        insert_processed_data.load_frames(conn, [(league, frames[league["type"]])
+                                                 for league in league_registry.fpl_leagues()], deadlines=[])
+        yield lambda: dashboard.load_dashboard(league_registry.default_group()), 1, "queries"
+
+
+# -------------------------------
+# Harness
+# -------------------------------
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(operation, items, unit, repeat):
+    """Warms up, traces one call's allocations, then times ``repeat`` calls."""
+    operation()
+    tracemalloc.start()
+    operation()
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        seconds.append(time.perf_counter() - start)
+    ms = np.array(seconds) * 1000
+    return {
+        "items": items,
+        "unit": unit,
+        "repeat": repeat,
+        "throughput": round(items / float(np.median(seconds)), 3),
+        "latency_ms": {"mean": round(float(ms.mean()), 3), "min": round(float(ms.min()), 3),
+                       "max": round(float(ms.max()), 3),
+                       **{f"p{q}": round(float(np.percentile(ms, q)), 3) for q in PERCENTILES}},
+        "peak_traced_mb": round(peak_traced / 2**20, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def child(name, config):
+    """Runs one stage in this process and prints its result as JSON."""
+    workdir = tempfile.mkdtemp(prefix=f"fpl_bench_{name}_")
+    registry_path = os.path.join(workdir, "leagues.json")
+    with open(registry_path, "w") as f:
+        json.dump(REGISTRY, f)
+    os.environ["FPL_LEAGUES_FILE"] = registry_path
+    os.environ["FPL_LOG_LEVEL"] = "WARNING"
+    # Keeps the HTTP cache and any data files in the scratch directory
+    os.chdir(workdir)
+    import metrics
+    metrics.setup_logging(level="WARNING")
+    setup, _ = STAGES[name]
+    with contextlib.redirect_stdout(io.StringIO()):
+        with setup(config, workdir) as (operation, items, unit):
+            result = measure(operation, items, unit, config["repeat"])
+    print(json.dumps(result))
+
+
+def run_stage(name, config):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, json.dumps(config)],
+                         capture_output=True, text=True)
+    if out.returncode:
+        return {"error": (out.stderr.strip().splitlines() or ["exit status %d" % out.returncode])[-1]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def input_digest(config):
+    """SHA-256 of a sample of the generated payloads, so runs on different inputs are not compared."""
+    digest = hashlib.sha256()
+    entries, gw = config["entries"], config["gameweeks"]
+    for payload in (standings_page(CLASSIC_ID, "classic", 1, entries, gw, page_size=entries),
+                    standings_page(H2H_ID, "h2h", 1, entries, gw, page_size=entries),
+                    bootstrap_static(gw, config["season_length"]),
+                    [entry_history(CLASSIC_ID * 100_000 + i, gw) for i in range(min(entries, 100))],
+                    [entry_picks(CLASSIC_ID * 100_000 + i, gw) for i in range(min(entries, 100))]):
+        digest.update(json.dumps(payload, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=5000, help="managers per league")
+    parser.add_argument("--gameweeks", type=int, default=10, help="gameweeks played so far")
+    parser.add_argument("--season-length", type=int, default=38, help="gameweeks in the season")
+    parser.add_argument("--repeat", type=int, default=10, help="timed calls per stage")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub delay per request")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--child", nargs=2, metavar=("STAGE", "CONFIG"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child[0], json.loads(args.child[1]))
+        return
+
+    config = {"entries": args.entries, "gameweeks": args.gameweeks, "season_length": args.season_length,
+              "repeat": args.repeat, "latency": args.latency}
+    commit = git("rev-parse", "--short", "HEAD")
+    results = {
+        "meta": {
+            "commit": commit,
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "config": config,
+            "input_digest": input_digest(config),
+        },
+        "stages": {},
+    }
+
+    print(f"{args.entries} managers per league, {args.gameweeks} of {args.season_length} gameweeks, "
+          f"{args.repeat} timed calls per stage")
+    print(f"{'stage':>16} {'throughput':>24} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} "
+          f"{'traced MB':>10} {'RSS MB':>8}")
+    no_database = pg_fixture.unavailable()
+    for name in args.stages:
+        if STAGES[name][1] and no_database:
+            result = {"skipped": no_database}
+        else:
+            result = run_stage(name, config)
+        results["stages"][name] = result
+        if "throughput" in result:
+            latency = result["latency_ms"]
+            print(f"{name:>16} {result['throughput']:>12,.0f} {result['unit'] + '/s':<11} {latency['p50']:>10.2f} "
+                  f"{latency['p95']:>10.2f} {latency['p99']:>10.2f} {result['peak_traced_mb']:>10.1f} "
+                  f"{result['peak_rss_mb']:>8.0f}")
+        else:
+            print(f"{name:>16} {'skipped' if 'skipped' in result else 'failed'}: "
+                  f"{result.get('skipped') or result.get('error')}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
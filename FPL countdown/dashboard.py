@@ -0,0 +1,289 @@
+import logging
+import select
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import psycopg2
+
+import db
+import league_registry
+import metrics
+
+log = logging.getLogger(__name__)
+
+# One round-trip for everything a league's page shows. The version is the id of the latest
+# pipeline run, which the pipeline bumps (and announces with NOTIFY) after every load.
+# The latest gameweek is looked up once per league rather than per row (as the latest_*_standings
+# views do), so each standings read prunes to the league's latest gameweek partition.
+DASHBOARD_SQL = """
+    SELECT
+        (SELECT COALESCE(MAX(id), 0) FROM pipeline_runs) AS version,
+        (SELECT COALESCE(json_agg(json_build_array(position, manager, points) ORDER BY position, manager), '[]')
+           FROM classic_league WHERE league_id = %(classic)s
+            AND gameweek = (SELECT MAX(gameweek) FROM classic_league WHERE league_id = %(classic)s)) AS classic_table,
+        (SELECT COALESCE(json_agg(json_build_array(position, manager, points) ORDER BY position, manager), '[]')
+           FROM h2h_league WHERE league_id = %(h2h)s
+            AND gameweek = (SELECT MAX(gameweek) FROM h2h_league WHERE league_id = %(h2h)s)) AS h2h_table,
+        (SELECT COALESCE(json_agg(json_build_array(gameweek, winner, points) ORDER BY gameweek), '[]')
+           FROM gameweek_winners WHERE league_id = %(classic)s AND gameweek >= 1) AS gameweek_winners,
+        (SELECT json_build_array(gameweek, deadline)
+           FROM fpl_deadline WHERE deadline > NOW() ORDER BY deadline ASC LIMIT 1) AS next_deadline,
+        (SELECT COALESCE(json_agg(json_build_array(manager, form, rank_change, best_points)), '[]')
+           FROM (SELECT manager, form, rank_change, best_points FROM manager_season_stats
+                 WHERE league_id = %(classic)s
+                 ORDER BY form DESC NULLS LAST LIMIT %(form_limit)s) AS top) AS season_form,
+        (SELECT json_build_object(
+                    'gameweek', MAX(gameweek),
+                    'expires_in', %(live_ttl)s - EXTRACT(EPOCH FROM NOW() - MAX(updated_at)),
+                    'rows', json_agg(json_build_array(live_rank, manager, live_points, live_total, official_rank)
+                                     ORDER BY live_rank, manager))
+           FROM (SELECT * FROM live_standings
+                 WHERE league_id = %(classic)s AND updated_at > NOW() - make_interval(secs => %(live_ttl)s)
+                 ORDER BY live_rank, manager LIMIT %(live_limit)s) AS live
+          HAVING COUNT(*) > 0) AS live
+"""
+
+# Managers listed in the in-form table
+FORM_LIMIT = 10
+# Live standings are shown for this many seconds after the live estimator last published them
+LIVE_TTL = 15 * 60
+LIVE_LIMIT = 50
+
+# How often to ask Postgres for the data version when LISTEN is unavailable
+VERSION_POLL_INTERVAL = 30
+
+
+def load_dashboard(league=None):
+    """Fetches all of a league group's page data in a single query (the default group's if None)."""
+    league = league or league_registry.default_group()
+    version, classic, h2h, winners, deadline, form, live = db.fetchone(
+        DASHBOARD_SQL, {"classic": league["classic"], "h2h": league["h2h"], "form_limit": FORM_LIMIT,
+                        "live_ttl": LIVE_TTL, "live_limit": LIVE_LIMIT}, label="dashboard")
+    latest = winners[-1] if winners else None
+    return {
+        "version": version,
+        "classic_table": [tuple(row) for row in classic],
+        "h2h_table": [tuple(row) for row in h2h],
+        "gameweek_winners": [tuple(row) for row in winners],
+        "classic_winner": {"gameweek": latest[0], "winner": latest[1], "points": latest[2]} if latest else None,
+        "next_deadline": {"gameweek": deadline[0], "deadline": datetime.fromisoformat(deadline[1])} if deadline else None,
+        "season_form": [tuple(row) for row in form],
+        "live": {"gameweek": live["gameweek"], "expires_at": time.time() + float(live["expires_in"]),
+                 "table": [tuple(row) for row in live["rows"]]} if live else None,
+    }
+
+
+class VersionWatcher:
+    """Tracks the latest data version by listening for the pipeline's NOTIFY on a dedicated connection.
+
+    While the listener is connected, ``current()`` never touches the database. If it cannot
+    connect, ``current()`` falls back to polling the version at most every ``poll_interval`` seconds.
+    Events registered with ``on_change`` are set whenever a new version arrives.
+    """
+
+    def __init__(self, channel=db.DATA_VERSION_CHANNEL, poll_interval=VERSION_POLL_INTERVAL):
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.version = None
+        self.listening = False
+        self._polled_at = 0.0
+        self._started = False
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._listen, name="data-version-listener", daemon=True).start()
+
+    def _listen(self):
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**db.db_params)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.channel};")
+                    cur.execute("SELECT COALESCE(MAX(id), 0) FROM pipeline_runs")
+                    self._update(cur.fetchone()[0])
+                self.listening = True
+                while True:
+                    if select.select([conn], [], [], 60) != ([], [], []):
+                        conn.poll()
+                        while conn.notifies:
+                            notify = conn.notifies.pop(0)
+                            self._update(int(notify.payload or 0))
+            except Exception as e:
+                log.warning(f"Data version listener disconnected: {e}")
+                self.listening = False
+                if conn is not None:
+                    conn.close()
+                time.sleep(self.poll_interval)
+
+    def _update(self, version):
+        if self.version is None or version > self.version:
+            self.version = version
+            for event in self._listeners:
+                event.set()
+
+    def on_change(self, event):
+        """Registers a threading.Event to set on every new data version."""
+        self._listeners.append(event)
+
+    def current(self):
+        """Returns the latest known data version, polling only when not listening."""
+        self.start()
+        if not self.listening and time.monotonic() - self._polled_at >= self.poll_interval:
+            self._polled_at = time.monotonic()
+            try:
+                self._update(db.fetchone("SELECT COALESCE(MAX(id), 0) FROM pipeline_runs",
+                                         label="data_version")[0])
+            except Exception as e:
+                log.error(f"Error polling data version: {e}")
+        return self.version
+
+
+class DashboardCache:
+    """In-process cache of the dashboard data, valid until the data version changes, the
+    next deadline passes or the live standings expire."""
+
+    def __init__(self, loader=load_dashboard, watcher=None):
+        self.loader = loader
+        self.watcher = watcher or VersionWatcher()
+        self._entry = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "load_count": 0, "load_total_s": 0.0, "load_max_s": 0.0}
+
+    def _fresh(self, entry, version):
+        if entry is None:
+            return False
+        if version is not None and entry["version"] < version:
+            return False
+        return entry["expires_at"] is None or time.time() < entry["expires_at"]
+
+    def get(self):
+        version = self.watcher.current()
+        entry = self._entry
+        if self._fresh(entry, version):
+            self.stats["hits"] += 1
+            return entry["data"]
+
+        with self._lock:
+            entry = self._entry
+            if self._fresh(entry, version):
+                self.stats["hits"] += 1
+                return entry["data"]
+
+            self.stats["misses"] += 1
+            start = time.perf_counter()
+            data = self.loader()
+            elapsed = time.perf_counter() - start
+            self.stats["load_count"] += 1
+            self.stats["load_total_s"] += elapsed
+            self.stats["load_max_s"] = max(self.stats["load_max_s"], elapsed)
+
+            deadline = data["next_deadline"]
+            # The page shows the next deadline, so it changes once that deadline passes, and
+            # live standings disappear once they are older than LIVE_TTL
+            expiries = [deadline["deadline"].astimezone().timestamp()] if deadline else []
+            if data.get("live"):
+                expiries.append(data["live"]["expires_at"])
+            self._entry = {
+                "version": data["version"],
+                "expires_at": min(expiries) if expiries else None,
+                "data": data,
+            }
+            return data
+
+    def invalidate(self):
+        self._entry = None
+
+    def summary(self):
+        """Returns hit-rate and load latency figures."""
+        stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["load_avg_s"] = stats["load_total_s"] / stats["load_count"] if stats["load_count"] else 0.0
+        stats["version"] = self._entry["version"] if self._entry else None
+        stats["listening"] = self.watcher.listening
+        return stats
+
+
+# One version listener per process, shared by the cache of every league group
+watcher = VersionWatcher()
+caches = {}
+_caches_lock = threading.Lock()
+
+
+def cache_for(league):
+    """The dashboard cache of a league group, created on first use."""
+    cache = caches.get(league["slug"])
+    if cache is None:
+        with _caches_lock:
+            cache = caches.get(league["slug"])
+            if cache is None:
+                cache = caches[league["slug"]] = DashboardCache(lambda: load_dashboard(league), watcher)
+    return cache
+
+
+def collect_cache_stats():
+    with _caches_lock:
+        stats = {slug: cache.summary() for slug, cache in caches.items()}
+    return [
+        ("fpl_dashboard_cache_lookups_total", "counter", "Dashboard cache lookups by outcome",
+         [({"league": slug, "result": result}, summary[result]) for slug, summary in stats.items()
+          for result in ("hits", "misses")]),
+        ("fpl_dashboard_load_seconds_total", "counter", "Time spent loading the dashboard from the database",
+         [({"league": slug}, summary["load_total_s"]) for slug, summary in stats.items()]),
+        ("fpl_data_version", "gauge", "Latest data version seen by this process",
+         [({}, watcher.version or 0)]),
+        ("fpl_data_version_listening", "gauge", "Whether the LISTEN connection is up",
+         [({}, int(watcher.listening))]),
+    ]
+
+
+metrics.register_collector(collect_cache_stats)
+
+
+# Deadlines are shown in US Eastern time
+EASTERN = ZoneInfo("America/New_York")
+
+
+def eastern_deadline(next_deadline):
+    """A ``next_deadline`` entry with its deadline converted to US Eastern time.
+
+    The page and its /events updates both use this, so the countdown gets the same
+    timezone-aware time whichever of them set it.
+    """
+    if not next_deadline:
+        return None
+    return {"gameweek": next_deadline["gameweek"], "deadline": next_deadline["deadline"].astimezone(EASTERN)}
+
+
+EMPTY_DASHBOARD = {
+    "version": 0,
+    "classic_table": [],
+    "h2h_table": [],
+    "gameweek_winners": [],
+    "classic_winner": None,
+    "next_deadline": None,
+    "season_form": [],
+    "live": None,
+}
+
+
+def get_dashboard(league=None):
+    """Returns a league group's page data, from the in-process cache when it is still current.
+
+    If the database cannot be reached, the last cached data (or an empty dashboard) is returned.
+    """
+    cache = cache_for(league or league_registry.default_group())
+    try:
+        return cache.get()
+    except Exception as e:
+        log.error(f"Error fetching dashboard: {e}")
+        return cache._entry["data"] if cache._entry else EMPTY_DASHBOARD
@@ -0,0 +1,189 @@
+import logging
+import queue
+import threading
+
+import api
+import dashboard
+import metrics
+
+# Sections sent row by row: a diff carries only the rows that changed and the new length
+LIST_SECTIONS = ["classic_table", "h2h_table", "gameweek_winners", "season_form", "live_table"]
+
+# Seconds between comment lines on an idle stream, so proxies do not close it
+KEEPALIVE_INTERVAL = 15
+# Seconds the hub waits for a data version change before checking the dashboard anyway
+# (the deadline rolling over and live standings expiring do not change the version)
+REFRESH_INTERVAL = 15
+# Messages buffered per subscriber; a client that falls further behind is resynced
+SUBSCRIBER_QUEUE_SIZE = 16
+# Milliseconds the browser waits before reconnecting a dropped stream
+RETRY_MS = 5000
+
+KEEPALIVE = b": keepalive\n\n"
+
+log = logging.getLogger(__name__)
+
+
+def sections(data):
+    """The parts of the dashboard the page shows, as plain JSON-friendly values."""
+    live = data["live"]
+    deadline = dashboard.eastern_deadline(data["next_deadline"])
+    return {
+        "classic_table": [list(row) for row in data["classic_table"]],
+        "h2h_table": [list(row) for row in data["h2h_table"]],
+        "gameweek_winners": [list(row) for row in data["gameweek_winners"]],
+        "season_form": [list(row) for row in data["season_form"]],
+        "live_table": [list(row) for row in live["table"]] if live else [],
+        "live_gameweek": live["gameweek"] if live else None,
+        "next_deadline": {"gameweek": deadline["gameweek"], "deadline": deadline["deadline"].isoformat()}
+        if deadline else None,
+        "classic_winner": data["classic_winner"],
+    }
+
+
+def diff(old, new):
+    """Changes between two section dicts: changed rows of list sections, whole values otherwise."""
+    changes = {}
+    for name, value in new.items():
+        before = old.get(name)
+        if value == before:
+            continue
+        if name in LIST_SECTIONS:
+            before = before or []
+            changes[name] = {
+                "length": len(value),
+                "rows": {str(i): row for i, row in enumerate(value) if i >= len(before) or before[i] != row},
+            }
+        else:
+            changes[name] = value
+    return changes
+
+
+def encode(event, version, payload):
+    return b"event: %s\nid: %d\ndata: %s\n\n" % (event.encode(), version or 0, api.dumps(payload))
+
+
+class Broadcaster:
+    """Pushes the dashboard to every open page as server-sent events.
+
+    A single hub thread waits for the data version to change, diffs the dashboard once and
+    hands the encoded message to every subscriber's queue, so an idle connection costs a
+    queue and a parked greenlet under the gevent worker.
+    """
+
+    def __init__(self, source=dashboard.get_dashboard, changed=None, refresh_interval=REFRESH_INTERVAL,
+                 keepalive=KEEPALIVE_INTERVAL):
+        self.source = source
+        self.changed = changed
+        self.refresh_interval = refresh_interval
+        self.keepalive = keepalive
+        self.state = None
+        self.version = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._started = False
+        self.stats = {"published": 0, "resynced": 0}
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        if self.changed is None:
+            self.changed = threading.Event()
+            dashboard.watcher.on_change(self.changed)
+            dashboard.watcher.start()
+        threading.Thread(target=self._run, name="dashboard-events", daemon=True).start()
+
+    def _run(self):
+        while True:
+            self.changed.wait(self.refresh_interval)
+            self.changed.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                log.exception(f"Error pushing dashboard changes: {e}")
+
+    def _snapshot(self):
+        return encode("snapshot", self.version, {"version": self.version, "sections": self.state})
+
+    def refresh(self):
+        """Loads the dashboard and publishes what changed. Returns the changes, if any."""
+        data = self.source()
+        new = sections(data)
+        with self._lock:
+            changes = diff(self.state, new) if self.state is not None else None
+            self.state, self.version = new, data["version"]
+            if not changes:
+                return None
+            message = encode("diff", self.version, {"version": self.version, "sections": changes})
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    # Too far behind to patch: drop its backlog and start it over from a snapshot
+                    while not subscriber.empty():
+                        subscriber.get_nowait()
+                    subscriber.put_nowait(self._snapshot())
+                    self.stats["resynced"] += 1
+            self.stats["published"] += 1
+        return changes
+
+    def subscribe(self):
+        """Registers a subscriber; its queue starts with a snapshot of the current dashboard."""
+        self.start()
+        if self.state is None:
+            self.refresh()
+        subscriber = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            subscriber.put_nowait(b"retry: %d\n" % RETRY_MS + self._snapshot())
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self):
+        """Yields the event stream of one client until it disconnects."""
+        subscriber = self.subscribe()
+        try:
+            while True:
+                try:
+                    yield subscriber.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield KEEPALIVE
+        finally:
+            self.unsubscribe(subscriber)
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+
+# One broadcaster per league group, each with its own hub thread, created on first subscribe
+broadcasters = {}
+_broadcasters_lock = threading.Lock()
+
+
+def broadcaster_for(league):
+    with _broadcasters_lock:
+        broadcaster = broadcasters.get(league["slug"])
+        if broadcaster is None:
+            broadcaster = broadcasters[league["slug"]] = Broadcaster(source=lambda: dashboard.get_dashboard(league))
+        return broadcaster
+
+
+def collect_stream_stats():
+    with _broadcasters_lock:
+        hubs = dict(broadcasters)
+    return [
+        ("fpl_sse_subscribers", "gauge", "Open event streams",
+         [({"league": slug}, hub.subscribers) for slug, hub in hubs.items()]),
+        ("fpl_sse_messages_total", "counter", "Dashboard diffs published and subscribers resynced",
+         [({"league": slug, "kind": kind}, hub.stats[kind]) for slug, hub in hubs.items()
+          for kind in ("published", "resynced")]),
+    ]
+
+
+metrics.register_collector(collect_stream_stats)
@@ -0,0 +1,44 @@
+import os
+
+# Gunicorn settings for the web app: gunicorn -c gunicorn.conf.py app:app
+#
+# /events keeps one long-lived response open per browser tab. The gevent worker parks each
+# idle stream on a greenlet instead of a thread, so one worker holds thousands of them;
+# benchmarks/bench_sse.py measures how many.
+#
+# The app is imported once in the master (preload_app) and the workers are forked from it, so
+# they start with Flask, the routes and the compiled templates already in memory;
+# benchmarks/bench_startup.py measures cold start to first response. The import now happens
+# before the gevent worker would patch the standard library, so it is patched here first,
+# before anything else is imported: locks created at import then cooperate with greenlets.
+from gevent import monkey
+
+monkey.patch_all()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "gevent"
+# Concurrent connections (open streams included) per worker
+worker_connections = int(os.environ.get("FPL_WORKER_CONNECTIONS", "5000"))
+timeout = 30
+keepalive = 5
+# FPL_PRELOAD=0 imports the app in each worker instead
+preload_app = os.environ.get("FPL_PRELOAD", "1") != "0"
+
+
+def post_worker_init(worker):
+    """Makes psycopg2 cooperate with gevent, then opens the worker's own database pool, once
+    it is forked and patched and before it takes requests. Nothing connects in the master, so
+    no connection is shared between workers."""
+    from psycogreen.gevent import patch_psycopg
+
+    import db
+
+    # Without a wait callback a query blocks the whole worker, stalling every open stream and
+    # request on it; with it, the greenlet waiting on Postgres yields to the others
+    patch_psycopg()
+    try:
+        db.init_pool()
+    except Exception as e:
+        # The pool is created on first use instead; a database outage must not stop the worker
+        worker.log.warning(f"Database pool not opened at startup: {e}")
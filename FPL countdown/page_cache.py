@@ -0,0 +1,93 @@
+import gzip
+import hashlib
+import threading
+
+from flask import Response, request
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+CACHE_CONTROL = "public, max-age=30, must-revalidate"
+
+
+class RenderedPage:
+    """A rendered HTML body with its precompressed variants and a strong ETag for each.
+
+    Every encoding is a different representation, so each gets its own tag (the body's hash
+    with the encoding as a suffix) and a revalidation never matches bytes of another encoding.
+    """
+
+    def __init__(self, html):
+        self.body = html.encode("utf-8")
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.encoded = {"gzip": gzip.compress(self.body, compresslevel=9)}
+        if brotli is not None:
+            self.encoded["br"] = brotli.compress(self.body, quality=11)
+        self.etags = {None: self.etag, **{encoding: f"{self.etag}-{encoding}" for encoding in self.encoded}}
+
+
+class PageCache:
+    """Keeps the rendered output of a page for its current cache key (e.g. the data version).
+
+    Only the most recent keys are kept, since an older data version is never served again.
+    """
+
+    def __init__(self, max_entries=2):
+        self.max_entries = max_entries
+        self._pages = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "renders": 0, "not_modified": 0}
+
+    def get(self, key, render):
+        """Returns the cached page for ``key``, calling ``render()`` for the HTML on a miss."""
+        page = self._pages.get(key)
+        if page is not None:
+            self.stats["hits"] += 1
+            return page
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self.stats["renders"] += 1
+                page = RenderedPage(render())
+                while len(self._pages) >= self.max_entries:
+                    self._pages.pop(next(iter(self._pages)))
+                self._pages[key] = page
+            return page
+
+    def respond(self, page):
+        """Builds the response for the current request: 304 if the client's copy is current,
+        otherwise the best precompressed body the client accepts."""
+        encoding = None
+        for candidate in ("br", "gzip"):
+            if candidate in page.encoded and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+        etag = page.etags[encoding]
+        if request.if_none_match.contains(etag):
+            self.stats["not_modified"] += 1
+            response = Response(status=304)
+        else:
+            body = page.encoded[encoding] if encoding else page.body
+            response = Response(body, mimetype="text/html")
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+# A page per registered league group, plus room for the previous version of each
+cache = PageCache(max_entries=64)
+
+
+def collect_stats():
+    return [("fpl_page_cache_total", "counter", "Rendered page cache hits, renders and 304 responses",
+             [({"result": result}, count) for result, count in cache.stats.items()])]
+
+
+metrics.register_collector(collect_stats)
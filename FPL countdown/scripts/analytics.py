@@ -0,0 +1,221 @@
+import argparse
+import io
+import logging
+
+import numpy as np
+import pandas as pd
+
+import db
+import league_registry
+import metrics
+import processed_store
+
+# Gameweeks averaged into a manager's current form
+FORM_WINDOW = 5
+
+log = logging.getLogger(__name__)
+
+
+class SeasonMatrix:
+    """Dense manager x gameweek matrix of event points (NaN where a manager has no row)."""
+
+    def __init__(self, entries, names, gameweeks, points):
+        self.entries = entries
+        self.names = names
+        self.gameweeks = gameweeks
+        self.points = points
+
+    @classmethod
+    def from_frame(cls, classic_df):
+        """Builds the matrix from processed classic rows (entry, manager_name, event, event_points).
+
+        Rows are scattered straight into a preallocated array by their factorized codes; if a
+        (manager, gameweek) appears twice, the last row wins.
+        """
+        entry_codes, entries = pd.factorize(classic_df["entry"], sort=True)
+        gw_codes, gameweeks = pd.factorize(classic_df["event"], sort=True)
+        points = np.full((len(entries), len(gameweeks)), np.nan)
+        points[entry_codes, gw_codes] = classic_df["event_points"].to_numpy(dtype=float)
+        names = np.empty(len(entries), dtype=object)
+        names[entry_codes] = classic_df["manager_name"].to_numpy()
+        return cls(np.asarray(entries), names, np.asarray(gameweeks), points)
+
+
+def league_ranks(cumulative):
+    """Competition ranks (1 = best, ties share a rank) within every column of a score matrix."""
+    ranks = np.empty(cumulative.shape, dtype=np.int64)
+    for j in range(cumulative.shape[1]):
+        column = cumulative[:, j]
+        # Rank = number of strictly higher scores + 1, found by binary search in the sorted column
+        ranks[:, j] = len(column) - np.searchsorted(np.sort(column), column, side="right") + 1
+    return ranks
+
+
+def rolling_mean(points, window):
+    """Trailing mean of each manager's points over a window of ``window`` gameweek columns.
+
+    Column j averages the non-NaN points in columns j - window + 1 .. j (fewer at the start of
+    the season), so gameweeks a manager missed shrink the count rather than count as zero. It
+    is NaN where the manager has no points anywhere in the window.
+    """
+    played = ~np.isnan(points)
+    sums = np.cumsum(np.where(played, points, 0.0), axis=1)
+    counts = np.cumsum(played, axis=1)
+    sums[:, window:] -= sums[:, :-window].copy()
+    counts[:, window:] -= counts[:, :-window].copy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def allplay_records(points):
+    """Head-to-head record of every manager against every other manager, summed over gameweeks.
+
+    In each gameweek a manager beats everyone who scored less and draws with everyone on the
+    same score. Counting via a sort per gameweek keeps this O(M log M) per gameweek instead of
+    comparing every pair of managers.
+    """
+    wins = np.zeros(points.shape[0], dtype=np.int64)
+    draws = np.zeros(points.shape[0], dtype=np.int64)
+    losses = np.zeros(points.shape[0], dtype=np.int64)
+    for j in range(points.shape[1]):
+        column = points[:, j]
+        played = ~np.isnan(column)
+        scores = np.sort(column[played])
+        below = np.searchsorted(scores, column[played], side="left")
+        not_above = np.searchsorted(scores, column[played], side="right")
+        wins[played] += below
+        draws[played] += not_above - below - 1
+        losses[played] += len(scores) - not_above
+    return wins, draws, losses
+
+
+def compute(matrix, form_window=FORM_WINDOW):
+    """Computes per-gameweek and season aggregates for every manager in one pass over the matrix.
+
+    Returns (gameweek_stats, season_stats) DataFrames shaped like the summary tables.
+    """
+    points = matrix.points
+    played = ~np.isnan(points)
+    filled = np.where(played, points, 0.0)
+
+    cumulative = np.cumsum(filled, axis=1)
+    ranks = league_ranks(cumulative)
+    rank_change = np.zeros_like(ranks)
+    rank_change[:, 1:] = ranks[:, :-1] - ranks[:, 1:]
+    form = rolling_mean(points, form_window)
+
+    best = np.argmax(np.where(played, points, -np.inf), axis=1)
+    worst = np.argmin(np.where(played, points, np.inf), axis=1)
+    rows = np.arange(len(matrix.entries))
+    games = played.sum(axis=1)
+    wins, draws, losses = allplay_records(points)
+    last = len(matrix.gameweeks) - 1
+
+    season = pd.DataFrame({
+        "entry_id": matrix.entries,
+        "manager": matrix.names,
+        "gameweeks_played": games,
+        "total_points": cumulative[:, last].astype(np.int64),
+        "average_points": np.round(cumulative[:, last] / np.maximum(games, 1), 2),
+        "best_gameweek": matrix.gameweeks[best],
+        "best_points": filled[rows, best].astype(np.int64),
+        "worst_gameweek": matrix.gameweeks[worst],
+        "worst_points": filled[rows, worst].astype(np.int64),
+        "form": np.round(form[:, last], 2),
+        "league_rank": ranks[:, last],
+        "rank_change": rank_change[:, last],
+        "allplay_wins": wins,
+        "allplay_draws": draws,
+        "allplay_losses": losses,
+    })
+
+    entry_idx, gw_idx = np.nonzero(played)
+    gameweeks = pd.DataFrame({
+        "entry_id": matrix.entries[entry_idx],
+        "gameweek": matrix.gameweeks[gw_idx],
+        "points": filled[entry_idx, gw_idx].astype(np.int64),
+        "cumulative_points": cumulative[entry_idx, gw_idx].astype(np.int64),
+        "league_rank": ranks[entry_idx, gw_idx],
+        "rank_change": rank_change[entry_idx, gw_idx],
+        "form": np.round(form[entry_idx, gw_idx], 2),
+    })
+    return gameweeks, season[games > 0].reset_index(drop=True)
+
+
+def season_frame(latest_df=None, league_id=None):
+    """Reads every processed gameweek of a classic league (the default league's if None),
+    overlaid with freshly loaded rows if given."""
+    league_id = league_id or league_registry.default_group()["classic"]
+    columns = ["entry", "manager_name", "event", "event_points"]
+    history = processed_store.read_table("classic_league", league_id, columns=columns)
+    if latest_df is not None and not latest_df.empty:
+        history = pd.concat([history, latest_df[columns]], ignore_index=True)
+    return history.drop_duplicates(subset=["entry", "event"], keep="last")
+
+
+def replace_table(conn, table_name, frame, league_id):
+    """Replaces one league's rows of a derived table; the caller commits."""
+    frame = frame.copy()
+    frame.insert(0, "league_id", league_id)
+    cur = conn.cursor()
+    db.execute(cur, f"DELETE FROM {table_name} WHERE league_id = %s;", (league_id,), label=f"delete:{table_name}")
+    buf = io.StringIO()
+    frame.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+    with db.timed(f"copy:{table_name}"):
+        cur.copy_expert(f"COPY {table_name} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+    cur.close()
+    db.rows_upserted.inc(len(frame), table=table_name)
+
+
+def summarised_gameweeks(conn, league_id):
+    """Gameweeks a league's rows in manager_gameweek_stats cover."""
+    with conn.cursor() as cur:
+        db.execute(cur, "SELECT DISTINCT gameweek FROM manager_gameweek_stats WHERE league_id = %s;",
+                   (league_id,), label="summarised_gameweeks")
+        return [row[0] for row in cur.fetchall()]
+
+
+def refresh(conn, history=None, league_id=None):
+    """Recomputes a classic league's season summary rows from ``history`` (its processed
+    season by default).
+
+    Readers see the old or the new rows, never a mix. The tables are left as they are if
+    ``history`` lacks a gameweek they already summarise (e.g. the processed store on this
+    machine is newer than the database), so a partial history never erases the season.
+    """
+    league_id = league_id or league_registry.default_group()["classic"]
+    history = season_frame(league_id=league_id) if history is None else history
+    if history.empty:
+        log.warning(f"⚠️ No processed classic data for league {league_id}; season stats not refreshed.")
+        return 0
+    try:
+        missing = sorted(set(summarised_gameweeks(conn, league_id)) - set(history["event"].astype(int)))
+        if missing:
+            log.warning(f"⚠️ Processed history of league {league_id} lacks gameweek(s) {missing} that the "
+                        "season stats already cover; season stats not refreshed. Rebuild the processed "
+                        "store (process_leagues.py --full) to refresh them.",
+                        extra={"league_id": league_id, "missing_gameweeks": missing})
+            conn.rollback()
+            return 0
+        with metrics.span("analytics", league_id=league_id, rows=len(history)):
+            gameweek_stats, season_stats = compute(SeasonMatrix.from_frame(history))
+        replace_table(conn, "manager_gameweek_stats", gameweek_stats, league_id)
+        replace_table(conn, "manager_season_stats", season_stats, league_id)
+        conn.commit()
+        log.info(f"📈 Season stats of league {league_id} refreshed ({len(season_stats)} managers, "
+                 f"{len(gameweek_stats)} gameweek rows).")
+        return len(season_stats)
+    except Exception as e:
+        log.error(f"❌ Error refreshing season stats: {e}")
+        conn.rollback()
+        return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute the season summary tables from the processed store.")
+    parser.parse_args()
+    metrics.setup_logging()
+    with db.connection() as conn:
+        if sum(refresh(conn, league_id=league_id) for league_id in league_registry.classic_ids()):
+            db.bump_data_version(conn)
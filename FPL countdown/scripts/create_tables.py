@@ -1,72 +1,46 @@
-import psycopg2
+import argparse
+import sys
 
-# Database connection parameters
-db_params = {
-    "host": "localhost",
-    "port": 5434,
-    "database": "fpl_data",
-    "user": "fpl_user",
-    "password": "H0grider?"
-}
+import db
+import migrations
 
-TABLE_QUERIES = {
-    "classic_league": """
-        DROP TABLE IF EXISTS classic_league;
-        CREATE TABLE classic_league (
-            position INT,
-            manager VARCHAR(100),
-            points INT,
-            gameweek INT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            CONSTRAINT classic_unique UNIQUE (position, gameweek)
-        );
-    """,
-    "h2h_league": """
-        DROP TABLE IF EXISTS h2h_league;
-        CREATE TABLE h2h_league (
-            position INT,
-            manager VARCHAR(100),
-            points INT,
-            gameweek INT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            CONSTRAINT h2h_unique UNIQUE (position, gameweek)
-        );
-    """,
-    "gameweek_winners": """
-        DROP TABLE IF EXISTS gameweek_winners;
-        CREATE TABLE gameweek_winners (
-            gameweek INT PRIMARY KEY,
-            winner VARCHAR(100),
-            points INT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-    """,
-    "fpl_deadline": """
-        DROP TABLE IF EXISTS fpl_deadline;
-        CREATE TABLE fpl_deadline (
-            gameweek INT PRIMARY KEY,
-            deadline TIMESTAMP
-        );
-    """
-}
+# Every table the migrations create, dropped by --reset
+TABLES = ["classic_league", "h2h_league", "gameweek_winners", "pipeline_runs", "fpl_deadline", "managers",
+          "manager_gameweeks", "manager_chips", "manager_picks", "manager_gameweek_stats", "manager_season_stats",
+          "live_standings", migrations.MIGRATIONS_TABLE]
 
-def create_tables():
-    try:
-        conn = psycopg2.connect(**db_params)
+def create_tables(reset=False):
+    """Brings the schema up to date and creates the partitions of every registered league.
+
+    Existing tables and data are kept; pending migrations are applied in order. With
+    ``reset``, every table is dropped first and the schema is built from scratch. A failed
+    migration is rolled back and its error raised.
+    """
+    with db.connection() as conn:
         cursor = conn.cursor()
         print("✅ Connected to the database!")
 
-        for table_name, query in TABLE_QUERIES.items():
-            cursor.execute(query)
-            print(f"✅ Table '{table_name}' dropped and recreated.")
+        if reset:
+            cursor.execute(f"DROP TABLE IF EXISTS {', '.join(TABLES)} CASCADE;")
+            conn.commit()
+            print(f"🗑️ Dropped {len(TABLES)} tables.")
+        applied = migrations.migrate(conn)
+        for version in applied:
+            print(f"✅ Migration {version} applied.")
+        for partition in migrations.create_partitions(cursor):
+            print(f"✅ Partition {partition} created.")
 
         conn.commit()
         cursor.close()
-        conn.close()
-        print("✅ All tables are ready!")
+    print(f"✅ All tables are ready! ({len(applied)} migration(s) applied)")
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or upgrade the FPL tables, indexes and views.")
+    parser.add_argument("--reset", action="store_true",
+                        help="drop every table first, losing all data, and rebuild the schema from scratch")
+    args = parser.parse_args()
+    try:
+        create_tables(reset=args.reset)
     except Exception as e:
         print("❌ Error:", e)
-
-if __name__ == "__main__":
-    create_tables()
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,236 @@
+import io
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import pool
+from psycopg2.extras import execute_values
+
+import metrics
+
+# -------------------------------
+# Database connection parameters
+# -------------------------------
+db_params = {
+    "host": os.environ.get("FPL_DB_HOST", "localhost"),
+    "port": int(os.environ.get("FPL_DB_PORT", 5434)),
+    "database": os.environ.get("FPL_DB_NAME", "fpl_data"),
+    "user": os.environ.get("FPL_DB_USER", "fpl_user"),
+    "password": os.environ.get("FPL_DB_PASSWORD", "H0grider?"),
+}
+
+# Pool size per process (each gunicorn worker gets its own pool)
+POOL_MIN = int(os.environ.get("FPL_DB_POOL_MIN", 1))
+POOL_MAX = int(os.environ.get("FPL_DB_POOL_MAX", 10))
+# Connections idle for longer than this are pinged before being handed out
+HEALTH_CHECK_AFTER = float(os.environ.get("FPL_DB_HEALTH_CHECK_AFTER", 30))
+
+# Rows per statement when bulk loading with execute_values
+BATCH_SIZE = 1000
+
+# NOTIFY channel announcing a new data version after each pipeline load
+DATA_VERSION_CHANNEL = "fpl_data_version"
+
+_pool = None
+_slots = None
+_last_used = {}
+_lock = threading.Lock()
+
+_query_stats = {}
+_stats_lock = threading.Lock()
+
+query_seconds = metrics.histogram("fpl_db_query_seconds", "Latency of database statements", ["query"])
+rows_upserted = metrics.counter("fpl_rows_upserted_total", "Rows inserted or updated by the loaders", ["table"])
+
+
+def init_pool(minconn=POOL_MIN, maxconn=POOL_MAX):
+    """Creates the process-wide connection pool, replacing any existing one."""
+    global _pool, _slots
+    with _lock:
+        if _pool is not None:
+            _pool.closeall()
+        _pool = pool.ThreadedConnectionPool(minconn, maxconn, **db_params)
+        _slots = threading.BoundedSemaphore(maxconn)
+        _last_used.clear()
+    return _pool
+
+
+def get_pool():
+    """Returns the process-wide connection pool, creating it on first use."""
+    if _pool is None:
+        init_pool()
+    return _pool
+
+
+def close_pool():
+    """Closes every pooled connection."""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _last_used.clear()
+
+
+def _healthy(conn):
+    if conn.closed:
+        return False
+    if time.monotonic() - _last_used.get(id(conn), 0) < HEALTH_CHECK_AFTER:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        return False
+
+
+def _checkout(pg_pool):
+    for _ in range(pg_pool.maxconn + 1):
+        conn = pg_pool.getconn()
+        if _healthy(conn):
+            return conn
+        pg_pool.putconn(conn, close=True)
+    raise psycopg2.OperationalError("No healthy database connection available")
+
+
+@contextmanager
+def connection():
+    """Checks a healthy connection out of the pool for the duration of a ``with`` block.
+
+    Blocks while all connections are in use. The transaction is rolled back if the block
+    raises; callers commit their own writes.
+    """
+    pg_pool = get_pool()
+    slots = _slots
+    slots.acquire()
+    conn = None
+    try:
+        conn = _checkout(pg_pool)
+        yield conn
+    except Exception:
+        if conn is not None and not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        if conn is not None:
+            _last_used[id(conn)] = time.monotonic()
+            pg_pool.putconn(conn, close=bool(conn.closed))
+        slots.release()
+
+
+@contextmanager
+def advisory_lock(key):
+    """Tries to take a session-level Postgres advisory lock on a dedicated connection.
+
+    Yields True if the lock was acquired (it is held until the block exits), False if
+    another session already holds it.
+    """
+    conn = psycopg2.connect(**db_params)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (key,))
+            acquired = cur.fetchone()[0]
+        yield acquired
+        if acquired:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (key,))
+    finally:
+        conn.close()
+
+
+# -------------------------------
+# Query timing
+# -------------------------------
+def record_query(label, seconds):
+    with _stats_lock:
+        stats = _query_stats.setdefault(label, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+        stats["count"] += 1
+        stats["total_s"] += seconds
+        stats["max_s"] = max(stats["max_s"], seconds)
+    query_seconds.observe(seconds, query=label)
+
+
+@contextmanager
+def timed(label):
+    """Records the latency of the statement(s) run inside a ``with`` block under ``label``."""
+    with metrics.span("db", query=label):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record_query(label, time.perf_counter() - start)
+
+
+def execute(cur, sql, params=None, label=None):
+    """Executes a statement on a cursor and records its latency under ``label``."""
+    with timed(label or sql.split(None, 1)[0].upper()):
+        cur.execute(sql, params)
+
+
+def fetchall(sql, params=None, label=None):
+    """Runs a read query on a pooled connection and returns all rows."""
+    with connection() as conn:
+        with conn.cursor() as cur:
+            execute(cur, sql, params, label)
+            rows = cur.fetchall()
+        conn.rollback()
+        return rows
+
+
+def fetchone(sql, params=None, label=None):
+    """Runs a read query on a pooled connection and returns the first row (or None)."""
+    with connection() as conn:
+        with conn.cursor() as cur:
+            execute(cur, sql, params, label)
+            row = cur.fetchone()
+        conn.rollback()
+        return row
+
+
+def query_stats():
+    """Returns a copy of the per-label query counters (count, total and max seconds)."""
+    with _stats_lock:
+        return {label: dict(stats) for label, stats in _query_stats.items()}
+
+
+# -------------------------------
+# Bulk loading
+# -------------------------------
+def dataframe_rows(df):
+    """Converts a DataFrame to a list of tuples of plain Python values (NaN becomes NULL)."""
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+def stage_rows(cur, staging, frame, method="copy"):
+    """Streams a DataFrame into a staging table with COPY FROM STDIN or batched execute_values."""
+    columns_str = ", ".join(frame.columns)
+    if method == "copy":
+        buf = io.StringIO()
+        frame.to_csv(buf, index=False, header=False)
+        buf.seek(0)
+        cur.copy_expert(f"COPY {staging} ({columns_str}) FROM STDIN WITH (FORMAT csv)", buf)
+    else:
+        execute_values(cur, f"INSERT INTO {staging} ({columns_str}) VALUES %s",
+                       dataframe_rows(frame), page_size=BATCH_SIZE)
+
+
+# -------------------------------
+# Data version
+# -------------------------------
+def bump_data_version(conn, rows_loaded=None):
+    """Records a finished pipeline run and notifies listeners of the new data version.
+
+    Commits the current transaction, so it should be called once the load itself is done.
+    """
+    with conn.cursor() as cur:
+        execute(cur, "INSERT INTO pipeline_runs (rows_loaded) VALUES (%s) RETURNING id;",
+                (rows_loaded,), label="bump_data_version")
+        version = cur.fetchone()[0]
+        cur.execute(f"NOTIFY {DATA_VERSION_CHANNEL}, %s;", (str(version),))
+    conn.commit()
+    return version
@@ -1,37 +1,207 @@
-import requests
+import argparse
 import json
-from datetime import datetime
+import logging
 import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import requests
+
+import fpl_api
+import league_registry
+import metrics
+import snapshot_store
+
+RAW_DIR = 'data/raw'
+# Digest of the last saved standings of each league, used to skip unchanged snapshots
+DIGESTS_PATH = f'{RAW_DIR}/digests.json'
+
+# Upper bound on concurrent requests against the FPL API
+MAX_WORKERS = 8
+# Number of standings pages requested ahead of the last page received for each league
+PAGE_WINDOW = 4
+
+log = logging.getLogger(__name__)
+
+
+def fetch_standings_page(league_id, league_type='classic', page=1, session=None):
+    """Fetches a single page of a league's standings."""
+    return fpl_api.get_json(
+        f'leagues-{league_type}/{league_id}/standings/',
+        params={'page_standings': page},
+        session=session,
+    )
+
+
+def merge_pages(pages):
+    """Merges standings pages (ordered by page number) into a single payload shaped like page 1."""
+    merged = dict(pages[0])
+    standings = dict(merged.get('standings', {}))
+    standings['results'] = [row for page in pages for row in page['standings']['results']]
+    standings['has_next'] = False
+    standings['page'] = 1
+    merged['standings'] = standings
+    return merged
+
+
+def fetch_all_leagues(league_list, max_workers=MAX_WORKERS, page_window=PAGE_WINDOW, session=None):
+    """Fetches every standings page of every league concurrently.
+
+    Pages are requested speculatively up to ``page_window`` ahead of the highest page
+    received for each league, so a league's pages download in parallel even though the
+    total page count is only discovered through ``has_next``. Returns a dict mapping
+    league id to the merged payload, or to the exception that stopped the league.
+    """
+    session = session or fpl_api.get_session()
+    state = {
+        league['id']: {'type': league['type'], 'pages': {}, 'next': 1, 'last': None, 'error': None}
+        for league in league_list
+    }
+    in_flight = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def submit(league_id, upto):
+            league = state[league_id]
+            while league['next'] <= upto and league['last'] is None and league['error'] is None:
+                page = league['next']
+                future = executor.submit(fetch_standings_page, league_id, league['type'], page, session)
+                in_flight[future] = (league_id, page)
+                league['next'] += 1
 
-# Ensure the data/raw folder exists
-os.makedirs('data/raw', exist_ok=True)
+        for league_id in state:
+            submit(league_id, page_window)
 
-# List of leagues with their type
-leagues = [
-    {"id": 1653859, "type": "classic"},  # Classic League
-    {"id": 1654002, "type": "h2h"}       # H2H League
-]
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                league_id, page = in_flight.pop(future)
+                league = state[league_id]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    league['error'] = league['error'] or e
+                    continue
 
-def fetch_league_standings(league_id, league_type='classic'):
-    url = f'https://fantasy.premierleague.com/api/leagues-{league_type}/{league_id}/standings/'
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
+                standings = data.get('standings', {})
+                league['pages'][page] = data
+                if not standings.get('has_next') or not standings.get('results'):
+                    if league['last'] is None or page < league['last']:
+                        league['last'] = page
+                else:
+                    submit(league_id, page + page_window)
 
-for league in leagues:
-    league_id = league['id']
-    league_type = league['type']
-    print(f'Fetching league {league_id} ({league_type})...')
+    results = {}
+    for league_id, league in state.items():
+        if league['error'] is not None:
+            results[league_id] = league['error']
+            continue
+        last = league['last']
+        pages = [league['pages'][p] for p in range(1, last + 1)]
+        # A trailing empty page carries no rows but still tells us where the league ends
+        if len(pages) > 1 and not pages[-1]['standings'].get('results'):
+            pages = pages[:-1]
+        results[league_id] = merge_pages(pages)
+    return results
 
+
+def fetch_league_standings(league_id, league_type='classic', session=None):
+    """Fetches all standings pages of a single league and returns the merged payload."""
+    result = fetch_all_leagues([{"id": league_id, "type": league_type}], session=session)[league_id]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def load_digests(path=DIGESTS_PATH):
+    """Loads a {league_id: standings digest} map."""
     try:
-        league_data = fetch_league_standings(league_id, league_type)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'data/raw/league_{league_id}_{timestamp}.json'
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_digests(digests, path=DIGESTS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(digests, f)
+    os.replace(path + '.tmp', path)
+
+
+def save_league(league_id, league_data, raw_dir=RAW_DIR):
+    """Writes a league payload to a timestamped raw JSON file and returns its path."""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f'{raw_dir}/league_{league_id}_{timestamp}.json'
+    with open(filename, 'w') as f:
+        json.dump(league_data, f, indent=4)
+    return filename
+
+
+def save_league_if_changed(league_id, league_data, digests, raw_dir=RAW_DIR):
+    """Saves a snapshot only if its standings differ from the last one saved for the league.
+
+    Updates ``digests`` in place and returns the new file's path, or None if unchanged.
+    """
+    digest = snapshot_store.standings_digest(league_data)
+    if digests.get(str(league_id)) == digest:
+        return None
+    digests[str(league_id)] = digest
+    return save_league(league_id, league_data, raw_dir)
+
+
+def main(raw_json=False, leagues=None):
+    """Fetches every registered league and appends changed standings to the snapshot store.
+
+    With ``raw_json`` the legacy pretty-printed files in data/raw are written instead.
+    """
+    leagues = leagues or league_registry.fpl_leagues()
+    for league in leagues:
+        log.debug(f'Fetching league {league["id"]} ({league["type"]})...')
+
+    results = fetch_all_leagues(leagues)
+    fetched_at = datetime.now()
+    if raw_json:
+        # Ensure the data/raw folder exists
+        os.makedirs(RAW_DIR, exist_ok=True)
+        digests = load_digests()
+    else:
+        store = snapshot_store.SnapshotStore()
+
+    for league in leagues:
+        league_id = league['id']
+        league_data = results[league_id]
+        if isinstance(league_data, requests.exceptions.RequestException):
+            log.error(f'❌ Failed to fetch league {league_id} ({league["type"]}): {league_data}')
+            continue
+        if isinstance(league_data, Exception):
+            raise league_data
+
+        if raw_json:
+            saved = save_league_if_changed(league_id, league_data, digests)
+        else:
+            snapshot_id = store.append(league_id, league_data, fetched_at)
+            saved = None if snapshot_id is None else f'snapshot {snapshot_id} in {store.root}/'
+        if saved is None:
+            log.info(f'⏭️ League {league_id} unchanged since the last snapshot, not saved.')
+            continue
+        log.info(f'✅ Saved: {saved} ({len(league_data["standings"]["results"])} entries)',
+                 extra={'league_id': league_id, 'entries': len(league_data['standings']['results'])})
+
+    if raw_json:
+        save_digests(digests)
+    else:
+        store.close()
 
-        with open(filename, 'w') as f:
-            json.dump(league_data, f, indent=4)
+    cache = fpl_api.get_cache()
+    if cache is not None:
+        summary = cache.summary()
+        log.info(f'📦 HTTP cache: {summary}', extra={'http_cache': summary})
 
-        print(f'✅ Saved: {filename}')
 
-    except requests.exceptions.HTTPError as e:
-        print(f'❌ Failed to fetch league {league_id} ({league_type}): {e}')
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch league standings snapshots.")
+    parser.add_argument('--raw-json', action='store_true',
+                        help="write pretty-printed JSON files to data/raw instead of the snapshot store")
+    args = parser.parse_args()
+    metrics.setup_logging()
+    main(raw_json=args.raw_json)
@@ -0,0 +1,120 @@
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import http_cache
+import metrics
+
+# Base URL of the FPL API. Override with FPL_API_BASE to point the pipeline at a local stub.
+API_BASE = os.environ.get("FPL_API_BASE", "https://fantasy.premierleague.com/api").rstrip("/")
+
+# Keep-alive connection pool size and retry policy shared by every request
+POOL_SIZE = 16
+RETRY_TOTAL = 5
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+TIMEOUT = 30
+
+# Set FPL_HTTP_CACHE=0 to bypass the on-disk response cache
+CACHE_ENABLED = os.environ.get("FPL_HTTP_CACHE", "1") != "0"
+
+# Numeric path segments (league, entry and gameweek ids) are folded into one endpoint label
+ID_SEGMENT_RE = re.compile(r"/\d+(?=/|$)")
+
+requests_total = metrics.counter("fpl_api_requests_total", "FPL API responses received", ["endpoint", "status"])
+response_bytes = metrics.counter("fpl_api_response_bytes_total", "Bytes of FPL API response bodies", ["endpoint"])
+
+_session = None
+_cache = None
+_session_lock = threading.Lock()
+
+
+def api_url(path):
+    """Builds a full FPL API URL from a path such as 'bootstrap-static/'."""
+    return f"{API_BASE}/{path.lstrip('/')}"
+
+
+def endpoint(url):
+    """The endpoint of a URL with its ids replaced, e.g. /api/entry/{id}/history/."""
+    return ID_SEGMENT_RE.sub("/{id}", urlsplit(url).path)
+
+
+def count_response(response, *args, **kwargs):
+    """Session response hook: counts every response from the network and its body size."""
+    path = endpoint(response.url)
+    requests_total.inc(endpoint=path, status=response.status_code)
+    response_bytes.inc(len(response.content), endpoint=path)
+
+
+def make_session(pool_size=POOL_SIZE):
+    """Creates a keep-alive session that retries 429/5xx responses with exponential backoff."""
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(count_response)
+    return session
+
+
+def get_session():
+    """Returns the process-wide shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = make_session()
+    return _session
+
+
+def get_cache():
+    """Returns the process-wide response cache, or None when FPL_HTTP_CACHE=0."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _session_lock:
+            if _cache is None:
+                _cache = http_cache.ResponseCache()
+    return _cache
+
+
+def get_json(path, params=None, session=None, use_cache=True):
+    """GETs an API path over the shared session and returns the decoded JSON.
+
+    Responses go through the shared on-disk cache, so unchanged payloads cost at most one
+    conditional round-trip. Callers must treat the returned objects as read-only.
+    """
+    session = session or get_session()
+    cache = get_cache() if use_cache else None
+    with metrics.span("fetch", path=path):
+        if cache is not None:
+            return cache.get_json(session, api_url(path), params=params, timeout=TIMEOUT)
+        response = session.get(api_url(path), params=params, timeout=TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+
+def collect_cache_stats():
+    if _cache is None:
+        return []
+    stats = _cache.summary()
+    return [
+        ("fpl_http_cache_lookups_total", "counter", "HTTP cache lookups by outcome",
+         [({"result": result}, stats[result]) for result in ("hits", "revalidated", "misses")]),
+        ("fpl_http_cache_bytes", "gauge", "Size of the cached response bodies", [({}, stats["bytes"])]),
+    ]
+
+
+metrics.register_collector(collect_cache_stats)
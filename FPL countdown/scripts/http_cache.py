@@ -0,0 +1,224 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+CACHE_DIR = 'data/cache/http'
+MAX_BYTES = 256 * 1024 * 1024
+# Body bytes whose decoded payloads are kept in memory (decoded JSON takes several times more)
+MAX_MEMORY_BYTES = 32 * 1024 * 1024
+# index.json is rewritten after this many changed entries, and once more at exit
+INDEX_FLUSH_EVERY = 200
+
+# Seconds a cached response is served without contacting the API, matched on URL substrings.
+# Anything not listed is revalidated with a conditional request on every use.
+DEFAULT_TTLS = [
+    ("bootstrap-static", 300),
+    ("/standings/", 60),
+    ("fixtures", 60),
+    # A gameweek's picks are locked at its deadline, and only started gameweeks are requested
+    ("/picks/", 7 * 24 * 60 * 60),
+]
+
+
+def cache_key(url, params=None):
+    """Returns the cache key for a URL and its query parameters."""
+    if params:
+        url = f"{url}?{urlencode(sorted(params.items()))}"
+    return hashlib.sha256(url.encode()).hexdigest(), url
+
+
+class ResponseCache:
+    """On-disk JSON response cache with TTLs, conditional revalidation and LRU eviction.
+
+    Response bodies are stored as ``<key>.json`` next to an ``index.json`` that holds the
+    validators (ETag/Last-Modified), store time and size of every entry. The index is written
+    every ``INDEX_FLUSH_EVERY`` changes and at exit rather than after every response. The most
+    recently used decoded payloads, up to ``memory_bytes`` of body, are also kept in memory so
+    a response that is still fresh, or that the server confirms with ``304 Not Modified``, is
+    returned without parsing the JSON again.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES, ttls=None, memory_bytes=MAX_MEMORY_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.RLock()
+        self._parsed = OrderedDict()
+        self._parsed_bytes = 0
+        self._index = OrderedDict()
+        self._unsaved = 0
+        self._load_index()
+        atexit.register(self.flush)
+
+    # -------------------------------
+    # Index bookkeeping
+    # -------------------------------
+    def _index_path(self):
+        return os.path.join(self.directory, 'index.json')
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, meta in sorted(entries.items(), key=lambda item: item[1].get('used_at', 0)):
+            if os.path.exists(self._body_path(key)):
+                self._index[key] = meta
+
+    def _save_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self._index_path() + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path())
+        self._unsaved = 0
+
+    def _changed(self):
+        self._unsaved += 1
+        if self._unsaved >= INDEX_FLUSH_EVERY:
+            self._save_index()
+
+    def flush(self):
+        """Writes the index if any entry changed since it was last written."""
+        with self._lock:
+            if self._unsaved:
+                self._save_index()
+
+    def _evict(self):
+        total = sum(meta['size'] for meta in self._index.values())
+        while total > self.max_bytes and len(self._index) > 1:
+            key, meta = self._index.popitem(last=False)
+            self._forget(key)
+            total -= meta['size']
+            self.stats['evictions'] += 1
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+
+    def ttl_for(self, url):
+        """Returns the freshness lifetime in seconds configured for a URL."""
+        for pattern, ttl in self.ttls:
+            if pattern in url:
+                return ttl
+        return 0
+
+    def _remember(self, key, payload):
+        """Keeps a decoded payload in memory, dropping the least recently used ones over memory_bytes."""
+        self._forget(key)
+        size = self._index[key]['size']
+        self._parsed[key] = (payload, size)
+        self._parsed_bytes += size
+        while self._parsed_bytes > self.memory_bytes and len(self._parsed) > 1:
+            _, (_, dropped) = self._parsed.popitem(last=False)
+            self._parsed_bytes -= dropped
+        return payload
+
+    def _forget(self, key):
+        entry = self._parsed.pop(key, None)
+        if entry is not None:
+            self._parsed_bytes -= entry[1]
+
+    def _payload(self, key):
+        if key in self._parsed:
+            self._parsed.move_to_end(key)
+            return self._parsed[key][0]
+        with open(self._body_path(key), 'rb') as f:
+            return self._remember(key, json.loads(f.read()))
+
+    def _store(self, key, url, response):
+        body = response.content
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._body_path(key), 'wb') as f:
+            f.write(body)
+        now = time.time()
+        self._index[key] = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': now,
+            'used_at': now,
+            'size': len(body),
+        }
+        self._index.move_to_end(key)
+        payload = self._remember(key, response.json())
+        self._evict()
+        self._changed()
+        return payload
+
+    # -------------------------------
+    # Public API
+    # -------------------------------
+    def get_json(self, session, url, params=None, timeout=None):
+        """Returns the decoded JSON for a URL, using the cache whenever the server allows it."""
+        key, full_url = cache_key(url, params)
+        with self._lock:
+            meta = self._index.get(key)
+            now = time.time()
+            if meta is not None and now - meta['stored_at'] < self.ttl_for(full_url):
+                self.stats['hits'] += 1
+                meta['used_at'] = now
+                self._index.move_to_end(key)
+                return self._payload(key)
+
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            # Only the origin's own date: one made up from the local clock could match content that changed
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = session.get(url, params=params, headers=headers, timeout=timeout)
+        if response.status_code == 304 and key not in self._index:
+            # Evicted by another thread while the conditional request was in flight
+            response = session.get(url, params=params, timeout=timeout)
+        with self._lock:
+            if response.status_code == 304 and key in self._index:
+                self.stats['revalidated'] += 1
+                meta = self._index[key]
+                meta['stored_at'] = meta['used_at'] = time.time()
+                meta['etag'] = response.headers.get('ETag', meta.get('etag'))
+                meta['last_modified'] = response.headers.get('Last-Modified', meta.get('last_modified'))
+                self._index.move_to_end(key)
+                self._changed()
+                return self._payload(key)
+
+            response.raise_for_status()
+            self.stats['misses'] += 1
+            return self._store(key, full_url, response)
+
+    def clear(self):
+        """Removes every cached response."""
+        with self._lock:
+            for key in list(self._index):
+                try:
+                    os.remove(self._body_path(key))
+                except OSError:
+                    pass
+            self._index.clear()
+            self._parsed.clear()
+            self._parsed_bytes = 0
+            self._save_index()
+
+    def summary(self):
+        """Returns the hit/miss counters along with the current cache size."""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['revalidated'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self._index),
+                'bytes': sum(meta['size'] for meta in self._index.values()),
+                'hit_rate': (self.stats['hits'] + self.stats['revalidated']) / lookups if lookups else 0.0,
+            }
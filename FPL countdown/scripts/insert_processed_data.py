@@ -1,199 +1,103 @@
-import pandas as pd
-import psycopg2
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from psycopg2.extras import execute_values
 from datetime import datetime
-import requests
 import os
 
-# -------------------------------
-# Database connection parameters
-# -------------------------------
-db_params = {
-    "host": "localhost",
-    "port": 5434,
-    "database": "fpl_data",
-    "user": "fpl_user",
-    "password": "H0grider?"
-}
+import analytics
+import db
+import fpl_api
+import league_registry
+import metrics
+import migrations
+import processed_store
+import winners
+
+# Leagues loaded at the same time, each on its own pooled connection
+LOAD_WORKERS = int(os.environ.get("FPL_LOAD_WORKERS", 4))
+
+log = logging.getLogger(__name__)
 
 # -------------------------------
 # Functions
 # -------------------------------
 
-def connect_db():
-    try:
-        conn = psycopg2.connect(**db_params)
-        print("✅ Connected to the database!")
-        return conn
-    except Exception as e:
-        print("❌ Connection failed:", e)
-        return None
+def insert_dataframe(df, table_name, conn, mapping, gameweek=None, method="copy", *, league_id):
+    """Bulk upsert DataFrame rows of one league into a league table with column mapping.
+
+    Rows are streamed into a temporary staging table (COPY by default, or execute_values with
+    method="values") and merged into the target with a single INSERT ... ON CONFLICT. When several
+    rows share a (league_id, gameweek, entry_id) key, the last one wins, as with row-by-row upserts.
+    Rows whose position, manager and points are unchanged are not rewritten, and rows of the loaded
+    gameweeks that are no longer in the standings are deleted, so each (league, gameweek)
+    partition ends up matching the DataFrame. Returns the number of rows inserted, updated or deleted.
 
-def insert_dataframe(df, table_name, conn, mapping, gameweek=None):
-    """Insert DataFrame rows into the database table with column mapping and upsert logic."""
+    ``gameweek`` may only be omitted if ``mapping`` maps a column of the rows to it. Errors are
+    raised after the transaction is rolled back.
+    """
+    if league_id is None:
+        raise ValueError(f"{table_name}: league_id is required")
+    if gameweek is None and "gameweek" not in mapping.values():
+        raise ValueError(f"{table_name}: gameweek is required unless the rows carry it")
     if df.empty:
-        print(f"⚠️ Skipping {table_name}: DataFrame is empty.")
-        return
-        
-    try:
-        cur = conn.cursor()
-        for _, row in df.iterrows():
-            columns = []
-            values = []
-            for src_col, dest_col in mapping.items():
-                if src_col in row:
-                    columns.append(dest_col)
-                    values.append(row[src_col])
-            if gameweek:
-                columns.append("gameweek")
-                values.append(gameweek)
-            
-            placeholders = ", ".join(["%s"] * len(values))
-            columns_str = ", ".join(columns)
-            
-            upsert_query = f"""
-                INSERT INTO {table_name} ({columns_str})
-                VALUES ({placeholders})
-                ON CONFLICT (position, gameweek) DO UPDATE SET
-                manager = EXCLUDED.manager,
-                points = EXCLUDED.points,
-                updated_at = CURRENT_TIMESTAMP;
-            """
-            cur.execute(upsert_query, values)
-        conn.commit()
-        cur.close()
-        print(f"✅ {table_name} data inserted/updated.")
-    except Exception as e:
-        print(f"❌ Error inserting into {table_name}: {e}")
-        conn.rollback()
+        log.warning(f"⚠️ Skipping {table_name}: DataFrame is empty.")
+        return 0
 
-def insert_gameweek_winner(classic_df, conn):
-    """Insert the winner of the most recently finished gameweek."""
-    if classic_df.empty:
-        print("❌ DataFrame is empty. Skipping gameweek winner insertion.")
-        return
-        
     try:
         cur = conn.cursor()
-        
-        # Debug: Print the DataFrame columns and sample data
-        print("🔍 DEBUG INFO:")
-        print(f"   DataFrame columns: {list(classic_df.columns)}")
-        print(f"   DataFrame shape: {classic_df.shape}")
-        
-        if not classic_df.empty:
-            print("   Sample data (first row):")
-            for col in classic_df.columns:
-                print(f"     {col}: {classic_df.iloc[0][col]}")
-        
-        # Try to get gameweek number from different possible columns
-        gameweek_number = None
-        possible_gw_columns = ['event', 'gameweek', 'current_event', 'gw']
-        
-        for col in possible_gw_columns:
-            if col in classic_df.columns and not classic_df[col].isna().all():
-                gameweek_number = int(classic_df[col].iloc[0])
-                print(f"   Found gameweek number {gameweek_number} in column '{col}'")
-                break
-        
-        if gameweek_number is None or gameweek_number <= 0:
-            print("⚠️ No valid gameweek number found. Trying to get current gameweek from FPL API...")
-            # Try to get current gameweek from FPL API
-            try:
-                response = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/")
-                if response.status_code == 200:
-                    data = response.json()
-                    events = data.get('events', [])
-                    for event in events:
-                        if event.get('is_current', False) or (event.get('finished', False) and not event.get('data_checked', False)):
-                            gameweek_number = event['id']
-                            print(f"   Got current gameweek {gameweek_number} from FPL API")
-                            break
-                    
-                    if gameweek_number is None:
-                        # Get the latest finished gameweek
-                        finished_events = [e for e in events if e.get('finished', False)]
-                        if finished_events:
-                            gameweek_number = max(finished_events, key=lambda x: x['id'])['id']
-                            print(f"   Got latest finished gameweek {gameweek_number} from FPL API")
-            except Exception as api_error:
-                print(f"   ❌ Failed to get gameweek from API: {api_error}")
-                gameweek_number = 1  # Default fallback
-                print(f"   Using fallback gameweek: {gameweek_number}")
-        
-        # Find the winner (rank/position = 1)
-        winner_row = None
-        possible_rank_columns = ['rank', 'position', 'pos']
-        
-        for col in possible_rank_columns:
-            if col in classic_df.columns:
-                winner_rows = classic_df[classic_df[col] == 1]
-                if not winner_rows.empty:
-                    winner_row = winner_rows.iloc[0]
-                    print(f"   Found winner using column '{col}'")
-                    break
-        
-        if winner_row is None:
-            # If no rank column, assume first row is the winner (already sorted)
-            winner_row = classic_df.iloc[0]
-            print("   No rank column found, using first row as winner")
-        
-        # Get winner name from possible columns
-        winner_name = None
-        possible_name_columns = ['manager_name', 'player_name', 'name', 'manager', 'entry_name']
-        
-        for col in possible_name_columns:
-            if col in winner_row.index and pd.notna(winner_row[col]):
-                winner_name = str(winner_row[col]).strip()
-                print(f"   Found winner name '{winner_name}' in column '{col}'")
-                break
-        
-        # Get winner points from possible columns
-        winner_points = None
-        possible_points_columns = ['event_total', 'event_points', 'points', 'total_points', 'gw_points']
-        
-        for col in possible_points_columns:
-            if col in winner_row.index and pd.notna(winner_row[col]):
-                try:
-                    winner_points = int(float(winner_row[col]))
-                    print(f"   Found winner points {winner_points} in column '{col}'")
-                    break
-                except (ValueError, TypeError):
-                    continue
-        
-        # Insert winner if we have valid data
-        if gameweek_number and gameweek_number > 0 and winner_name:
-            if winner_points is None:
-                winner_points = 0  # Default if no points found
-            
-            print(f"🏆 Inserting gameweek winner: GW{gameweek_number} - {winner_name} ({winner_points} points)")
-            
-            cur.execute("""
-                INSERT INTO gameweek_winners (gameweek, winner, points)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (gameweek) DO UPDATE SET
-                    winner = EXCLUDED.winner,
-                    points = EXCLUDED.points
-            """, (gameweek_number, winner_name, winner_points))
-            conn.commit()
-            print("✅ Gameweek winner updated successfully.")
-        else:
-            print(f"❌ Missing required data for gameweek winner:")
-            print(f"   Gameweek: {gameweek_number}")
-            print(f"   Winner name: {winner_name}")
-            print(f"   Winner points: {winner_points}")
-        
+        frame = df[[src_col for src_col in mapping if src_col in df.columns]].rename(columns=mapping)
+        if gameweek is not None:
+            frame["gameweek"] = gameweek
+        frame["league_id"] = league_id
+        columns_str = ", ".join(frame.columns)
+        staging = f"{table_name}_staging"
+
+        db.execute(cur, f"""
+            CREATE TEMP TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS, load_order BIGSERIAL)
+            ON COMMIT DROP;
+        """, label=f"create_staging:{table_name}")
+        with db.timed(f"stage:{table_name}"):
+            db.stage_rows(cur, staging, frame, method)
+        db.execute(cur, f"""
+            INSERT INTO {table_name} ({columns_str})
+            SELECT DISTINCT ON (league_id, gameweek, entry_id) {columns_str}
+            FROM {staging}
+            ORDER BY league_id, gameweek, entry_id, load_order DESC
+            ON CONFLICT (league_id, gameweek, entry_id) DO UPDATE SET
+            position = EXCLUDED.position,
+            manager = EXCLUDED.manager,
+            points = EXCLUDED.points,
+            updated_at = CURRENT_TIMESTAMP
+            WHERE ({table_name}.position, {table_name}.manager, {table_name}.points)
+                IS DISTINCT FROM (EXCLUDED.position, EXCLUDED.manager, EXCLUDED.points);
+        """, label=f"upsert:{table_name}")
+        changed = cur.rowcount
+        # One statement per gameweek, with its league and gameweek as constants, so each
+        # only scans the partition it rebuilds
+        for key_league, key_gameweek in frame[["league_id", "gameweek"]].drop_duplicates().itertuples(index=False):
+            db.execute(cur, f"""
+                DELETE FROM {table_name} t
+                WHERE t.league_id = %s AND t.gameweek = %s
+                  AND NOT EXISTS (SELECT 1 FROM {staging} s WHERE s.league_id = t.league_id
+                                  AND s.gameweek = t.gameweek AND s.entry_id = t.entry_id);
+            """, (int(key_league), int(key_gameweek)), label=f"delete_departed:{table_name}")
+            changed += cur.rowcount
+        conn.commit()
         cur.close()
+        db.rows_upserted.inc(changed, table=table_name)
+        log.info(f"✅ {table_name} {league_id} data inserted/updated ({changed} of {len(frame)} rows changed).",
+                 extra={"table": table_name, "league_id": league_id, "rows": len(frame), "changed": changed})
+        return changed
     except Exception as e:
-        print(f"❌ Error inserting gameweek winner: {e}")
-        print(f"   Exception details: {type(e).__name__}: {str(e)}")
+        log.error(f"❌ Error inserting into {table_name}: {e}")
         conn.rollback()
+        raise
 
 def fetch_fpl_deadlines():
     """Fetch FPL deadlines from API."""
     try:
-        r = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/")
-        r.raise_for_status()
-        events = r.json().get("events", [])
+        events = fpl_api.get_json("bootstrap-static/").get("events", [])
         deadlines = []
         for event in events:
             if not event["finished"]:
@@ -203,96 +107,196 @@ def fetch_fpl_deadlines():
                 })
         return deadlines
     except Exception as e:
-        print("❌ Error fetching FPL deadlines:", e)
+        log.error(f"❌ Error fetching FPL deadlines: {e}")
         return []
 
 def insert_deadlines(deadlines, conn):
-    """Inserts or updates FPL deadlines in the database."""
+    """Inserts or updates FPL deadlines in the database. Returns the number of rows changed."""
+    if not deadlines:
+        return 0
     try:
         cur = conn.cursor()
-        for d in deadlines:
-            cur.execute("""
+        # A season has at most 38 deadlines, so this is a single statement and rowcount covers it
+        with db.timed("upsert:fpl_deadline"):
+            execute_values(cur, """
                 INSERT INTO fpl_deadline (gameweek, deadline)
-                VALUES (%s, %s)
+                VALUES %s
                 ON CONFLICT (gameweek) DO UPDATE SET deadline = EXCLUDED.deadline
-            """, (d["gameweek"], d["deadline"]))
+                WHERE fpl_deadline.deadline IS DISTINCT FROM EXCLUDED.deadline
+            """, [(d["gameweek"], d["deadline"]) for d in deadlines], page_size=db.BATCH_SIZE)
+        changed = cur.rowcount
         conn.commit()
         cur.close()
-        print("✅ FPL deadlines updated.")
+        db.rows_upserted.inc(changed, table="fpl_deadline")
+        log.info(f"✅ FPL deadlines updated ({changed} changed).")
+        return changed
     except Exception as e:
-        print(f"❌ Error updating deadlines: {e}")
+        log.error(f"❌ Error updating deadlines: {e}")
         conn.rollback()
+        return 0
 
 # -------------------------------
 # Main
 # -------------------------------
-def main():
-    conn = connect_db()
-    if not conn:
+def main(reload_gameweeks=False, gameweeks=None):
+    try:
+        with db.connection() as conn:
+            log.info("✅ Connected to the database!")
+            if reload_gameweeks:
+                reload(conn, gameweeks=gameweeks)
+            else:
+                load(conn)
+    except Exception as e:
+        log.error(f"❌ Error in main: {e}")
+
+# Define column mappings
+CLASSIC_MAPPING = {
+    "entry": "entry_id",
+    "manager_name": "manager",
+    "total_points": "points",
+    "rank": "position"
+}
+H2H_MAPPING = {
+    "entry": "entry_id",
+    "player_name": "manager",
+    "points": "points",
+    "rank": "position"
+}
+
+# Columns each league type is loaded from, and where it goes
+LOAD_COLUMNS = {
+    "classic": ["manager_name", "entry", "total_points", "rank", "event_points", "event"],
+    "h2h": ["player_name", "entry", "points", "rank", "event"],
+}
+LOAD_TABLES = {
+    "classic": ("classic_league", CLASSIC_MAPPING),
+    "h2h": ("h2h_league", H2H_MAPPING),
+}
+
+def load(conn, league_list=None):
+    league_list = league_list or league_registry.fpl_leagues()
+    frames = []
+    for league in league_list:
+        # Read only the league's latest gameweek partition and the columns the loader needs
+        df = processed_store.read_latest(LOAD_TABLES[league["type"]][0], league["id"],
+                                         columns=LOAD_COLUMNS[league["type"]])
+        if df.empty:
+            log.warning(f"⚠️ No processed data for {league['type']} league {league['id']}.")
+            continue
+        log.debug(f"📊 Loaded {len(df)} {league['type']} entries of league {league['id']}")
+        frames.append((league, df))
+
+    if not frames:
+        log.error(f"❌ No processed data found in {processed_store.STORE_DIR}. "
+                  "Please run process_leagues.py first to build the processed store.")
         return
 
+    load_frames(conn, frames)
+
+def load_league(conn, league, df):
+    """Loads one league's latest gameweek; for a classic league also its winners and season stats.
+
+    Returns the number of rows changed.
+    """
+    table_name, mapping = LOAD_TABLES[league["type"]]
+    # Determine gameweek from the rows being loaded
+    gameweek = int(df["event"].iloc[0])
+    log.debug(f"🎯 Processing {league['type']} league {league['id']} for gameweek: {gameweek}")
+
+    with conn.cursor() as cur:
+        migrations.ensure_partition(cur, table_name, league["id"], gameweek)
+    conn.commit()
+    changed = insert_dataframe(df, table_name, conn, mapping, gameweek, league_id=league["id"])
+    if league["type"] != "classic":
+        return changed
+
+    # Recompute the winners of every gameweek in the season, ties included
+    season_df = analytics.season_frame(df, league["id"])
+    changed += winners.upsert_winners(winners.compute_winners(season_df), conn, league["id"])
+
+    # Precompute the season aggregates the dashboard reads
+    if changed:
+        analytics.refresh(conn, season_df, league["id"])
+    return changed
+
+def reload(conn, league_list=None, gameweeks=None):
+    """Rebuilds the given gameweeks (every processed gameweek by default) of each league from
+    the processed store, then each classic league's winners and season stats.
+
+    Each gameweek is loaded into its own partition, so the partitions of other gameweeks are
+    not touched. Returns the number of rows changed.
+    """
+    league_list = league_list or league_registry.fpl_leagues()
+    changed = 0
+    for league in league_list:
+        table_name, mapping = LOAD_TABLES[league["type"]]
+        events = [event for _, event, _ in processed_store.list_partitions(table_name, league["id"])
+                  if gameweeks is None or event in gameweeks]
+        for event in events:
+            df = processed_store.read_table(table_name, league["id"], [event], columns=LOAD_COLUMNS[league["type"]])
+            with conn.cursor() as cur:
+                migrations.ensure_partition(cur, table_name, league["id"], event)
+            conn.commit()
+            changed += insert_dataframe(df, table_name, conn, mapping, event, league_id=league["id"])
+        if league["type"] == "classic" and events:
+            season_df = analytics.season_frame(league_id=league["id"])
+            changed += winners.upsert_winners(winners.compute_winners(season_df), conn, league["id"])
+            analytics.refresh(conn, season_df, league["id"])
+        log.info(f"🔁 Reloaded {len(events)} gameweek(s) of {league['type']} league {league['id']}.",
+                 extra={"league_id": league["id"], "gameweeks": events})
+
+    if changed:
+        version = db.bump_data_version(conn, changed)
+        log.info(f"🔖 Data version bumped to {version}", extra={"version": version})
+    return changed
+
+def load_league_pooled(league, df):
+    """Loads one league on a pooled connection; returns the rows changed, or the exception that stopped it."""
     try:
-        # Check if CSV files exist
-        classic_csv_path = "data/processed/classic_league.csv"
-        h2h_csv_path = "data/processed/h2h_league.csv"
-        
-        if not os.path.exists(classic_csv_path):
-            print(f"❌ File not found: {classic_csv_path}")
-            print("Please run process_leagues.py first to generate the CSV files.")
-            conn.close()
-            return
-            
-        if not os.path.exists(h2h_csv_path):
-            print(f"❌ File not found: {h2h_csv_path}")
-            print("Please run process_leagues.py first to generate the CSV files.")
-            conn.close()
-            return
-
-        # Read the CSV files
-        classic_df = pd.read_csv(classic_csv_path)
-        h2h_df = pd.read_csv(h2h_csv_path)
-        
-        print(f"📊 Loaded {len(classic_df)} classic league entries")
-        print(f"🤝 Loaded {len(h2h_df)} H2H league entries")
-
-        # Determine gameweek - try multiple sources
-        gameweek = None
-        if "event" in classic_df.columns and not classic_df['event'].empty:
-            gameweek = classic_df["event"].iloc[0]
-        elif "gameweek" in classic_df.columns and not classic_df['gameweek'].empty:
-            gameweek = classic_df["gameweek"].iloc[0]
-
-        print(f"🎯 Processing data for gameweek: {gameweek}")
-
-        # Define column mappings
-        classic_mapping = {
-            "manager_name": "manager",
-            "total_points": "points",
-            "rank": "position"
-        }
-        h2h_mapping = {
-            "player_name": "manager",
-            "points": "points",
-            "rank": "position"
-        }
-
-        # Insert the data
-        insert_dataframe(classic_df, "classic_league", conn, classic_mapping, gameweek)
-        insert_dataframe(h2h_df, "h2h_league", conn, h2h_mapping, gameweek)
-
-        # Insert gameweek winner
-        insert_gameweek_winner(classic_df, conn)
-
-        # Update deadlines
+        with metrics.span("load_league", league_id=league["id"], league_type=league["type"]) as fields, \
+                db.connection() as conn:
+            fields["changed"] = changed = load_league(conn, league, df)
+        return changed
+    except Exception as e:
+        log.error(f"❌ Error loading {league['type']} league {league['id']}: {e}")
+        return e
+
+def load_frames(conn, frames, deadlines=None, max_workers=None):
+    """Loads the latest gameweek of every league in ``frames`` ((league, DataFrame) pairs) and the deadlines.
+
+    Leagues are loaded concurrently, each in its own transaction on a pooled connection.
+    Deadlines are fetched from the API when not given. The data version is bumped once, and
+    only if some row actually changed. Returns the number of rows changed and a dict mapping
+    the id of every league that failed to load to its exception.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or LOAD_WORKERS) as executor:
+        futures = [(league, executor.submit(load_league_pooled, league, df)) for league, df in frames if not df.empty]
+        results = {league["id"]: future.result() for league, future in futures}
+    failed = {league_id: result for league_id, result in results.items() if isinstance(result, Exception)}
+    changed = sum(result for result in results.values() if not isinstance(result, Exception))
+
+    # Update deadlines
+    if deadlines is None:
         deadlines = fetch_fpl_deadlines()
-        insert_deadlines(deadlines, conn)
+    changed += insert_deadlines(deadlines, conn)
 
-        conn.close()
-        print("✅ All operations completed!")
+    # Let the web app know there is new data to show
+    if changed:
+        version = db.bump_data_version(conn, changed)
+        log.info(f"🔖 Data version bumped to {version}", extra={"version": version})
+    else:
+        log.info("⏭️ No rows changed; data version left as is.")
 
-    except Exception as e:
-        print(f"❌ Error in main: {e}")
-        conn.close()
+    if failed:
+        log.error(f"❌ {len(failed)} league(s) failed to load: {sorted(failed)}", extra={"failed": sorted(failed)})
+    log.info(f"✅ All operations completed! ({changed} rows changed)", extra={"changed": changed})
+    return changed, failed
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load the processed store into the database.")
+    parser.add_argument("--reload", action="store_true",
+                        help="rebuild past gameweeks from the processed store, not just the latest")
+    parser.add_argument("--gameweeks", type=int, nargs="+", help="with --reload, only these gameweeks")
+    args = parser.parse_args()
+    metrics.setup_logging()
+    main(reload_gameweeks=args.reload, gameweeks=args.gameweeks)
@@ -0,0 +1,90 @@
+import json
+import os
+import re
+
+# The registry of tracked leagues. Each entry is one competition page: a classic league, an
+# optional H2H league and what the page shows about them (members, links, last season's winner).
+REGISTRY_PATH = os.environ.get(
+    "FPL_LEAGUES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "leagues.json"))
+
+LEAGUE_TYPES = ("classic", "h2h")
+SLUG_RE = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+
+_registry = None
+
+
+def parse(config):
+    """Validates a registry document and returns (default slug, {slug: league group})."""
+    groups = {}
+    for entry in config.get("leagues", []):
+        slug = entry.get("slug", "")
+        if not SLUG_RE.match(slug):
+            raise ValueError(f"Invalid league slug {slug!r}: use lowercase letters, digits and dashes")
+        if slug in groups:
+            raise ValueError(f"Duplicate league slug {slug!r}")
+        if not isinstance(entry.get("classic"), int):
+            raise ValueError(f"League {slug!r} needs a numeric classic league id")
+        if entry.get("h2h") is not None and not isinstance(entry["h2h"], int):
+            raise ValueError(f"League {slug!r} has a non-numeric h2h league id")
+        groups[slug] = {
+            "slug": slug,
+            "name": entry.get("name", slug),
+            "season": entry.get("season", ""),
+            "classic": entry["classic"],
+            "h2h": entry.get("h2h"),
+            "previous_winner": entry.get("previous_winner"),
+            "links": entry.get("links", []),
+            "members": entry.get("members", []),
+        }
+    if not groups:
+        raise ValueError("The league registry is empty")
+    default = config.get("default") or next(iter(groups))
+    if default not in groups:
+        raise ValueError(f"Default league {default!r} is not registered")
+    return default, groups
+
+
+def load(path=None):
+    """Reads the registry file; later calls reuse it until ``reload``."""
+    global _registry
+    if _registry is None or path is not None:
+        with open(path or REGISTRY_PATH, "r") as f:
+            _registry = parse(json.load(f))
+    return _registry
+
+
+def reload(path=None):
+    global _registry
+    _registry = None
+    return load(path)
+
+
+def groups():
+    """Every registered league group, in registry order."""
+    return list(load()[1].values())
+
+
+def group(slug=None):
+    """The league group with this slug (the default one if None), or None if unknown."""
+    default, registered = load()
+    return registered.get(slug or default)
+
+
+def default_group():
+    return group()
+
+
+def fpl_leagues(league_groups=None):
+    """Every FPL league to fetch, as {"id", "type"} dicts, each league once."""
+    leagues, seen = [], set()
+    for entry in league_groups or groups():
+        for league_type in LEAGUE_TYPES:
+            league_id = entry.get(league_type)
+            if league_id is not None and (league_id, league_type) not in seen:
+                seen.add((league_id, league_type))
+                leagues.append({"id": league_id, "type": league_type})
+    return leagues
+
+
+def classic_ids(league_groups=None):
+    return [league["id"] for league in fpl_leagues(league_groups) if league["type"] == "classic"]
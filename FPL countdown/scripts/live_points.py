@@ -0,0 +1,231 @@
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import db
+import fetch_leagues
+import fpl_api
+import league_registry
+import manager_history
+import metrics
+
+# Squad slots: 0 is the starting goalkeeper, 1-10 outfield starters, 11 the bench goalkeeper
+# and 12-14 the outfield bench in substitution order
+SQUAD_SIZE = 15
+STARTERS = 11
+BENCH_GOALKEEPER = 11
+OUTFIELD_BENCH = (12, 13, 14)
+
+# element_type -> minimum number of starters an auto-sub must leave (DEF, MID, FWD)
+FORMATION_MINIMUMS = {2: 3, 3: 2, 4: 1}
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------------
+# Fetching
+# -------------------------------
+def current_gameweek(bootstrap):
+    current = next((event for event in bootstrap["events"] if event.get("is_current")), None)
+    return current["id"] if current else None
+
+
+def fetch_cached_picks(entry_id, gameweek, session=None):
+    """Picks of a started gameweek never change, so they come from the HTTP cache after the first fetch."""
+    return fpl_api.get_json(f"entry/{entry_id}/event/{gameweek}/picks/", session=session)
+
+
+def element_arrays(bootstrap, live, fixtures):
+    """Per-element lookup arrays indexed by element id: live points, minutes, position and
+    whether the element's fixtures are over (a team without a fixture counts as over)."""
+    size = max(element["id"] for element in bootstrap["elements"]) + 1
+    points = np.zeros(size, dtype=np.int64)
+    minutes = np.zeros(size, dtype=np.int64)
+    element_type = np.zeros(size, dtype=np.int64)
+    team = np.zeros(size, dtype=np.int64)
+    for element in bootstrap["elements"]:
+        element_type[element["id"]] = element["element_type"]
+        team[element["id"]] = element["team"]
+    for element in live["elements"]:
+        if element["id"] < size:
+            points[element["id"]] = element["stats"]["total_points"]
+            minutes[element["id"]] = element["stats"]["minutes"]
+
+    team_done = np.ones(team.max() + 1, dtype=bool)
+    for fixture in fixtures:
+        done = fixture.get("finished") or fixture.get("finished_provisional")
+        for side in ("team_h", "team_a"):
+            team_done[fixture[side]] &= bool(done)
+    return points, minutes, element_type, team_done[team]
+
+
+def pick_matrix(picks_by_entry, entries):
+    """Stacks every manager's picks into (managers x 15) arrays in squad order."""
+    count = len(entries)
+    elements = np.zeros((count, SQUAD_SIZE), dtype=np.int64)
+    multipliers = np.zeros((count, SQUAD_SIZE), dtype=np.int64)
+    captain = np.zeros(count, dtype=np.int64)
+    vice = np.zeros(count, dtype=np.int64)
+    bench_boost = np.zeros(count, dtype=bool)
+    transfer_cost = np.zeros(count, dtype=np.int64)
+    for i, entry_id in enumerate(entries):
+        picks = picks_by_entry[entry_id]
+        for slot, pick in enumerate(sorted(picks["picks"], key=lambda p: p["position"])[:SQUAD_SIZE]):
+            elements[i, slot] = pick["element"]
+            multipliers[i, slot] = pick["multiplier"]
+            if pick["is_captain"]:
+                captain[i] = slot
+            if pick["is_vice_captain"]:
+                vice[i] = slot
+        bench_boost[i] = picks.get("active_chip") == "bboost"
+        transfer_cost[i] = (picks.get("entry_history") or {}).get("event_transfers_cost", 0)
+    return elements, multipliers, captain, vice, bench_boost, transfer_cost
+
+
+# -------------------------------
+# Scoring
+# -------------------------------
+def score(elements, multipliers, captain, vice, bench_boost, points, minutes, element_type, fixtures_done):
+    """Provisional gameweek points of every manager at once.
+
+    A starter who got no minutes in a fixture that is over is replaced by the first bench
+    player (in bench order) who played and keeps a valid formation; the goalkeeper can only be
+    replaced by the bench goalkeeper. No substitutions are made under Bench Boost. If the
+    captain did not play, the vice-captain gets the captain's multiplier. Every step is an
+    array operation over all managers; only the 15 squad slots are looped over.
+    Returns (points, active) where active marks the slots that scored.
+    """
+    rows = np.arange(len(elements))
+    pts = points[elements]
+    played = minutes[elements] > 0
+    kind = element_type[elements]
+    absent = ~played & fixtures_done[elements]
+
+    active = np.zeros(elements.shape, dtype=bool)
+    active[:, :STARTERS] = True
+    active[bench_boost] = True
+    can_sub = ~bench_boost
+
+    swap = can_sub & absent[:, 0] & played[:, BENCH_GOALKEEPER]
+    active[swap, 0] = False
+    active[swap, BENCH_GOALKEEPER] = True
+
+    counts = {t: ((kind == t) & active).sum(axis=1) for t in FORMATION_MINIMUMS}
+    for bench in OUTFIELD_BENCH:
+        available = can_sub & played[:, bench]
+        for starter in range(1, STARTERS):
+            swap = available & active[:, starter] & absent[:, starter]
+            for t, minimum in FORMATION_MINIMUMS.items():
+                after = counts[t] - (kind[:, starter] == t) + (kind[:, bench] == t)
+                swap &= after >= minimum
+            active[swap, starter] = False
+            active[swap, bench] = True
+            for t in counts:
+                counts[t] = counts[t] - (swap & (kind[:, starter] == t)) + (swap & (kind[:, bench] == t))
+            available &= ~swap
+
+    effective = np.where(active, np.maximum(multipliers, 1), 0)
+    captain_out = absent[rows, captain] & played[rows, vice]
+    effective[rows[captain_out], vice[captain_out]] = multipliers[rows[captain_out], captain[captain_out]]
+    effective[rows[captain_out], captain[captain_out]] = 0
+    return (pts * effective).sum(axis=1), active
+
+
+def live_table(standings, picks_by_entry, bootstrap, live, fixtures):
+    """Provisional points, totals and projected rank of every manager in a classic league."""
+    rows = [row for row in standings["standings"]["results"] if row["entry"] in picks_by_entry]
+    entries = [row["entry"] for row in rows]
+    elements, multipliers, captain, vice, bench_boost, transfer_cost = pick_matrix(picks_by_entry, entries)
+    with metrics.span("score", managers=len(entries)):
+        gameweek_points, _ = score(elements, multipliers, captain, vice, bench_boost,
+                                   *element_arrays(bootstrap, live, fixtures))
+    gameweek_points = gameweek_points - transfer_cost
+    # The standings' total and event total lag together, so their difference is the pre-gameweek total
+    before = np.array([row["total"] - row["event_total"] for row in rows], dtype=np.int64)
+    totals = before + gameweek_points
+    return pd.DataFrame({
+        "entry_id": entries,
+        "manager": [row["player_name"] for row in rows],
+        "gameweek": current_gameweek(bootstrap),
+        "live_points": gameweek_points,
+        "live_total": totals,
+        "live_rank": analytics.league_ranks(totals[:, None])[:, 0],
+        "official_rank": [row["rank"] for row in rows],
+    }).sort_values(["live_rank", "manager"]).reset_index(drop=True)
+
+
+def live_inputs(gameweek=None):
+    """Fetches what every league's estimate shares: bootstrap-static, the gameweek's live
+    element data and its fixtures. Returns None when no gameweek is in progress."""
+    bootstrap = fpl_api.get_json("bootstrap-static/")
+    gameweek = gameweek or current_gameweek(bootstrap)
+    if gameweek is None:
+        return None
+    live = fpl_api.get_json(f"event/{gameweek}/live/", use_cache=False)
+    fixtures = fpl_api.get_json("fixtures/", params={"event": gameweek})
+    return bootstrap, gameweek, live, fixtures
+
+
+def estimate(league_id=None, gameweek=None, max_workers=None, inputs=None):
+    """Fetches the live data once for the whole league and scores every manager.
+
+    Requests: bootstrap-static, fixtures and event/{gw}/live once each (unless ``inputs`` from
+    ``live_inputs`` are passed in), plus each manager's picks the first time they are needed in
+    a gameweek. Returns the live table, or None when no gameweek is in progress.
+    """
+    league_id = league_id or league_registry.default_group()["classic"]
+    inputs = inputs or live_inputs(gameweek)
+    if inputs is None:
+        return None
+    bootstrap, gameweek, live, fixtures = inputs
+    standings = fetch_leagues.fetch_all_leagues([{"id": league_id, "type": "classic"}])[league_id]
+    if isinstance(standings, Exception):
+        raise standings
+
+    session = fpl_api.get_session()
+    tasks = [(row["entry"], fetch_cached_picks, (row["entry"], gameweek, session))
+             for row in standings["standings"]["results"]]
+    picks = dict(manager_history.run_bounded(tasks, max_workers or manager_history.MAX_WORKERS, "picks of entry"))
+    return live_table(standings, picks, bootstrap, live, fixtures)
+
+
+def publish(conn, table, league_id):
+    """Replaces a league's live standings. Returns True if they were written."""
+    try:
+        analytics.replace_table(conn, "live_standings", table, league_id)
+        conn.commit()
+    except Exception as e:
+        log.error(f"❌ Error publishing live standings of league {league_id}: {e}")
+        conn.rollback()
+        return False
+    leader = table.iloc[0]
+    log.info(f"📡 Live standings of league {league_id} published for {len(table)} managers; "
+             f"leader {leader['manager']} on {leader['live_total']} ({leader['live_points']} this gameweek).")
+    return True
+
+
+def main(gameweek=None):
+    """Estimates every registered classic league and tells the web app there is new data."""
+    inputs = live_inputs(gameweek)
+    if inputs is None:
+        log.info("⏭️ No gameweek in progress; nothing to estimate.")
+        return
+    published = 0
+    with db.connection() as conn:
+        for league_id in league_registry.classic_ids():
+            table = estimate(league_id, inputs=inputs)
+            if table is not None and not table.empty and publish(conn, table, league_id):
+                published += len(table)
+        if published:
+            db.bump_data_version(conn, published)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate live gameweek points for every classic league.")
+    parser.add_argument("--gameweek", type=int, help="gameweek to score (default: the current one)")
+    args = parser.parse_args()
+    metrics.setup_logging()
+    main(gameweek=args.gameweek)
@@ -0,0 +1,204 @@
+import argparse
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import db
+import fetch_leagues
+import fpl_api
+import league_registry
+import metrics
+
+# Concurrent requests to the entry endpoints; the API rate-limits aggressive clients
+MAX_WORKERS = int(os.environ.get("FPL_HISTORY_WORKERS", 8))
+# Upper bound on entry/picks requests per run; anything left over is fetched on the next run
+MAX_REQUESTS = int(os.environ.get("FPL_HISTORY_MAX_REQUESTS", 5000))
+
+log = logging.getLogger(__name__)
+
+# Target table -> (columns, primary key)
+TABLES = {
+    "managers": (["entry_id", "player_name", "team_name"], ["entry_id"]),
+    "manager_gameweeks": (["entry_id", "gameweek", "points", "total_points", "gameweek_rank", "overall_rank",
+                           "bench_points", "transfers", "transfers_cost", "bank", "team_value"],
+                          ["entry_id", "gameweek"]),
+    "manager_chips": (["entry_id", "gameweek", "chip", "played_at"], ["entry_id", "gameweek", "chip"]),
+    "manager_picks": (["entry_id", "gameweek", "element", "position", "multiplier", "is_captain", "is_vice_captain"],
+                      ["entry_id", "gameweek", "position"]),
+}
+
+
+# -------------------------------
+# Fetching
+# -------------------------------
+def league_members(payloads):
+    """Collects {entry id: (player name, team name)} from fetched league standings."""
+    members = {}
+    for payload in payloads.values():
+        if isinstance(payload, Exception):
+            continue
+        for row in payload.get("standings", {}).get("results", []):
+            members[row["entry"]] = (row.get("player_name"), row.get("entry_name"))
+    return members
+
+
+def last_finished_gameweek():
+    """The latest gameweek whose points are final; later ones are still changing."""
+    events = fpl_api.get_json("bootstrap-static/")["events"]
+    finished = [event["id"] for event in events if event.get("finished")]
+    return max(finished, default=0)
+
+
+def fetch_history(entry_id, session=None):
+    return fpl_api.get_json(f"entry/{entry_id}/history/", session=session, use_cache=False)
+
+
+def fetch_picks(entry_id, gameweek, session=None):
+    return fpl_api.get_json(f"entry/{entry_id}/event/{gameweek}/picks/", session=session, use_cache=False)
+
+
+def gameweek_rows(entry_id, history, upto):
+    return [(entry_id, row["event"], row["points"], row["total_points"], row.get("rank"), row.get("overall_rank"),
+             row.get("points_on_bench"), row.get("event_transfers"), row.get("event_transfers_cost"),
+             row.get("bank"), row.get("value"))
+            for row in history.get("current", []) if row["event"] <= upto]
+
+
+def chip_rows(entry_id, history, upto):
+    return [(entry_id, chip["event"], chip["name"], chip.get("time"))
+            for chip in history.get("chips", []) if chip["event"] <= upto]
+
+
+def pick_rows(entry_id, gameweek, picks):
+    return [(entry_id, gameweek, pick["element"], pick["position"], pick["multiplier"],
+             pick["is_captain"], pick["is_vice_captain"]) for pick in picks.get("picks", [])]
+
+
+def run_bounded(tasks, max_workers, label):
+    """Runs (key, fn, args) tasks on a bounded pool; yields (key, result) and reports failures."""
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fn, *args): key for key, fn, args in tasks}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                failed += 1
+                if failed <= 3:
+                    log.error(f"❌ Failed to fetch {label} {futures[future]}: {e}")
+    if failed > 3:
+        log.error(f"❌ ... {failed} {label} requests failed in total.")
+
+
+def collect(members, target_gameweek, stored_gameweeks, stored_picks,
+            max_workers=MAX_WORKERS, max_requests=MAX_REQUESTS, session=None):
+    """Fetches the history and picks that are missing for the league members.
+
+    ``stored_gameweeks`` and ``stored_picks`` are the (entry id, gameweek) pairs already loaded.
+    Only entries whose stored history stops before ``target_gameweek`` get a history request,
+    and only (entry, gameweek) pairs without stored picks get a picks request, newest gameweek
+    first. At most ``max_requests`` requests are made. Returns a dict of row lists per table
+    and the number of requests left for a later run.
+    """
+    session = session or fpl_api.get_session()
+    latest = {}
+    for entry_id, gameweek in stored_gameweeks:
+        latest[entry_id] = max(latest.get(entry_id, 0), gameweek)
+    rows = {table: [] for table in TABLES}
+    rows["managers"] = [(entry_id, *names) for entry_id, names in members.items()]
+
+    stale = [entry_id for entry_id in members if latest.get(entry_id, 0) < target_gameweek]
+    budget = max_requests
+    history_tasks = [(entry_id, fetch_history, (entry_id, session)) for entry_id in stale[:budget]]
+    budget -= len(history_tasks)
+    known = {pair for pair in stored_gameweeks if pair[0] in members}
+    for entry_id, history in run_bounded(history_tasks, max_workers, "history of entry"):
+        gameweeks = gameweek_rows(entry_id, history, target_gameweek)
+        rows["manager_gameweeks"].extend(gameweeks)
+        rows["manager_chips"].extend(chip_rows(entry_id, history, target_gameweek))
+        known.update((entry_id, row[1]) for row in gameweeks)
+
+    missing = sorted(known - set(stored_picks), key=lambda pair: (-pair[1], pair[0]))
+    picks_tasks = [(pair, fetch_picks, (*pair, session)) for pair in missing[:budget]]
+    for (entry_id, gameweek), picks in run_bounded(picks_tasks, max_workers, "picks of"):
+        rows["manager_picks"].extend(pick_rows(entry_id, gameweek, picks))
+
+    deferred = len(stale) - len(history_tasks) + len(missing) - len(picks_tasks)
+    return rows, deferred
+
+
+# -------------------------------
+# Loading
+# -------------------------------
+def stored_pairs(conn, table_name):
+    cur = conn.cursor()
+    cur.execute(f"SELECT DISTINCT entry_id, gameweek FROM {table_name}")
+    pairs = set(cur.fetchall())
+    cur.close()
+    return pairs
+
+
+def upsert_rows(conn, table_name, rows):
+    """Bulk upserts rows into one of the history tables through a staging table."""
+    if not rows:
+        return 0
+    import pandas as pd  # only the loader needs it; fetching does not
+
+    columns, key = TABLES[table_name]
+    frame = pd.DataFrame(rows, columns=columns).drop_duplicates(subset=key, keep="last")
+    updates = [c for c in columns if c not in key]
+    columns_str = ", ".join(columns)
+    try:
+        cur = conn.cursor()
+        staging = f"{table_name}_staging"
+        db.execute(cur, f"CREATE TEMP TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP;",
+                   label=f"create_staging:{table_name}")
+        with db.timed(f"stage:{table_name}"):
+            db.stage_rows(cur, staging, frame)
+        db.execute(cur, f"""
+            INSERT INTO {table_name} ({columns_str})
+            SELECT {columns_str} FROM {staging}
+            ON CONFLICT ({', '.join(key)}) DO UPDATE SET
+            {', '.join(f'{c} = EXCLUDED.{c}' for c in updates)}
+            WHERE ({', '.join(f'{table_name}.{c}' for c in updates)})
+                IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in updates)});
+        """, label=f"upsert:{table_name}")
+        changed = cur.rowcount
+        conn.commit()
+        cur.close()
+        db.rows_upserted.inc(changed, table=table_name)
+        log.info(f"✅ {table_name} data inserted/updated ({changed} of {len(frame)} rows changed).")
+        return changed
+    except Exception as e:
+        log.error(f"❌ Error inserting into {table_name}: {e}")
+        conn.rollback()
+        return 0
+
+
+def main(league_list=None, max_workers=MAX_WORKERS, max_requests=MAX_REQUESTS):
+    league_list = league_list or league_registry.fpl_leagues()
+    members = league_members(fetch_leagues.fetch_all_leagues(league_list))
+    target = last_finished_gameweek()
+    log.info(f"👥 {len(members)} managers, history up to gameweek {target}.")
+
+    with db.connection() as conn:
+        start = datetime.now()
+        rows, deferred = collect(members, target, stored_pairs(conn, "manager_gameweeks"),
+                                 stored_pairs(conn, "manager_picks"), max_workers, max_requests)
+        log.info(f"🌐 Fetched in {(datetime.now() - start).total_seconds():.1f}s"
+                 + (f"; {deferred} requests deferred to the next run." if deferred else "."),
+                 extra={"deferred": deferred})
+        changed = sum(upsert_rows(conn, table_name, rows[table_name]) for table_name in TABLES)
+        if changed:
+            db.bump_data_version(conn, changed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch per-gameweek history and picks of every league member.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="concurrent API requests")
+    parser.add_argument("--max-requests", type=int, default=MAX_REQUESTS,
+                        help="request budget for this run; the rest is picked up next time")
+    args = parser.parse_args()
+    metrics.setup_logging()
+    main(max_workers=args.workers, max_requests=args.max_requests)
@@ -0,0 +1,268 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Log level and format of every script and the web app: json (the default) writes one object
+# per line with the record's fields, FPL_LOG_FORMAT=text the message followed by its fields
+LOG_LEVEL = os.environ.get("FPL_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("FPL_LOG_FORMAT", "json")
+# Libraries whose debug output would drown the pipeline's own
+QUIET_LOGGERS = ("urllib3",)
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Attributes every LogRecord has; anything else on a record came in through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+log = logging.getLogger("fpl.span")
+
+
+# -------------------------------
+# Logging
+# -------------------------------
+def record_fields(record):
+    """The fields a record was logged with through ``extra``."""
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object: time, level, logger, message and its extra fields."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+            **record_fields(record),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Formats a record as its message followed by its extra fields as key=value pairs."""
+
+    def format(self, record):
+        fields = record_fields(record)
+        line = record.getMessage()
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def setup_logging(level=LOG_LEVEL, fmt=LOG_FORMAT, stream=None):
+    """Sends every log record at ``level`` and above to stderr, as JSON or as plain messages."""
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(root.level, logging.WARNING))
+
+
+# -------------------------------
+# Metrics
+# -------------------------------
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _format_labels(self.labelnames, key), value)
+                    for key, value in sorted(self._values.items())]
+
+    def snapshot(self):
+        with self._lock:
+            return {",".join(key) or "total": value for key, value in self._values.items()}
+
+
+class Histogram:
+    """Observations bucketed by upper bound, with their count and sum, per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label key -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += 1
+            counts[-1] += value
+
+    def samples(self):
+        rows = []
+        with self._lock:
+            values = sorted((key, list(counts)) for key, counts in self._values.items())
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                rows.append((f"{self.name}_bucket", _format_labels(self.labelnames, key, [("le", repr(bound))]),
+                             cumulative))
+            rows.append((f"{self.name}_bucket", _format_labels(self.labelnames, key, [("le", "+Inf")]), counts[-2]))
+            rows.append((f"{self.name}_count", _format_labels(self.labelnames, key), counts[-2]))
+            rows.append((f"{self.name}_sum", _format_labels(self.labelnames, key), counts[-1]))
+        return rows
+
+    def snapshot(self):
+        with self._lock:
+            return {",".join(key) or "total": {"count": counts[-2], "sum": round(counts[-1], 6)}
+                    for key, counts in self._values.items()}
+
+
+class Registry:
+    """Every metric of the process, plus collectors that report existing stats at scrape time."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def register_collector(self, collect):
+        """``collect()`` returns (name, kind, help, [(labels dict, value)]) tuples."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self):
+        """The Prometheus text exposition of every metric and collector."""
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+            collectors = list(self._collectors)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {value}" for name, labels, value in metric.samples())
+        for collect in collectors:
+            try:
+                families = list(collect())
+            except Exception:
+                logging.getLogger(__name__).exception("Metrics collector failed")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    labelnames = tuple(labels)
+                    key = tuple(str(labels[label]) for label in labelnames)
+                    lines.append(f"{name}{_format_labels(labelnames, key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Every metric's current values as a dict, for a summary log line."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help, labelnames=()):
+    """Returns the process-wide counter ``name``, creating it on first use."""
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def histogram(name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Returns the process-wide histogram ``name``, creating it on first use."""
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+def register_collector(collect):
+    REGISTRY.register_collector(collect)
+
+
+def render():
+    return REGISTRY.render()
+
+
+def snapshot():
+    return REGISTRY.snapshot()
+
+
+# -------------------------------
+# Timing spans
+# -------------------------------
+span_seconds = histogram("fpl_span_seconds", "Duration of timed operations", ["span"])
+span_errors = counter("fpl_span_errors_total", "Timed operations that raised", ["span"])
+
+
+@contextmanager
+def span(name, level=logging.DEBUG, **fields):
+    """Times a block into ``fpl_span_seconds{span=name}`` and logs it with ``fields``.
+
+    Yields the fields dict, so the block can add what it only learns while running (e.g. the
+    number of rows). Field names must not clash with LogRecord attributes such as ``name``.
+    """
+    start = time.perf_counter()
+    try:
+        yield fields
+    except Exception as e:
+        span_errors.inc(span=name)
+        fields["error"] = repr(e)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        span_seconds.observe(seconds, span=name)
+        if log.isEnabledFor(level):
+            log.log(level, name, extra={"span": name, "duration_ms": round(seconds * 1000, 3), **fields})
@@ -0,0 +1,442 @@
+import argparse
+import logging
+
+import db
+import league_registry
+import metrics
+
+log = logging.getLogger(__name__)
+
+# Applied migrations are recorded here, one row per version
+MIGRATIONS_TABLE = "schema_migrations"
+# Transaction-level advisory lock held while a migration runs, so two processes never apply
+# the same one
+MIGRATION_LOCK_KEY = 0x46504D  # "FPM"
+
+# Standings tables are list-partitioned by league, and each league's partition by gameweek,
+# so reads and reloads of one gameweek only touch that gameweek's rows
+PARTITIONED_TABLES = {"classic": "classic_league", "h2h": "h2h_league"}
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """Registers ``fn(cursor)`` as forward migration ``version``. Migrations run in version
+    order, each in its own transaction, and must be safe to run against a database that
+    already has (some of) their changes."""
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+# -------------------------------
+# Partitions
+# -------------------------------
+def league_partition(table_name, league_id):
+    return f"{table_name}_{int(league_id)}"
+
+
+def gameweek_partition(table_name, league_id, gameweek):
+    return f"{table_name}_{int(league_id)}_gw{int(gameweek)}"
+
+
+def _create_if_missing(cursor, partition, query):
+    # Checked first so that loads of an existing partition never take the lock that attaching
+    # a partition needs on its parent
+    db.execute(cursor, "SELECT to_regclass(%s)", (partition,), label="ensure_partition")
+    if cursor.fetchone()[0] is None:
+        cursor.execute(query)
+        return True
+    return False
+
+
+def ensure_partition(cursor, table_name, league_id, gameweek=None):
+    """Creates a league's partition of a standings table, and its gameweek's partition if
+    ``gameweek`` is given, unless they already exist. Returns True if anything was created."""
+    parent = league_partition(table_name, league_id)
+    created = _create_if_missing(cursor, parent, f"""
+        CREATE TABLE {parent} PARTITION OF {table_name}
+            FOR VALUES IN ({int(league_id)}) PARTITION BY LIST (gameweek);
+    """)
+    if gameweek is not None:
+        partition = gameweek_partition(table_name, league_id, gameweek)
+        created |= _create_if_missing(cursor, partition,
+                                      f"CREATE TABLE {partition} PARTITION OF {parent} FOR VALUES IN ({int(gameweek)});")
+    return created
+
+
+def create_partitions(cursor, leagues=None):
+    """Creates the league partitions of every registered league. Returns the names created."""
+    created = []
+    for league in leagues or league_registry.fpl_leagues():
+        table_name = PARTITIONED_TABLES[league["type"]]
+        if ensure_partition(cursor, table_name, league["id"]):
+            created.append(league_partition(table_name, league["id"]))
+    return created
+
+
+# -------------------------------
+# Single-league schema
+# -------------------------------
+# Tables of the schema from before multi-league support that had no league_id, and their
+# primary key once they have one
+SINGLE_LEAGUE_KEYS = {
+    "gameweek_winners": ["league_id", "gameweek"],
+    "manager_gameweek_stats": ["league_id", "entry_id", "gameweek"],
+    "manager_season_stats": ["league_id", "entry_id"],
+    "live_standings": ["league_id", "entry_id"],
+}
+# Their indexes that the baseline recreates with a leading league_id
+SINGLE_LEAGUE_INDEXES = {"manager_season_stats": ["manager_season_stats_form_idx"]}
+
+
+def has_column(cur, table, column):
+    cur.execute("SELECT 1 FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attname = %s AND NOT attisdropped",
+                (table, column))
+    return cur.fetchone() is not None
+
+
+def single_league(cur, table):
+    """True if ``table`` exists but predates league ids."""
+    cur.execute("SELECT to_regclass(%s)", (table,))
+    return cur.fetchone()[0] is not None and not has_column(cur, table, "league_id")
+
+
+def adopt_single_league_tables(cur):
+    """Gives the tables of a single-league database (no league_id) the key the baseline builds on.
+
+    Every row belongs to the league the app tracked then, the default group's, so league_id
+    is backfilled with its ids. Standings tables cannot be partitioned in place: their rows
+    are set aside in temp tables and the tables dropped, for restore_standings to copy back
+    once the baseline has created them. Returns the (table, league id) pairs set aside.
+    """
+    group = league_registry.default_group()
+    for table, key in SINGLE_LEAGUE_KEYS.items():
+        if not single_league(cur, table):
+            continue
+        for index in SINGLE_LEAGUE_INDEXES.get(table, []):
+            cur.execute(f"DROP INDEX IF EXISTS {index};")
+        cur.execute(f"""
+            ALTER TABLE {table} ADD COLUMN league_id INT;
+            UPDATE {table} SET league_id = %s;
+            ALTER TABLE {table} ALTER COLUMN league_id SET NOT NULL;
+            ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_pkey;
+            ALTER TABLE {table} ADD PRIMARY KEY ({', '.join(key)});
+        """, (group["classic"],))
+        log.info(f"🔀 {table} adopted into league {group['classic']}.", extra={"table": table})
+
+    set_aside = []
+    for kind, table in PARTITIONED_TABLES.items():
+        if not single_league(cur, table):
+            continue
+        # CASCADE also drops the single-league latest_*_standings view; the baseline recreates it
+        cur.execute(f"""
+            CREATE TEMP TABLE {table}_single ON COMMIT DROP AS SELECT * FROM {table};
+            DROP TABLE {table} CASCADE;
+        """)
+        set_aside.append((table, group[kind]))
+    return set_aside
+
+
+def restore_standings(cur, set_aside):
+    """Copies the standings set aside by adopt_single_league_tables into the partitioned tables."""
+    for table, league_id in set_aside:
+        cur.execute(f"SELECT DISTINCT COALESCE(gameweek, 0) FROM {table}_single ORDER BY 1")
+        for (gameweek,) in cur.fetchall():
+            ensure_partition(cur, table, league_id, gameweek)
+        cur.execute(f"""
+            INSERT INTO {table} (league_id, position, manager, points, gameweek, updated_at)
+            SELECT %s, position, manager, points, COALESCE(gameweek, 0), updated_at FROM {table}_single;
+        """, (league_id,))
+        log.info(f"🔀 {table} adopted into league {league_id} ({cur.rowcount} rows copied).",
+                 extra={"table": table, "rows": cur.rowcount})
+
+
+# -------------------------------
+# Migrations
+# -------------------------------
+@migration(1, "baseline")
+def baseline(cur):
+    """Every table as create_tables.py used to create it, for new databases. Existing ones are
+    adopted as they are, once tables from before multi-league support have a league_id."""
+    set_aside = adopt_single_league_tables(cur)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS classic_league (
+            league_id INT NOT NULL,
+            position INT,
+            manager VARCHAR(100),
+            points INT,
+            gameweek INT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT classic_unique UNIQUE (league_id, position, gameweek)
+        ) PARTITION BY LIST (league_id);
+        CREATE TABLE IF NOT EXISTS classic_league_default PARTITION OF classic_league DEFAULT;
+
+        CREATE TABLE IF NOT EXISTS h2h_league (
+            league_id INT NOT NULL,
+            position INT,
+            manager VARCHAR(100),
+            points INT,
+            gameweek INT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT h2h_unique UNIQUE (league_id, position, gameweek)
+        ) PARTITION BY LIST (league_id);
+        CREATE TABLE IF NOT EXISTS h2h_league_default PARTITION OF h2h_league DEFAULT;
+
+        CREATE TABLE IF NOT EXISTS gameweek_winners (
+            league_id INT,
+            gameweek INT,
+            winner TEXT,
+            points INT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (league_id, gameweek)
+        );
+        -- Tied winners are stored as one joined name, which can outgrow the old VARCHAR(100)
+        ALTER TABLE gameweek_winners ALTER COLUMN winner TYPE TEXT;
+
+        CREATE TABLE IF NOT EXISTS pipeline_runs (
+            id SERIAL PRIMARY KEY,
+            rows_loaded INT,
+            finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS fpl_deadline (
+            gameweek INT PRIMARY KEY,
+            deadline TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS managers (
+            entry_id INT PRIMARY KEY,
+            player_name VARCHAR(100),
+            team_name VARCHAR(100),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS manager_gameweeks (
+            entry_id INT REFERENCES managers (entry_id) ON DELETE CASCADE,
+            gameweek INT,
+            points INT,
+            total_points INT,
+            gameweek_rank INT,
+            overall_rank INT,
+            bench_points INT,
+            transfers INT,
+            transfers_cost INT,
+            bank INT,
+            team_value INT,
+            PRIMARY KEY (entry_id, gameweek)
+        );
+
+        CREATE TABLE IF NOT EXISTS manager_chips (
+            entry_id INT REFERENCES managers (entry_id) ON DELETE CASCADE,
+            gameweek INT,
+            chip VARCHAR(20),
+            played_at TIMESTAMP,
+            PRIMARY KEY (entry_id, gameweek, chip)
+        );
+
+        CREATE TABLE IF NOT EXISTS manager_picks (
+            entry_id INT REFERENCES managers (entry_id) ON DELETE CASCADE,
+            gameweek INT,
+            element INT,
+            position INT,
+            multiplier INT,
+            is_captain BOOLEAN,
+            is_vice_captain BOOLEAN,
+            PRIMARY KEY (entry_id, gameweek, position)
+        );
+
+        CREATE TABLE IF NOT EXISTS manager_gameweek_stats (
+            league_id INT,
+            entry_id INT,
+            gameweek INT,
+            points INT,
+            cumulative_points INT,
+            league_rank INT,
+            rank_change INT,
+            form REAL,
+            PRIMARY KEY (league_id, entry_id, gameweek)
+        );
+
+        CREATE TABLE IF NOT EXISTS manager_season_stats (
+            league_id INT,
+            entry_id INT,
+            manager VARCHAR(100),
+            gameweeks_played INT,
+            total_points INT,
+            average_points REAL,
+            best_gameweek INT,
+            best_points INT,
+            worst_gameweek INT,
+            worst_points INT,
+            form REAL,
+            league_rank INT,
+            rank_change INT,
+            allplay_wins INT,
+            allplay_draws INT,
+            allplay_losses INT,
+            PRIMARY KEY (league_id, entry_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS live_standings (
+            league_id INT,
+            entry_id INT,
+            manager VARCHAR(100),
+            gameweek INT,
+            live_points INT,
+            live_total INT,
+            live_rank INT,
+            official_rank INT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (league_id, entry_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS classic_league_gameweek_idx
+            ON classic_league (league_id, gameweek DESC, position) INCLUDE (manager, points);
+        CREATE INDEX IF NOT EXISTS h2h_league_gameweek_idx
+            ON h2h_league (league_id, gameweek DESC, position) INCLUDE (manager, points);
+        CREATE INDEX IF NOT EXISTS manager_gameweeks_gameweek_idx
+            ON manager_gameweeks (gameweek, points DESC) INCLUDE (entry_id);
+        CREATE INDEX IF NOT EXISTS manager_season_stats_form_idx
+            ON manager_season_stats (league_id, form DESC NULLS LAST);
+
+        CREATE OR REPLACE VIEW latest_classic_standings AS
+            SELECT c.position, c.manager, c.points, c.gameweek, c.league_id
+            FROM classic_league c
+            WHERE c.gameweek = (SELECT MAX(gameweek) FROM classic_league l WHERE l.league_id = c.league_id);
+        CREATE OR REPLACE VIEW latest_h2h_standings AS
+            SELECT h.position, h.manager, h.points, h.gameweek, h.league_id
+            FROM h2h_league h
+            WHERE h.gameweek = (SELECT MAX(gameweek) FROM h2h_league l WHERE l.league_id = h.league_id);
+    """)
+    restore_standings(cur, set_aside)
+
+
+STANDINGS_BY_GAMEWEEK = """
+    CREATE TABLE {table} (
+        league_id INT NOT NULL,
+        gameweek INT NOT NULL,
+        entry_id INT NOT NULL,
+        position INT,
+        manager VARCHAR(100),
+        points INT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (league_id, gameweek, entry_id)
+    ) PARTITION BY LIST (league_id);
+    CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;
+    CREATE INDEX {table}_gameweek_idx
+        ON {table} (league_id, gameweek DESC, position, entry_id) INCLUDE (manager, points);
+    CREATE VIEW latest_{kind}_standings AS
+        SELECT s.position, s.manager, s.points, s.gameweek, s.league_id, s.entry_id
+        FROM {table} s
+        WHERE s.gameweek = (SELECT MAX(gameweek) FROM {table} l WHERE l.league_id = s.league_id);
+"""
+
+
+@migration(2, "standings_by_gameweek")
+def standings_by_gameweek(cur):
+    """Keys standings rows by manager (entry_id) instead of position, which tied managers
+    share, and partitions each league's standings by gameweek.
+
+    Existing rows are copied over. They were stored without an entry id, so each gets a
+    negative placeholder (minus its order in the gameweek) until that gameweek is reloaded
+    from the processed store.
+    """
+    for kind, table in PARTITIONED_TABLES.items():
+        if has_column(cur, table, "entry_id"):
+            continue
+        cur.execute(f"""
+            CREATE TEMP TABLE {table}_legacy ON COMMIT DROP AS
+                SELECT league_id, COALESCE(gameweek, 0) AS gameweek, position, manager, points, updated_at,
+                       -ROW_NUMBER() OVER (PARTITION BY league_id, gameweek ORDER BY position, manager) AS entry_id
+                FROM {table};
+            DROP VIEW IF EXISTS latest_{kind}_standings;
+            DROP TABLE {table};
+        """)
+        cur.execute(STANDINGS_BY_GAMEWEEK.format(table=table, kind=kind))
+        cur.execute(f"SELECT DISTINCT league_id, gameweek FROM {table}_legacy ORDER BY 1, 2")
+        for league_id, gameweek in cur.fetchall():
+            ensure_partition(cur, table, league_id, gameweek)
+        cur.execute(f"""
+            INSERT INTO {table} (league_id, gameweek, entry_id, position, manager, points, updated_at)
+            SELECT league_id, gameweek, entry_id, position, manager, points, updated_at FROM {table}_legacy;
+        """)
+        log.info(f"🔀 {table} repartitioned by gameweek ({cur.rowcount} rows copied).",
+                 extra={"table": table, "rows": cur.rowcount})
+
+
+# -------------------------------
+# Runner
+# -------------------------------
+def applied_versions(cur):
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            version INT PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    cur.execute(f"SELECT version FROM {MIGRATIONS_TABLE}")
+    return {row[0] for row in cur.fetchall()}
+
+
+def pending(conn, target=None):
+    """The (version, name, fn) of every migration not applied yet, up to ``target``."""
+    with conn.cursor() as cur:
+        applied = applied_versions(cur)
+    conn.commit()
+    return [m for m in MIGRATIONS if m[0] not in applied and (target is None or m[0] <= target)]
+
+
+def migrate(conn, target=None):
+    """Applies every pending migration (up to ``target``) in order. Returns the versions applied.
+
+    A migration and its version row commit together, or not at all.
+    """
+    done = []
+    for version, name, fn in pending(conn, target):
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+                # Another process may have applied it while this one waited for the lock
+                if version in applied_versions(cur):
+                    conn.commit()
+                    continue
+                with metrics.span("migration", level=logging.INFO, version=version, migration=name):
+                    fn(cur)
+                cur.execute(f"INSERT INTO {MIGRATIONS_TABLE} (version, name) VALUES (%s, %s)", (version, name))
+            conn.commit()
+        except Exception as e:
+            log.error(f"❌ Migration {version} ({name}) failed: {e}")
+            conn.rollback()
+            raise
+        log.info(f"✅ Migration {version} ({name}) applied.", extra={"version": version})
+        done.append(version)
+    return done
+
+
+def status(conn):
+    """(version, name, applied_at or None) of every known migration."""
+    with conn.cursor() as cur:
+        applied_versions(cur)
+        cur.execute(f"SELECT version, applied_at FROM {MIGRATIONS_TABLE}")
+        applied = dict(cur.fetchall())
+    conn.commit()
+    return [(version, name, applied.get(version)) for version, name, _ in MIGRATIONS]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list migrations and whether they are applied")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    args = parser.parse_args()
+    metrics.setup_logging()
+    with db.connection() as conn:
+        if args.status:
+            for version, name, applied_at in status(conn):
+                print(f"{version:>4} {name:<28} {applied_at or 'pending'}")
+        else:
+            applied = migrate(conn, args.target)
+            log.info(f"✅ Schema is up to date ({len(applied)} migration(s) applied).")
@@ -0,0 +1,153 @@
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import db
+import fetch_leagues
+import insert_processed_data
+import league_registry
+import metrics
+import process_leagues
+import snapshot_store
+
+# Standings digests of the last run that was loaded into the database
+LOADED_DIGESTS_PATH = 'data/loaded_digests.json'
+
+log = logging.getLogger(__name__)
+
+
+class StageTimer:
+    """Records the wall-clock duration of each pipeline stage; each stage is also logged as a span."""
+
+    def __init__(self):
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            with metrics.span("stage", level=logging.INFO, stage=name):
+                yield
+        finally:
+            with self._lock:
+                self.timings[name] = time.perf_counter() - start
+
+    def report(self):
+        for name, seconds in self.timings.items():
+            print(f"⏱️ {name:<20} {seconds * 1000:9.1f} ms")
+
+
+def process_payload(league, payload, fetched_at, store=None):
+    """Turns a fetched league payload straight into its cleaned DataFrame.
+
+    The rows are merged into the league's processed partitions, which the season analytics
+    read. When a snapshot ``store`` is given, the payload is also appended to it if the
+    standings changed since the last snapshot.
+    """
+    name, extract, clean, subset = process_leagues.PROCESSORS[league["type"]]
+    df = extract(payload)
+    df["timestamp"] = fetched_at
+    df = clean(df)
+    if store is not None:
+        store.append(league["id"], payload, fetched_at)
+    process_leagues.merge_into_store(df, name, league["id"], subset)
+    return df
+
+
+def run(league_list=None, archive=False, skip_load=False, force=False, timer=None):
+    """Runs fetch -> process -> load in one process, handing parsed objects between stages.
+
+    Every registered league is fetched, processed and loaded concurrently. The deadline fetch
+    runs alongside the league fetch/process branch, and each league is processed as soon as the
+    fetch stage returns. Processed partitions are always written; snapshots only when
+    ``archive`` is set. If every league's standings hash matches the last run, processing and
+    loading the standings are skipped unless ``force`` is set, but the deadlines are still
+    written. Digests are saved only for leagues that loaded, and none if the load stage
+    raised. Returns the StageTimer with per-stage timings.
+    """
+    league_list = league_list or league_registry.fpl_leagues()
+    timer = timer or StageTimer()
+
+    with timer.stage("total"), ThreadPoolExecutor(max_workers=process_leagues.MAX_WORKERS + 1) as executor:
+        def fetch_deadlines():
+            with timer.stage("fetch_deadlines"):
+                return insert_processed_data.fetch_fpl_deadlines()
+
+        deadlines_future = executor.submit(fetch_deadlines)
+
+        with timer.stage("fetch_leagues"):
+            payloads = fetch_leagues.fetch_all_leagues(league_list)
+        fetched_at = datetime.now()
+
+        previous_digests = fetch_leagues.load_digests(LOADED_DIGESTS_PATH)
+        digests = {
+            str(league_id): snapshot_store.standings_digest(payload)
+            for league_id, payload in payloads.items() if not isinstance(payload, Exception)
+        }
+        if not force and not skip_load and digests and all(previous_digests.get(k) == v for k, v in digests.items()):
+            log.info("⏭️ Standings unchanged since the last run; skipping process and load.")
+            # Deadlines move between gameweeks, when the standings stay the same
+            with timer.stage("load"), db.connection() as conn:
+                changed = insert_processed_data.insert_deadlines(deadlines_future.result(), conn)
+                if changed:
+                    version = db.bump_data_version(conn, changed)
+                    log.info(f"🔖 Data version bumped to {version}", extra={"version": version})
+            return timer
+
+        frames = []
+        store = snapshot_store.SnapshotStore() if archive else None
+        with timer.stage("process"):
+            futures = []
+            for league in league_list:
+                payload = payloads[league["id"]]
+                if isinstance(payload, Exception):
+                    log.error(f"❌ Failed to fetch league {league['id']} ({league['type']}): {payload}")
+                    continue
+                futures.append((league, executor.submit(process_payload, league, payload, fetched_at, store)))
+            for league, future in futures:
+                frames.append((league, future.result()))
+        if store is not None:
+            store.close()
+
+        deadlines = deadlines_future.result()
+
+        if skip_load:
+            return timer
+        if not frames:
+            log.error("❌ No league data, skipping the load stage.")
+            return timer
+
+        with timer.stage("load"), db.connection() as conn:
+            _, failed = insert_processed_data.load_frames(conn, frames, deadlines)
+        # A league that failed to load keeps its old digest, so the next run loads it again
+        loaded = {league_id: digest for league_id, digest in digests.items() if int(league_id) not in failed}
+        fetch_leagues.save_digests({**previous_digests, **loaded}, LOADED_DIGESTS_PATH)
+
+    return timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPL data pipeline.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    run_parser = subcommands.add_parser("run", help="fetch, process and load in a single process")
+    run_parser.add_argument("--archive", action="store_true",
+                            help="also keep snapshots of the fetched standings")
+    run_parser.add_argument("--skip-load", action="store_true", help="stop before writing to the database")
+    run_parser.add_argument("--force", action="store_true", help="process and load even if standings are unchanged")
+    args = parser.parse_args()
+    metrics.setup_logging()
+
+    if args.command == "run":
+        timer = run(archive=args.archive, skip_load=args.skip_load, force=args.force)
+        timer.report()
+        # This process has no /metrics endpoint, so its counters go to the log instead
+        log.info("📊 Pipeline metrics", extra={"metrics": metrics.snapshot()})
+
+
+if __name__ == "__main__":
+    main()
@@ -1,108 +1,335 @@
 #import libraries
+import argparse
+import hashlib
 import json
+import logging
+import numpy as np
 import pandas as pd
 import glob
 from datetime import datetime
 import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import league_registry
+import metrics
+import processed_store
+import snapshot_store
+
+RAW_DIR = 'data/raw'
+PROCESSED_DIR = 'data/processed'
+MANIFEST_FILE = 'manifest.json'
+# Manifest key holding the last snapshot-store id processed for each league
+STORE_MANIFEST_KEY = 'snapshot_store'
+
+# Leagues processed at the same time. Parsing is mostly CPU-bound, so more threads than cores
+# only pay off for the Parquet reads and writes.
+MAX_WORKERS = int(os.environ.get("FPL_PROCESS_WORKERS", min(4, os.cpu_count() or 1)))
+
+SNAPSHOT_RE = re.compile(r'league_\d+_(\d{8}_\d{6})\.json$')
+
+rows_parsed = metrics.counter("fpl_rows_parsed_total", "Standings rows extracted from league payloads")
+
+log = logging.getLogger(__name__)
 
 #function to load JSON files
-def load_json_files(path_pattern):
-    """Loads all JSON files matching a pattern into a list of dictionaries."""
-    files = glob.glob(path_pattern)
-    data_list = []
-    for file in files:
-        with open(file, 'r') as f:
-            data = json.load(f)
-            data_list.append(data)
-    return data_list
+def load_json_file(path):
+    """Loads a single JSON file, with orjson when it is installed."""
+    with open(path, 'rb') as f:
+        return snapshot_store.loads(f.read())
+
+def iter_json_files(path_pattern):
+    """Yields the JSON files matching a pattern one at a time, so only one is held in memory."""
+    for file in glob.glob(path_pattern):
+        yield load_json_file(file)
+
+def snapshot_timestamp(path):
+    """Returns when a raw snapshot was fetched, from its file name or else its mtime."""
+    match = SNAPSHOT_RE.search(os.path.basename(path))
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+#manifest of raw files already processed
+def file_digest(path):
+    """Returns the SHA-256 of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_manifest(processed_dir=PROCESSED_DIR):
+    """Loads the manifest of processed raw files ({path: {mtime, size, sha256}}) and the last
+    processed snapshot-store id of each league."""
+    try:
+        with open(os.path.join(processed_dir, MANIFEST_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest, processed_dir=PROCESSED_DIR):
+    path = os.path.join(processed_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.tmp', path)
+
+def find_new_files(path_pattern, manifest):
+    """Returns raw files not yet in the manifest, or whose contents changed since processing.
+
+    Files whose mtime and size match the manifest are skipped without being read; only files
+    that look different are hashed. Returns the new files and their manifest entries.
+    """
+    new_files = {}
+    for path in sorted(glob.glob(path_pattern)):
+        stat = os.stat(path)
+        seen = manifest.get(path)
+        if seen and seen['mtime'] == stat.st_mtime and seen['size'] == stat.st_size:
+            continue
+        entry = {'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': file_digest(path)}
+        if seen and seen['sha256'] == entry['sha256']:
+            manifest[path] = entry
+            continue
+        new_files[path] = entry
+    return new_files
+
+# Standings columns of each league type: (column, payload key(s), dtype). The first key
+# present in a row is used, and missing or null values are stored as 0.
+CLASSIC_COLUMNS = [
+    ('entry', 'entry', np.int64),
+    ('total_points', 'total', np.int32),
+    ('rank', 'rank', np.int32),
+    ('event_points', 'event_total', np.int32),
+]
+H2H_COLUMNS = [
+    ('entry', 'entry', np.int64),
+    ('rank', 'rank', np.int32),
+    ('points', 'total', np.int32),
+    ('matches_played', ('matches', 'matches_played'), np.int32),
+]
+
+def column_values(results, key):
+    if isinstance(key, str):
+        return (row.get(key) or 0 for row in results)
+    return (next((row[k] for k in key if k in row), None) or 0 for row in results)
+
+def extract_columns(league_json, name_column, columns):
+    """Extracts the standings rows of a league payload into a DataFrame of typed columns.
+
+    Each column is filled straight from the parsed rows into an array preallocated to the
+    number of rows, without building a dict per row; manager names become a categorical.
+    """
+    results = league_json['standings']['results']
+    count = len(results)
+    with metrics.span("parse", rows=count):
+        data = {name_column: pd.Categorical([row['player_name'] for row in results])}
+        for column, key, dtype in columns:
+            data[column] = np.fromiter(column_values(results, key), dtype=dtype, count=count)
+        current_gameweek = league_json.get('league', {}).get('event_current') or 0
+        data['event'] = np.full(count, current_gameweek, dtype=np.int32)
+        df = pd.DataFrame(data, copy=False)
+    rows_parsed.inc(count)
+    return df
 
 #extract classic league standings
 def extract_classic_standings(league_json):
     """Extracts classic league standings into a DataFrame."""
-    standings = league_json['standings']['results']
-    rows = []
-    current_gameweek = league_json.get('league', {}).get('event_current')
-    for player in standings:
-        rows.append({
-            'manager_name': player['player_name'],
-            'entry': player['entry'],
-            'total_points': player['total'],
-            'rank': player['rank'],
-            'event_points': player['event_total'],
-            'event': current_gameweek
-        })
-    return pd.DataFrame(rows)
+    return extract_columns(league_json, 'manager_name', CLASSIC_COLUMNS)
 
 #extract H2H standings
 def extract_h2h_standings(h2h_json):
     """Extracts H2H league standings into a DataFrame."""
-    standings = []
-    current_gameweek = h2h_json.get('league', {}).get('event_current')
-    for player in h2h_json['standings']['results']:
-        standings.append({
-            'rank': player['rank'],
-            'player_name': player['player_name'],
-            'points': player['total'],
-            'matches_played': player.get('matches', player.get('matches_played', 0)),
-            'event': current_gameweek
-        })
-    return pd.DataFrame(standings)
-
-def main():
-    # Ensure the data/processed directory exists
-    os.makedirs('data/processed', exist_ok=True)
-    
-    # Process all JSON files in data/raw
-    # Classic league JSON files
-    classic_files = 'data/raw/league_1653859_*.json'
-    classic_data_list = load_json_files(classic_files)
-
-    classic_dfs = [extract_classic_standings(data) for data in classic_data_list]
-    
-    if not classic_dfs:
-        print("❌ No classic league data found. Please run fetch_leagues.py first.")
-        return
-        
-    classic_df = pd.concat(classic_dfs, ignore_index=True)
+    return extract_columns(h2h_json, 'player_name', H2H_COLUMNS)
+
+def extract_files(files, extract):
+    """Extracts every raw file into one DataFrame stamped with each snapshot's fetch time.
+
+    Files are parsed one at a time and each parsed payload is dropped once its rows are extracted.
+    """
+    dfs = []
+    for path in files:
+        df = extract(load_json_file(path))
+        df['timestamp'] = snapshot_timestamp(path)
+        dfs.append(df)
+    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
+def extract_store_snapshots(league_id, extract, manifest, snapshot_dir=snapshot_store.SNAPSHOT_DIR):
+    """Extracts the league's snapshot-store entries added since the last run.
+
+    Snapshots are streamed and reduced to the last version of each manager's row per gameweek
+    before any DataFrame is built, which is what merge_latest would keep anyway. Returns the
+    extracted DataFrames, the number of snapshots read and the id of the last one.
+    """
+    last_id = manifest.get(STORE_MANIFEST_KEY, {}).get(str(league_id), 0)
+    if not os.path.exists(os.path.join(snapshot_dir, 'index.sqlite')):
+        return [], 0, last_id
+    store = snapshot_store.SnapshotStore(snapshot_dir)
+    retired = []    # (gameweek, snapshot id, row) of managers missing from a later snapshot
+    pending = {}    # gameweek -> (snapshot id, rows) of its most recent snapshot
+    snapshots = {}  # snapshot id -> (fetched_at, metadata)
+    try:
+        for snapshot in store.iter_snapshots(league_id=league_id, after_id=last_id):
+            meta, rows = snapshot_store.split_payload(snapshot['payload'])
+            snapshots[snapshot['id']] = (snapshot['fetched_at'], meta)
+            gameweek = snapshot['gameweek']
+            previous = pending.get(gameweek)
+            if previous is not None:
+                if snapshot['previous_id'] == previous[0]:
+                    # The delta already says which managers left since the previous snapshot
+                    dropped = set(snapshot['removed'])
+                else:
+                    dropped = ({snapshot_store.row_key(row) for row in previous[1]}
+                               - {snapshot_store.row_key(row) for row in rows})
+                if dropped:
+                    retired.extend((gameweek, previous[0], row) for row in previous[1]
+                                   if snapshot_store.row_key(row) in dropped)
+            pending[gameweek] = (snapshot['id'], rows)
+            last_id = snapshot['id']
+    finally:
+        store.close()
+
+    latest = {}
+    for gameweek, snapshot_id, row in retired:
+        latest[(gameweek, snapshot_store.row_key(row))] = (snapshot_id, row)
+    for gameweek, (snapshot_id, rows) in pending.items():
+        for row in rows:
+            latest[(gameweek, snapshot_store.row_key(row))] = (snapshot_id, row)
+    grouped = {}
+    for snapshot_id, row in latest.values():
+        grouped.setdefault(snapshot_id, []).append(row)
+    dfs = []
+    for snapshot_id, rows in grouped.items():
+        fetched_at, meta = snapshots[snapshot_id]
+        df = extract(snapshot_store.join_payload(meta, rows))
+        df['timestamp'] = fetched_at
+        dfs.append(df)
+    return dfs, len(snapshots), last_id
+
+#clean and deduplicate
+def as_int(series, dtype=np.int32):
+    """Converts a column to integers, with anything that is not a number as 0."""
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype(dtype)
+    return pd.to_numeric(series, errors='coerce').fillna(0).astype(dtype)
+
+def clean_classic(classic_df):
     classic_df['league_type'] = 'classic'
-    classic_df['timestamp'] = datetime.now()
-    
+    # Names of several snapshots concatenated together lose their shared categories
+    classic_df['manager_name'] = classic_df['manager_name'].astype('category')
     # Clean data: convert to numeric and fill NaNs
-    classic_df['total_points'] = pd.to_numeric(classic_df['total_points'], errors='coerce').fillna(0)
-    classic_df['event_points'] = pd.to_numeric(classic_df['event_points'], errors='coerce').fillna(0)
-    classic_df['rank'] = pd.to_numeric(classic_df['rank'], errors='coerce').fillna(0)
-    classic_df['event'] = pd.to_numeric(classic_df['event'], errors='coerce').fillna(0)
-    
-    # Drop duplicates to ensure each manager has only one final entry for each gameweek.
-    if 'entry' in classic_df.columns and 'event' in classic_df.columns:
-        classic_df = classic_df.sort_values('timestamp').drop_duplicates(subset=['entry', 'event'], keep='last')
-        
-    # H2H league JSON files
-    h2h_files = 'data/raw/league_1654002_*.json'
-    h2h_data_list = load_json_files(h2h_files)
-    
-    if not h2h_data_list:
-        print("❌ No H2H league data found. Please run fetch_leagues.py first.")
-        return
-    
-    h2h_dfs = [extract_h2h_standings(data) for data in h2h_data_list]
-    h2h_df = pd.concat(h2h_dfs, ignore_index=True)
-    h2h_df['league_type'] = 'h2h'
-    h2h_df['timestamp'] = datetime.now()
+    for column in ['total_points', 'event_points', 'rank', 'event']:
+        classic_df[column] = as_int(classic_df[column])
+    return classic_df
 
+def clean_h2h(h2h_df):
+    h2h_df['league_type'] = 'h2h'
+    h2h_df['player_name'] = h2h_df['player_name'].astype('category')
     # Clean data: convert to numeric and fill NaNs
-    h2h_df['points'] = pd.to_numeric(h2h_df['points'], errors='coerce').fillna(0)
-    h2h_df['rank'] = pd.to_numeric(h2h_df['rank'], errors='coerce').fillna(0)
-    h2h_df['event'] = pd.to_numeric(h2h_df['event'], errors='coerce').fillna(0)
+    for column in ['points', 'rank', 'event', 'matches_played']:
+        h2h_df[column] = as_int(h2h_df[column])
+    return h2h_df
+
+def merge_latest(existing_df, new_df, subset):
+    """Merges new rows into existing output, keeping the most recent snapshot of each key."""
+    merged = pd.concat([existing_df, new_df], ignore_index=True) if existing_df is not None else new_df
+    # Drop duplicates to ensure each manager has only one final entry for each gameweek.
+    return (merged.sort_values('timestamp', kind='stable')
+                  .drop_duplicates(subset=subset, keep='last')
+                  .reset_index(drop=True))
+
+PROCESSORS = {
+    # league type: (output name, extractor, cleaner, dedup key)
+    'classic': ('classic_league', extract_classic_standings, clean_classic, ['entry', 'event']),
+    'h2h': ('h2h_league', extract_h2h_standings, clean_h2h, ['entry', 'event']),
+}
+
+def process_league(league_id, name, extract, clean, subset, manifest, full=False,
+                   raw_dir=RAW_DIR, store_dir=processed_store.STORE_DIR, snapshot_dir=snapshot_store.SNAPSHOT_DIR):
+    """Parses the league's new snapshots and merges them into its processed partitions.
+
+    New snapshots come from the snapshot store and from legacy raw JSON files. Only the
+    (league, gameweek) partitions that they touch are read back and rewritten. Returns the
+    number of snapshots parsed, or None if the league has no data at all.
+    """
+    pattern = f'{raw_dir}/league_{league_id}_*.json'
+    store_ids = manifest.setdefault(STORE_MANIFEST_KEY, {})
+    has_data = bool(processed_store.list_partitions(name, league_id, store_dir))
+    # Partitions written before a column was added cannot be merged into
+    if has_data and not processed_store.has_current_schema(name, league_id, store_dir):
+        log.info(f"🔁 {name} {league_id}: processed data predates the current columns; rebuilding it.")
+        full = True
+    if full or not has_data:
+        # Nothing to merge into, so every snapshot of this league has to be parsed again
+        shutil.rmtree(os.path.join(store_dir, name, f'league_id={league_id}'), ignore_errors=True)
+        has_data = False
+        for path in glob.glob(pattern):
+            manifest.pop(path, None)
+        store_ids.pop(str(league_id), None)
+
+    new_files = find_new_files(pattern, manifest)
+    store_dfs, store_count, last_id = extract_store_snapshots(league_id, extract, manifest, snapshot_dir)
+    if not new_files and not store_count:
+        return 0 if has_data else None
+
+    dfs = ([extract_files(new_files, extract)] if new_files else []) + store_dfs
+    if dfs:
+        new_df = clean(pd.concat(dfs, ignore_index=True))
+        merge_into_store(new_df, name, league_id, subset, store_dir, has_data)
+    manifest.update(new_files)
+    store_ids[str(league_id)] = last_id
+    return len(new_files) + store_count
+
+def merge_into_store(new_df, name, league_id, subset, store_dir=processed_store.STORE_DIR, has_data=True):
+    """Merges processed rows into the (league, gameweek) partitions they belong to."""
+    for event, event_df in new_df.groupby('event'):
+        existing_df = processed_store.read_table(name, league_id, [event], store_dir=store_dir) if has_data else None
+        if existing_df is not None and existing_df.empty:
+            existing_df = None
+        merged = merge_latest(existing_df, event_df, subset)
+        processed_store.write_partition(merged, name, league_id, int(event), store_dir)
+
+def main(full=False, csv=False, raw_dir=RAW_DIR, processed_dir=PROCESSED_DIR, snapshot_dir=snapshot_store.SNAPSHOT_DIR,
+         league_list=None, max_workers=MAX_WORKERS):
+    """Processes every registered league, ``max_workers`` leagues at a time."""
+    # Ensure the data/processed directory exists
+    os.makedirs(processed_dir, exist_ok=True)
+    store_dir = os.path.join(processed_dir, 'store')
+    manifest = {} if full else load_manifest(processed_dir)
+    # Leagues only touch their own manifest keys, so they can share the manifest
+    manifest.setdefault(STORE_MANIFEST_KEY, {})
+    league_list = league_list or league_registry.fpl_leagues()
+
+    def process(league):
+        name, extract, clean, subset = PROCESSORS[league['type']]
+        return process_league(league['id'], name, extract, clean, subset, manifest, full,
+                              raw_dir, store_dir, snapshot_dir)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(process, league_list))
+
+    for league, parsed in zip(league_list, results):
+        name = f"{PROCESSORS[league['type']][0]} {league['id']}"
+        if parsed is None:
+            log.error(f"❌ No {name} data found. Please run fetch_leagues.py first.")
+        elif parsed == 0:
+            log.info(f"⏭️ {name}: no new snapshots.")
+        else:
+            log.info(f"✅ {name}: merged {parsed} new snapshot(s).", extra={"snapshots": parsed})
 
-    if 'player_name' in h2h_df.columns and 'event' in h2h_df.columns:
-        h2h_df = h2h_df.sort_values('timestamp').drop_duplicates(subset=['player_name', 'event'], keep='last')
-        
-    # Save processed data to csv
-    classic_df.to_csv('data/processed/classic_league.csv', index=False)
-    h2h_df.to_csv('data/processed/h2h_league.csv', index=False)
+    if csv:
+        for name in sorted({PROCESSORS[league['type']][0] for league in league_list}):
+            rows = processed_store.export_csv(name, f'{processed_dir}/{name}.csv', store_dir)
+            log.info(f"📄 Exported {rows} rows to {processed_dir}/{name}.csv")
 
-    print("✅ Processed data saved in 'data/processed/'")
+    save_manifest(manifest, processed_dir)
+    log.info(f"✅ Processed data saved in '{store_dir}/'")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Process raw league snapshots into the processed store.")
+    parser.add_argument('--full', action='store_true', help="reprocess the whole raw archive")
+    parser.add_argument('--csv', action='store_true', help="also export each table to data/processed/*.csv")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="leagues processed at the same time")
+    args = parser.parse_args()
+    metrics.setup_logging()
+    main(full=args.full, csv=args.csv, max_workers=args.workers)
@@ -0,0 +1,123 @@
+import glob
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STORE_DIR = 'data/processed/store'
+COMPRESSION = 'zstd'
+
+# Column types of the processed tables; partition keys (league_id, event) live in the path
+SCHEMAS = {
+    'classic_league': pa.schema([
+        ('manager_name', pa.string()),
+        ('entry', pa.int64()),
+        ('total_points', pa.int32()),
+        ('rank', pa.int32()),
+        ('event_points', pa.int32()),
+        ('league_type', pa.string()),
+        ('timestamp', pa.timestamp('us')),
+    ]),
+    'h2h_league': pa.schema([
+        ('entry', pa.int64()),
+        ('rank', pa.int32()),
+        ('player_name', pa.string()),
+        ('points', pa.int32()),
+        ('matches_played', pa.int32()),
+        ('league_type', pa.string()),
+        ('timestamp', pa.timestamp('us')),
+    ]),
+}
+
+PARTITION_RE = re.compile(r'league_id=(\d+)[/\\]event=(\d+)[/\\]part\.parquet$')
+
+
+def partition_path(name, league_id, event, store_dir=STORE_DIR):
+    return os.path.join(store_dir, name, f'league_id={league_id}', f'event={event}', 'part.parquet')
+
+
+def list_partitions(name, league_id=None, store_dir=STORE_DIR):
+    """Returns (league_id, event, path) for every stored partition of a table, sorted."""
+    league = '*' if league_id is None else league_id
+    partitions = []
+    for path in glob.glob(os.path.join(store_dir, name, f'league_id={league}', 'event=*', 'part.parquet')):
+        match = PARTITION_RE.search(path)
+        if match:
+            partitions.append((int(match.group(1)), int(match.group(2)), path))
+    return sorted(partitions)
+
+
+def latest_event(name, league_id=None, store_dir=STORE_DIR):
+    """Returns the highest stored gameweek of a table, or None if it is empty."""
+    partitions = list_partitions(name, league_id, store_dir)
+    return max(event for _, event, _ in partitions) if partitions else None
+
+
+def has_current_schema(name, league_id=None, store_dir=STORE_DIR):
+    """Whether the stored partitions of a table have every column of its current schema.
+
+    Only the newest partition's footer is read: a league whose schema is out of date is
+    rebuilt as a whole, so its partitions never mix schemas.
+    """
+    partitions = list_partitions(name, league_id, store_dir)
+    if not partitions:
+        return True
+    names = set(pq.read_schema(partitions[-1][2]).names)
+    return all(column in names for column in SCHEMAS[name].names)
+
+
+def write_partition(df, name, league_id, event, store_dir=STORE_DIR):
+    """Writes one (league, gameweek) partition, replacing it atomically."""
+    schema = SCHEMAS[name]
+    table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+    path = partition_path(name, league_id, event, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path + '.tmp', compression=COMPRESSION)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def read_partition(path, columns=None):
+    """Reads a single partition file, memory-mapped, as an Arrow table."""
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+
+def read_table(name, league_id=None, events=None, columns=None, store_dir=STORE_DIR):
+    """Reads the selected partitions and columns of a processed table into a DataFrame.
+
+    Only partitions for ``league_id``/``events`` are opened and only ``columns`` are decoded.
+    The ``league_id`` and ``event`` partition keys are added back as columns.
+    """
+    wanted = None if events is None else set(events)
+    file_columns = None if columns is None else [c for c in columns if c not in ('league_id', 'event')]
+    tables = []
+    for part_league, event, path in list_partitions(name, league_id, store_dir):
+        if wanted is not None and event not in wanted:
+            continue
+        table = read_partition(path, file_columns)
+        table = table.append_column('league_id', pa.array([part_league] * table.num_rows, pa.int64()))
+        table = table.append_column('event', pa.array([event] * table.num_rows, pa.int32()))
+        tables.append(table)
+
+    if not tables:
+        names = SCHEMAS[name].names + ['league_id', 'event']
+        return pd.DataFrame(columns=columns or names)
+    df = pa.concat_tables(tables).to_pandas()
+    return df[columns] if columns is not None else df
+
+
+def read_latest(name, league_id=None, columns=None, store_dir=STORE_DIR):
+    """Reads only the most recent gameweek of a processed table."""
+    event = latest_event(name, league_id, store_dir)
+    if event is None:
+        return read_table(name, league_id, [], columns, store_dir)
+    return read_table(name, league_id, [event], columns, store_dir)
+
+
+def export_csv(name, path, store_dir=STORE_DIR):
+    """Exports a whole processed table to a single CSV file."""
+    df = read_table(name, store_dir=store_dir)
+    df.to_csv(path, index=False)
+    return len(df)
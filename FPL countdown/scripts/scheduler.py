@@ -0,0 +1,195 @@
+import argparse
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import db
+import fpl_api
+import metrics
+
+# Poll intervals (seconds) for each phase of the gameweek cycle
+LIVE_INTERVAL = 5 * 60          # matches in progress: refresh often
+CHECK_INTERVAL = 30 * 60        # gameweek finished, waiting for FPL to confirm the data
+IDLE_INTERVAL = 12 * 60 * 60    # between gameweeks: rare refreshes
+JITTER = 0.1                    # +/- fraction applied to every sleep
+MIN_SLEEP = 30
+
+# Advisory lock key shared by every scheduler instance (arbitrary, but fixed)
+LOCK_KEY = 0x46504C  # "FPL"
+
+log = logging.getLogger(__name__)
+
+
+class SystemClock:
+    def now(self):
+        return datetime.now(timezone.utc)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class SimulatedClock:
+    """A clock that only moves when the scheduler sleeps, for offline runs."""
+
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds):
+        self.current += timedelta(seconds=seconds)
+
+
+def deadline_of(event):
+    return datetime.fromisoformat(event["deadline_time"].replace("Z", "+00:00"))
+
+
+def plan(events, now, previous_checked=None):
+    """Decides whether to run the pipeline now and how long to wait before the next check.
+
+    ``previous_checked`` is the ``data_checked`` flag of the current gameweek at the previous
+    check, so the final run can be triggered when it flips to True.
+    Returns (run, phase, seconds until the next check).
+    """
+    current = next((e for e in events if e.get("is_current")), None)
+    upcoming = [deadline_of(e) for e in events if deadline_of(e) > now]
+    until_deadline = (min(upcoming) - now).total_seconds() if upcoming else None
+
+    if current is not None and not current.get("finished") and deadline_of(current) <= now:
+        return True, "live", LIVE_INTERVAL
+    if current is not None and current.get("finished") and not current.get("data_checked"):
+        return True, "awaiting_check", CHECK_INTERVAL
+    if current is not None and current.get("data_checked") and previous_checked is False:
+        return True, "final", idle_interval(until_deadline)
+    return False, "idle", idle_interval(until_deadline)
+
+
+def idle_interval(until_deadline):
+    """Sleeps between gameweeks, but wakes up right after the next deadline passes."""
+    if until_deadline is None:
+        return IDLE_INTERVAL
+    return min(IDLE_INTERVAL, until_deadline + 60)
+
+
+class Scheduler:
+    """Runs a job on a deadline-aware adaptive schedule driven by bootstrap-static events.
+
+    ``live_job``, if given, also runs on every check while matches are in progress.
+    """
+
+    def __init__(self, job, fetch_events=None, clock=None, rng=None, verbose=True, live_job=None):
+        self.job = job
+        self.live_job = live_job
+        self.verbose = verbose
+        self.fetch_events = fetch_events or (lambda: fpl_api.get_json("bootstrap-static/")["events"])
+        self.clock = clock or SystemClock()
+        self.rng = rng or random.Random()
+        self.previous_checked = None
+        self.stats = {"checks": 0, "runs": 0, "phases": {}}
+
+    def jittered(self, seconds):
+        return max(MIN_SLEEP, seconds * (1 + self.rng.uniform(-JITTER, JITTER)))
+
+    def tick(self, first=False):
+        """Performs one check; returns the number of seconds to sleep afterwards."""
+        events = self.fetch_events()
+        now = self.clock.now()
+        run, phase, interval = plan(events, now, self.previous_checked)
+        current = next((e for e in events if e.get("is_current")), None)
+        self.previous_checked = current.get("data_checked") if current else None
+
+        self.stats["checks"] += 1
+        self.stats["phases"][phase] = self.stats["phases"].get(phase, 0) + 1
+        if run or first:
+            self.stats["runs"] += 1
+            if self.verbose:
+                log.info(f"▶️ {now:%Y-%m-%d %H:%M} {phase}: running pipeline", extra={"phase": phase})
+            try:
+                self.job()
+            except Exception as e:
+                log.exception(f"❌ Pipeline run failed: {e}")
+        if phase == "live" and self.live_job is not None:
+            try:
+                self.live_job()
+            except Exception as e:
+                log.exception(f"❌ Live points estimate failed: {e}")
+        return self.jittered(interval)
+
+    def run(self, until=None):
+        """Checks and sleeps until ``until`` (a datetime) or forever. Always runs once at start."""
+        first = True
+        while until is None or self.clock.now() < until:
+            try:
+                seconds = self.tick(first)
+            except Exception as e:
+                log.exception(f"❌ Scheduler check failed: {e}")
+                seconds = self.jittered(CHECK_INTERVAL)
+            first = False
+            self.clock.sleep(seconds)
+        return self.stats
+
+
+# -------------------------------
+# Offline simulation
+# -------------------------------
+def synthetic_events(now, season_start, gameweeks=38):
+    """A season timeline: weekly deadlines, matches over ~3 days, data checked ~12h later."""
+    events = []
+    for gw in range(1, gameweeks + 1):
+        deadline = season_start + timedelta(days=7 * (gw - 1))
+        events.append({
+            "id": gw,
+            "deadline_time": deadline.isoformat(),
+            "finished": now >= deadline + timedelta(days=3),
+            "data_checked": now >= deadline + timedelta(days=3, hours=12),
+        })
+    started = [e for e in events if deadline_of(e) <= now]
+    if started:
+        started[-1]["is_current"] = True
+    return events
+
+
+def simulate(days, season_start=None, seed=0):
+    """Runs the scheduler against a simulated clock and season; returns its stats."""
+    season_start = season_start or datetime(2026, 8, 15, 10, 0, tzinfo=timezone.utc)
+    clock = SimulatedClock(season_start - timedelta(days=1))
+    scheduler = Scheduler(job=lambda: None,
+                          fetch_events=lambda: synthetic_events(clock.now(), season_start),
+                          clock=clock, rng=random.Random(seed), verbose=False)
+    return scheduler.run(until=clock.now() + timedelta(days=days))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deadline-aware scheduler for the FPL pipeline.")
+    parser.add_argument("--simulate", type=int, metavar="DAYS",
+                        help="run offline against a simulated clock and season instead")
+    parser.add_argument("--no-lock", action="store_true", help="skip the single-instance advisory lock")
+    args = parser.parse_args()
+    metrics.setup_logging()
+
+    if args.simulate:
+        stats = simulate(args.simulate)
+        fixed = args.simulate * 24 * 60 * 60 // LIVE_INTERVAL
+        print(f"📊 {stats['runs']} pipeline runs and {stats['checks']} API checks in {args.simulate} days "
+              f"(a fixed {LIVE_INTERVAL // 60}-minute cron would run {fixed} times)")
+        print(f"   Checks per phase: {stats['phases']}")
+        return
+
+    import live_points
+    import pipeline
+
+    scheduler = Scheduler(job=pipeline.run, live_job=live_points.main)
+    if args.no_lock:
+        scheduler.run()
+        return
+    with db.advisory_lock(LOCK_KEY) as acquired:
+        if not acquired:
+            log.warning("⚠️ Another scheduler instance holds the lock. Exiting.")
+            return
+        scheduler.run()
+
+
+if __name__ == "__main__":
+    main()
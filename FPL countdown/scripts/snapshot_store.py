@@ -0,0 +1,384 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; zlib is used otherwise
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library decoder is the fallback
+    orjson = None
+
+SNAPSHOT_DIR = 'data/snapshots'
+# Legacy pretty-printed snapshots written by fetch_leagues.py --raw-json
+RAW_DIR = 'data/raw'
+
+# Fields that make up a league's standings; volatile metadata (last_updated_data, rank_sort...)
+# is left out so it does not register as a change
+DIGEST_FIELDS = ('entry', 'player_name', 'entry_name', 'rank', 'total', 'event_total',
+                 'matches_played', 'matches_won', 'matches_drawn', 'matches_lost', 'points_for')
+
+# A full snapshot is stored at least every KEYFRAME_INTERVAL snapshots of a league, or when a
+# delta would be more than DELTA_RATIO of the full size, so reads never replay long chains.
+KEYFRAME_INTERVAL = 24
+DELTA_RATIO = 0.5
+ZSTD_LEVEL = 10
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        league_id INTEGER NOT NULL,
+        gameweek INTEGER,
+        fetched_at TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        blob TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        base_id INTEGER,
+        chain INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS snapshots_key ON snapshots (league_id, gameweek, fetched_at);
+"""
+
+
+def compress(data):
+    if zstandard is not None:
+        return b'Z' + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return b'D' + zlib.compress(data, 9)
+
+
+def decompress(blob):
+    codec, body = blob[:1], blob[1:]
+    if codec == b'Z':
+        if zstandard is None:
+            raise RuntimeError("This snapshot is zstd-compressed; install the zstandard package to read it.")
+        return zstandard.ZstdDecompressor().decompress(body)
+    return zlib.decompress(body)
+
+
+def row_key(row):
+    return row.get('entry') or row.get('id')
+
+
+def split_payload(payload):
+    """Splits a league payload into its metadata and its standings rows."""
+    meta = dict(payload)
+    standings = dict(meta.get('standings', {}))
+    rows = standings.pop('results', [])
+    meta['standings'] = standings
+    return meta, rows
+
+
+def join_payload(meta, rows):
+    payload = dict(meta)
+    payload['standings'] = {**meta.get('standings', {}), 'results': rows}
+    return payload
+
+
+def make_delta(base_rows, meta, rows):
+    """Encodes rows as changes against the base snapshot's rows, keyed by entry."""
+    base = {row_key(row): row for row in base_rows}
+    keys = [row_key(row) for row in rows]
+    current = set(keys)
+    return {
+        'meta': meta,
+        'changed': [row for row in rows if base.get(row_key(row)) != row],
+        'removed': [key for key in base if key not in current],
+        'order': keys,
+    }
+
+
+def apply_delta(base_rows, delta, by_key=None):
+    """Rebuilds a snapshot's rows from its base rows and delta.
+
+    ``by_key`` is the base rows indexed by entry; when given it is updated in place, so a
+    streaming reader can apply consecutive deltas without re-indexing every row.
+    """
+    rows = by_key if by_key is not None else {row_key(row): row for row in base_rows}
+    for key in delta['removed']:
+        rows.pop(key, None)
+    for row in delta['changed']:
+        rows[row_key(row)] = row
+    return [rows[key] for key in delta['order']]
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def standings_digest(league_data):
+    """Returns a content hash of a league's normalized standings (row order independent)."""
+    rows = sorted(league_data['standings']['results'], key=lambda row: row.get('entry') or 0)
+    normalized = {
+        'event': league_data.get('league', {}).get('event_current'),
+        'rows': [[row.get(field) for field in DIGEST_FIELDS] for row in rows],
+    }
+    return hashlib.sha256(json.dumps(normalized, separators=(',', ':')).encode()).hexdigest()
+
+
+class SnapshotStore:
+    """Append-only, content-addressed archive of league standings snapshots.
+
+    Blobs are compressed JSON stored under ``blobs/`` by their SHA-256, so identical objects
+    are kept once. Consecutive snapshots of a league are delta-encoded against the previous
+    one, with periodic full keyframes. An SQLite index maps (league_id, gameweek, fetched_at)
+    to blobs. Snapshots whose standings are identical to the league's previous snapshot are
+    not stored again.
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, 'blobs'), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, 'index.sqlite'), check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.db.close()
+
+    # -------------------------------
+    # Blobs
+    # -------------------------------
+    def _blob_path(self, digest):
+        return os.path.join(self.root, 'blobs', digest[:2], digest)
+
+    def _put(self, obj):
+        data = json.dumps(obj, separators=(',', ':')).encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(compress(data))
+            os.replace(path + '.tmp', path)
+        return digest, len(data)
+
+    def _get(self, digest):
+        with open(self._blob_path(digest), 'rb') as f:
+            return loads(decompress(f.read()))
+
+    # -------------------------------
+    # Writing
+    # -------------------------------
+    def _latest_row(self, league_id):
+        return self.db.execute(
+            "SELECT id, digest, chain FROM snapshots WHERE league_id = ? ORDER BY id DESC LIMIT 1",
+            (league_id,)).fetchone()
+
+    def _encode(self, meta, rows, base_id, base_rows, chain):
+        """Stores a snapshot as a delta against ``base_rows`` when worthwhile, else in full."""
+        if base_id is not None and chain < KEYFRAME_INTERVAL:
+            full_size = len(json.dumps(rows, separators=(',', ':')))
+            delta = make_delta(base_rows, meta, rows)
+            if len(json.dumps(delta, separators=(',', ':'))) <= full_size * DELTA_RATIO:
+                blob, _ = self._put(delta)
+                return blob, 'delta', base_id, chain + 1
+        blob, _ = self._put({'meta': meta, 'rows': rows})
+        return blob, 'full', None, 0
+
+    def append(self, league_id, payload, fetched_at=None, snapshot_id=None):
+        """Adds a snapshot and returns its id, or None if the standings are unchanged."""
+        fetched_at = fetched_at or datetime.now()
+        digest = standings_digest(payload)
+        meta, rows = split_payload(payload)
+        with self._lock:
+            latest = self._latest_row(league_id)
+            if latest is not None and latest[1] == digest:
+                return None
+            base_rows = self.materialize(latest[0])[1] if latest is not None else None
+            blob, kind, base_id, chain = self._encode(
+                meta, rows, latest[0] if latest else None, base_rows, latest[2] if latest else 0)
+            cur = self.db.execute(
+                "INSERT INTO snapshots (id, league_id, gameweek, fetched_at, digest, blob, kind, base_id, chain) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (snapshot_id, league_id, meta.get('league', {}).get('event_current'), fetched_at.isoformat(),
+                 digest, blob, kind, base_id, chain))
+            self.db.commit()
+            return cur.lastrowid
+
+    # -------------------------------
+    # Reading
+    # -------------------------------
+    def materialize(self, snapshot_id):
+        """Returns (meta, rows) of one snapshot, replaying its delta chain from the keyframe."""
+        chain = []
+        current = snapshot_id
+        while current is not None:
+            blob, kind, base_id = self.db.execute(
+                "SELECT blob, kind, base_id FROM snapshots WHERE id = ?", (current,)).fetchone()
+            chain.append(self._get(blob))
+            current = base_id if kind == 'delta' else None
+        full = chain.pop()
+        meta, rows = full['meta'], full['rows']
+        for delta in reversed(chain):
+            meta, rows = delta['meta'], apply_delta(rows, delta)
+        return meta, rows
+
+    def query(self, league_id=None, gameweek=None, after_id=0, since=None):
+        sql = "SELECT id, league_id, gameweek, fetched_at, blob, kind, base_id FROM snapshots WHERE id > ?"
+        params = [after_id]
+        if league_id is not None:
+            sql += " AND league_id = ?"
+            params.append(league_id)
+        if gameweek is not None:
+            sql += " AND gameweek = ?"
+            params.append(gameweek)
+        if since is not None:
+            sql += " AND fetched_at >= ?"
+            params.append(since.isoformat())
+        return self.db.execute(sql + " ORDER BY id", params).fetchall()
+
+    def iter_snapshots(self, league_id=None, gameweek=None, after_id=0, since=None):
+        """Streams snapshots in append order as dicts with id, league_id, gameweek, fetched_at
+        and the reconstructed payload. When a snapshot was decoded from the one yielded before
+        it, ``previous_id`` is that snapshot's id and ``removed`` lists the entries it dropped.
+
+        Only the previous snapshot of each league is kept in memory, so consecutive deltas are
+        applied incrementally instead of replaying their chain. Rows are shared between yielded
+        snapshots and must not be modified.
+        """
+        last = {}  # league -> (snapshot id, rows indexed by entry)
+        for snapshot_id, league, gw, fetched_at, blob, kind, base_id in self.query(league_id, gameweek, after_id, since):
+            removed = None
+            if kind == 'delta' and league in last and last[league][0] == base_id:
+                delta = self._get(blob)
+                by_key = last[league][1]
+                meta, rows = delta['meta'], apply_delta(None, delta, by_key)
+                removed = delta['removed']
+            else:
+                if kind == 'full':
+                    obj = self._get(blob)
+                    meta, rows = obj['meta'], obj['rows']
+                else:
+                    meta, rows = self.materialize(snapshot_id)
+                by_key = {row_key(row): row for row in rows}
+            last[league] = (snapshot_id, by_key)
+            yield {
+                'id': snapshot_id,
+                'league_id': league,
+                'gameweek': gw,
+                'fetched_at': datetime.fromisoformat(fetched_at),
+                'payload': join_payload(meta, rows),
+                'previous_id': base_id if removed is not None else None,
+                'removed': removed,
+            }
+
+    def latest_id(self, league_id=None):
+        if league_id is None:
+            return self.db.execute("SELECT COALESCE(MAX(id), 0) FROM snapshots").fetchone()[0]
+        return self.db.execute("SELECT COALESCE(MAX(id), 0) FROM snapshots WHERE league_id = ?",
+                               (league_id,)).fetchone()[0]
+
+    # -------------------------------
+    # Retention and compaction
+    # -------------------------------
+    def retained_ids(self, keep_days=None, now=None):
+        """Snapshots to keep: the last one of every (league, gameweek), plus everything newer
+        than ``keep_days`` days."""
+        keep = {row[0] for row in self.db.execute(
+            "SELECT MAX(id) FROM snapshots GROUP BY league_id, gameweek")}
+        if keep_days is not None:
+            cutoff = (now or datetime.now()) - timedelta(days=keep_days)
+            keep.update(row[0] for row in self.db.execute(
+                "SELECT id FROM snapshots WHERE fetched_at >= ?", (cutoff.isoformat(),)))
+        else:
+            keep.update(row[0] for row in self.db.execute("SELECT id FROM snapshots"))
+        return keep
+
+    def compact(self, keep_days=None, now=None):
+        """Drops snapshots outside the retention policy and re-encodes each league's remaining
+        snapshots as fresh delta chains, keeping their ids. Returns (kept, dropped)."""
+        keep = self.retained_ids(keep_days, now)
+        total = self.db.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+        leagues = [row[0] for row in self.db.execute("SELECT DISTINCT league_id FROM snapshots")]
+        with self._lock:
+            for league in leagues:
+                kept = [(s['id'], s['fetched_at'], s['payload'])
+                        for s in self.iter_snapshots(league_id=league) if s['id'] in keep]
+                self.db.execute("DELETE FROM snapshots WHERE league_id = ?", (league,))
+                base_id, base_rows, chain = None, None, 0
+                for snapshot_id, fetched_at, payload in kept:
+                    meta, rows = split_payload(payload)
+                    blob, kind, ref, chain = self._encode(meta, rows, base_id, base_rows, chain)
+                    self.db.execute(
+                        "INSERT INTO snapshots (id, league_id, gameweek, fetched_at, digest, blob, kind, base_id, chain) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (snapshot_id, league, meta.get('league', {}).get('event_current'), fetched_at.isoformat(),
+                         standings_digest(payload), blob, kind, ref, chain))
+                    base_id, base_rows = snapshot_id, rows
+            self.db.commit()
+            self.collect_garbage()
+        return len(keep), total - len(keep)
+
+    def collect_garbage(self):
+        """Deletes blobs no longer referenced by the index."""
+        referenced = {row[0] for row in self.db.execute("SELECT blob FROM snapshots")}
+        removed = 0
+        for path in glob.glob(os.path.join(self.root, 'blobs', '*', '*')):
+            if os.path.basename(path) not in referenced and not path.endswith('.tmp'):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def stats(self):
+        snapshots, leagues, keyframes = self.db.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT league_id), SUM(kind = 'full') FROM snapshots").fetchone()
+        blobs = glob.glob(os.path.join(self.root, 'blobs', '*', '*'))
+        return {
+            'snapshots': snapshots,
+            'leagues': leagues,
+            'keyframes': keyframes or 0,
+            'blobs': len(blobs),
+            'bytes': sum(os.path.getsize(path) for path in blobs),
+            'codec': 'zstd' if zstandard is not None else 'zlib',
+        }
+
+    def import_raw(self, raw_dir=None):
+        """Imports legacy data/raw/league_<id>_<timestamp>.json files in fetch order."""
+        import process_leagues
+
+        raw_dir = raw_dir or RAW_DIR
+        files = []
+        for path in glob.glob(os.path.join(raw_dir, 'league_*_*.json')):
+            league_id = int(os.path.basename(path).split('_')[1])
+            files.append((process_leagues.snapshot_timestamp(path), league_id, path))
+        imported = 0
+        for fetched_at, league_id, path in sorted(files):
+            with open(path, 'r') as f:
+                if self.append(league_id, json.load(f), fetched_at) is not None:
+                    imported += 1
+        return imported, len(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the compressed league snapshot archive.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("stats", help="show archive size")
+    subcommands.add_parser("import", help="import legacy data/raw JSON files")
+    compact_parser = subcommands.add_parser("compact", help="apply retention and re-encode delta chains")
+    compact_parser.add_argument("--keep-days", type=int,
+                                help="keep every snapshot newer than this; older ones are thinned to "
+                                     "the last snapshot of each gameweek (default: keep everything)")
+    args = parser.parse_args()
+
+    store = SnapshotStore()
+    if args.command == "import":
+        imported, total = store.import_raw()
+        print(f"✅ Imported {imported} of {total} raw files ({total - imported} duplicates skipped).")
+    elif args.command == "compact":
+        kept, dropped = store.compact(args.keep_days)
+        print(f"✅ Kept {kept} snapshots, dropped {dropped}.")
+    print(f"📦 {store.stats()}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import logging
+
+import pandas as pd
+from psycopg2.extras import execute_values
+
+import analytics
+import db
+import fetch_leagues
+import league_registry
+import manager_history
+import metrics
+
+# Separator between the names of managers who tie for a gameweek
+TIE_SEPARATOR = " & "
+
+log = logging.getLogger(__name__)
+
+
+def compute_winners(history):
+    """Returns the top scorer(s) of every gameweek in processed classic rows.
+
+    ``history`` has one row per (entry, event) with ``manager_name`` and ``event_points``.
+    Managers tied on the gameweek's highest score share the win, named in alphabetical order.
+    Returns a DataFrame of gameweek, winner and points, ordered by gameweek.
+    """
+    if history.empty:
+        return pd.DataFrame(columns=["gameweek", "winner", "points"])
+    df = history[["event", "manager_name", "event_points"]].dropna()
+    df = df[df["event"] >= 1]
+    best = df.groupby("event")["event_points"].transform("max")
+    top = df[df["event_points"] == best].sort_values(["event", "manager_name"])
+    winners = top.groupby("event", sort=True).agg(
+        winner=("manager_name", TIE_SEPARATOR.join), points=("event_points", "first"))
+    winners = winners.reset_index().rename(columns={"event": "gameweek"})
+    winners["gameweek"] = winners["gameweek"].astype(int)
+    winners["points"] = winners["points"].astype(int)
+    return winners
+
+
+def upsert_winners(winners, conn, league_id):
+    """Bulk upserts a league's gameweek winners. Returns the number of rows inserted or updated."""
+    if winners.empty:
+        log.warning(f"⚠️ No gameweek winners to insert for league {league_id}.")
+        return 0
+    try:
+        cur = conn.cursor()
+        # At most one row per gameweek, so a season fits in a single statement
+        with db.timed("upsert:gameweek_winners"):
+            execute_values(cur, """
+                INSERT INTO gameweek_winners (league_id, gameweek, winner, points)
+                VALUES %s
+                ON CONFLICT (league_id, gameweek) DO UPDATE SET
+                    winner = EXCLUDED.winner,
+                    points = EXCLUDED.points
+                WHERE (gameweek_winners.winner, gameweek_winners.points)
+                    IS DISTINCT FROM (EXCLUDED.winner, EXCLUDED.points)
+            """, [(league_id, *row) for row in winners[["gameweek", "winner", "points"]].itertuples(index=False, name=None)],
+                page_size=100)
+        changed = cur.rowcount
+        conn.commit()
+        cur.close()
+        db.rows_upserted.inc(changed, table="gameweek_winners")
+        latest = winners.iloc[-1]
+        log.info(f"🏆 Gameweek winners of league {league_id} updated ({changed} of {len(winners)} changed); "
+                 f"GW{latest['gameweek']}: {latest['winner']} ({latest['points']} points)")
+        return changed
+    except Exception as e:
+        log.error(f"❌ Error inserting gameweek winners: {e}")
+        conn.rollback()
+        return 0
+
+
+def history_frame(league_id, max_workers=None):
+    """Rebuilds every finished gameweek's points of a classic league from entry/{id}/history.
+
+    Costs one request per manager, however many gameweeks have been played.
+    """
+    payloads = fetch_leagues.fetch_all_leagues([{"id": league_id, "type": "classic"}])
+    members = manager_history.league_members(payloads)
+    target = manager_history.last_finished_gameweek()
+    tasks = [(entry_id, manager_history.fetch_history, (entry_id,)) for entry_id in members]
+    rows = []
+    workers = max_workers or manager_history.MAX_WORKERS
+    for entry_id, history in manager_history.run_bounded(tasks, workers, "history of entry"):
+        rows.extend((entry_id, members[entry_id][0], row[1], row[2])
+                    for row in manager_history.gameweek_rows(entry_id, history, target))
+    return pd.DataFrame(rows, columns=["entry", "manager_name", "event", "event_points"])
+
+
+def main(backfill=False):
+    changed = 0
+    with db.connection() as conn:
+        for league_id in league_registry.classic_ids():
+            if backfill:
+                history = history_frame(league_id)
+                log.info(f"📚 Rebuilt {history['event'].nunique()} gameweeks of history for "
+                      f"{history['entry'].nunique()} managers of league {league_id}.")
+            else:
+                history = analytics.season_frame(league_id=league_id)
+            changed += upsert_winners(compute_winners(history), conn, league_id)
+        if changed:
+            db.bump_data_version(conn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the winner of every gameweek of every classic league.")
+    parser.add_argument("--backfill", action="store_true",
+                        help="rebuild the whole season from the managers' API history instead of the processed store")
+    args = parser.parse_args()
+    metrics.setup_logging()
+    main(backfill=args.backfill)
@@ -0,0 +1,42 @@
+"""Shared fixtures: the scripts are imported as top-level modules, like the pipeline runs them."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [os.path.join(ROOT, "scripts"), os.path.join(ROOT, "benchmarks")]
+
+import fpl_api  # noqa: E402
+import fpl_stub  # noqa: E402
+
+
+@pytest.fixture
+def start_stub(monkeypatch):
+    """Starts local FPL stubs with the given config and points fpl_api at the last one.
+
+    Returns the stub's state; the on-disk response cache is bypassed and the retry backoff
+    is shortened so failure tests run in milliseconds.
+    """
+    servers = []
+
+    def start(**config):
+        server, base_url, state = fpl_stub.start_stub(**config)
+        servers.append(server)
+        monkeypatch.setattr(fpl_api, "API_BASE", base_url)
+        return state
+
+    monkeypatch.setattr(fpl_api, "CACHE_ENABLED", False)
+    monkeypatch.setattr(fpl_api, "RETRY_BACKOFF", 0.01)
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def session(start_stub):
+    """A fresh session with the shortened backoff patched in by ``start_stub``."""
+    session = fpl_api.make_session()
+    yield session
+    session.close()
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+import requests
+
+import fetch_leagues
+import fpl_api
+import fpl_stub
+
+CLASSIC = {"id": 101, "type": "classic"}
+H2H = {"id": 202, "type": "h2h"}
+
+
+def expected_rows(league, entries, gameweek=10):
+    return fpl_stub.standings_rows(league["id"], league["type"], entries, gameweek)
+
+
+def test_pages_are_merged_in_rank_order(start_stub, session):
+    # Out-of-order completions: every page takes a while, so several are in flight at once
+    start_stub(entries=230, latency=0.02)
+    results = fetch_leagues.fetch_all_leagues([CLASSIC, H2H], page_window=4, session=session)
+
+    for league in (CLASSIC, H2H):
+        standings = results[league["id"]]["standings"]
+        assert standings["results"] == expected_rows(league, 230)
+        assert [row["rank"] for row in standings["results"]] == list(range(1, 231))
+        assert standings["has_next"] is False
+        assert standings["page"] == 1
+
+
+def test_stops_at_the_last_page(start_stub, session):
+    state = start_stub(entries=230)
+    fetch_leagues.fetch_all_leagues([CLASSIC], page_window=1, session=session)
+    # One page at a time: exactly the five pages up to has_next == False
+    assert state.requests == 5
+
+
+def test_speculative_pages_stay_within_the_window(start_stub, session):
+    state = start_stub(entries=230)
+    result = fetch_leagues.fetch_all_leagues([CLASSIC], page_window=4, session=session)[CLASSIC["id"]]
+    assert len(result["standings"]["results"]) == 230
+    # Page 5 is the last; at most window - 1 pages beyond it were requested before it arrived
+    assert 5 <= state.requests <= 5 + 4 - 1
+
+
+def test_page_boundary_has_no_trailing_empty_page(start_stub, session):
+    start_stub(entries=100)
+    result = fetch_leagues.fetch_league_standings(CLASSIC["id"], session=session)
+    assert result["standings"]["results"] == expected_rows(CLASSIC, 100)
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_throttled_and_failed_requests_are_retried(start_stub, session, status):
+    state = start_stub(entries=230, fail_every=3, fail_status=status)
+    results = fetch_leagues.fetch_all_leagues([CLASSIC, H2H], session=session)
+
+    for league in (CLASSIC, H2H):
+        assert results[league["id"]]["standings"]["results"] == expected_rows(league, 230)
+    assert state.requests > 10
+
+
+def test_retries_back_off_then_give_up(start_stub, session):
+    state = start_stub(entries=230, fail_every=1, fail_status=503)
+    started = time.perf_counter()
+    result = fetch_leagues.fetch_all_leagues([CLASSIC], page_window=1, session=session)[CLASSIC["id"]]
+    elapsed = time.perf_counter() - started
+
+    assert isinstance(result, requests.exceptions.RequestException)
+    assert state.requests == fpl_api.RETRY_TOTAL + 1
+    # Exponential backoff between consecutive errors: 0.02 + 0.04 + 0.08 + 0.16 s
+    assert elapsed >= 0.25
+    with pytest.raises(requests.exceptions.RequestException):
+        fetch_leagues.fetch_league_standings(CLASSIC["id"], session=session)
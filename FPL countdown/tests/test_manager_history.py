@@ -0,0 +1,97 @@
+import pytest
+
+import fetch_leagues
+import manager_history
+
+LEAGUE = {"id": 101, "type": "classic"}
+GAMEWEEK = 4
+
+
+@pytest.fixture
+def stub(start_stub):
+    return start_stub(entries=20, gameweek=GAMEWEEK)
+
+
+@pytest.fixture
+def members(stub, session):
+    return manager_history.league_members(fetch_leagues.fetch_all_leagues([LEAGUE], session=session))
+
+
+def all_pairs(members, upto=GAMEWEEK):
+    # The stub's managers join in gameweek 1 + entry % 3
+    return {(entry, gw) for entry in members for gw in range(1 + entry % 3, upto + 1)}
+
+
+def pairs(rows):
+    return {(row[0], row[1]) for row in rows}
+
+
+def collect(stub, members, stored_gameweeks=(), stored_picks=(), target=GAMEWEEK, **kwargs):
+    """Runs collect against the stub; returns (rows, deferred, requests made)."""
+    before = stub.requests
+    rows, deferred = manager_history.collect(members, target, set(stored_gameweeks), set(stored_picks),
+                                             max_workers=4, **kwargs)
+    return rows, deferred, stub.requests - before
+
+
+def test_collects_the_whole_history(stub, members, session):
+    rows, deferred, requests = collect(stub, members, session=session)
+
+    expected = all_pairs(members)
+    assert len(rows["managers"]) == 20
+    assert pairs(rows["manager_gameweeks"]) == expected
+    assert pairs(rows["manager_picks"]) == expected
+    assert len(rows["manager_picks"]) == 15 * len(expected)
+    assert deferred == 0
+    assert requests == len(members) + len(expected)
+
+
+def test_stops_at_the_target_gameweek(stub, members, session):
+    rows, deferred, _ = collect(stub, members, target=GAMEWEEK - 1, session=session)
+    assert pairs(rows["manager_gameweeks"]) == all_pairs(members, GAMEWEEK - 1)
+    assert pairs(rows["manager_picks"]) == all_pairs(members, GAMEWEEK - 1)
+    assert deferred == 0
+
+
+def test_budget_cutoff_fetches_newest_picks_and_resumes(stub, members, session):
+    expected = all_pairs(members)
+    rows, deferred, requests = collect(stub, members, max_requests=25, session=session)
+
+    # Every history first, then the newest gameweek's picks with what is left
+    assert requests == 25
+    assert pairs(rows["manager_gameweeks"]) == expected
+    first_picks = pairs(rows["manager_picks"])
+    assert len(first_picks) == 5
+    assert {gw for _, gw in first_picks} == {GAMEWEEK}
+    assert deferred == len(expected) - 5
+
+    # The next run only asks for the picks still missing
+    stored_gameweeks = pairs(rows["manager_gameweeks"])
+    rows, deferred, requests = collect(stub, members, stored_gameweeks, first_picks, session=session)
+    assert requests == len(expected) - 5
+    assert rows["manager_gameweeks"] == []
+    assert pairs(rows["manager_picks"]) == expected - first_picks
+    assert deferred == 0
+
+    # Once everything is stored, nothing is fetched
+    rows, deferred, requests = collect(stub, members, stored_gameweeks, expected, session=session)
+    assert requests == 0
+    assert rows["manager_gameweeks"] == rows["manager_picks"] == []
+    assert deferred == 0
+
+
+def test_budget_smaller_than_the_league_defers_histories(stub, members, session):
+    rows, deferred, requests = collect(stub, members, max_requests=8, session=session)
+    fetched = {entry for entry, _ in pairs(rows["manager_gameweeks"])}
+    assert requests == 8
+    assert len(fetched) == 8
+    assert rows["manager_picks"] == []
+    assert deferred == 12 + len(pairs(rows["manager_gameweeks"]))
+
+    # Resuming requests only the histories that were deferred, plus every missing pick
+    stored_gameweeks = pairs(rows["manager_gameweeks"])
+    rows, deferred, requests = collect(stub, members, stored_gameweeks, session=session)
+    assert {entry for entry, _ in pairs(rows["manager_gameweeks"])} == set(members) - fetched
+    assert pairs(rows["manager_picks"]) == all_pairs(members)
+    assert requests == 12 + len(all_pairs(members))
+    assert deferred == 0
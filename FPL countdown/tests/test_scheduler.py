@@ -0,0 +1,65 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import scheduler
+
+SEASON_START = datetime(2026, 8, 15, 10, 0, tzinfo=timezone.utc)
+# Gameweek 2: deadline a week in, matches finish three days later, data checked 12h after that
+GW2_DEADLINE = SEASON_START + timedelta(days=7)
+GW2_FINISHED = GW2_DEADLINE + timedelta(days=3)
+GW2_CHECKED = GW2_FINISHED + timedelta(hours=12)
+
+
+def plan_at(now, previous_checked=None):
+    return scheduler.plan(scheduler.synthetic_events(now, SEASON_START), now, previous_checked)
+
+
+def test_plan_sleeps_until_just_after_the_deadline():
+    now = GW2_DEADLINE - timedelta(hours=2)
+    assert plan_at(now, previous_checked=True) == (False, "idle", 2 * 60 * 60 + 60)
+    # Far from a deadline, the idle interval is capped
+    now = GW2_DEADLINE - timedelta(days=3)
+    assert plan_at(now, previous_checked=True) == (False, "idle", scheduler.IDLE_INTERVAL)
+
+
+def test_plan_across_a_gameweek():
+    assert plan_at(GW2_DEADLINE + timedelta(minutes=1), previous_checked=True) == \
+        (True, "live", scheduler.LIVE_INTERVAL)
+    assert plan_at(GW2_FINISHED + timedelta(hours=1), previous_checked=False) == \
+        (True, "awaiting_check", scheduler.CHECK_INTERVAL)
+
+    run, phase, interval = plan_at(GW2_CHECKED + timedelta(minutes=5), previous_checked=False)
+    assert (run, phase) == (True, "final")
+    assert interval == scheduler.IDLE_INTERVAL
+    # Only the check where data_checked flips triggers the final run
+    assert plan_at(GW2_CHECKED + timedelta(hours=1), previous_checked=True)[:2] == (False, "idle")
+
+
+def test_scheduler_across_a_deadline_and_rollover():
+    clock = scheduler.SimulatedClock(SEASON_START + timedelta(days=5))
+    runs, live_runs = [], []
+    sched = scheduler.Scheduler(job=lambda: runs.append(clock.now()),
+                                fetch_events=lambda: scheduler.synthetic_events(clock.now(), SEASON_START),
+                                clock=clock, rng=random.Random(0), verbose=False,
+                                live_job=lambda: live_runs.append(clock.now()))
+    stats = sched.run(until=GW2_CHECKED + timedelta(days=1))
+
+    assert clock.now() >= GW2_CHECKED + timedelta(days=1)
+    # The start-up run, then nothing until gameweek 2 goes live shortly after its deadline
+    assert runs[0] == SEASON_START + timedelta(days=5)
+    assert GW2_DEADLINE <= runs[1] <= GW2_DEADLINE + timedelta(minutes=5)
+    assert live_runs[0] == runs[1]
+
+    # Three days of matches at ~5 minute intervals, then ~30 minute checks for 12 hours
+    phases = stats["phases"]
+    live = 3 * 24 * 60 / 5
+    assert 0.9 * live <= phases["live"] <= 1.1 * live
+    assert len(live_runs) == phases["live"]
+    assert all(GW2_DEADLINE <= at < GW2_FINISHED + timedelta(minutes=6) for at in live_runs)
+    assert 20 <= phases["awaiting_check"] <= 27
+    # The rollover to gameweek 2 is not mistaken for data being checked; its own check is
+    assert phases["final"] == 1
+    assert stats["runs"] == 1 + phases["live"] + phases["awaiting_check"] + phases["final"]
+    assert runs[-1] >= GW2_CHECKED
+    # Idle checks are rare: a few before the deadline, a couple in the last day
+    assert phases["idle"] <= 10